@@ -0,0 +1,219 @@
+"""
+表單送出壓力測試（多個 headless context 並行填寫 form_demo / login_demo）
+
+lession4_3.py、lession4_4.py 以 slow_mo=500 的有頭瀏覽器各填一次表單，
+只能確認流程可以跑通。這裡用同樣的步驟做成壓力測試：
+- 以 local_site 在本機提供 lession4 的網頁，作為表單後端的替身
+- 一個 headless 瀏覽器開 N 個 context，從同一個佇列取出 CSV 中的資料輪流填寫送出
+- 每筆送出以「載入頁面 → 填寫 → 送出 → 看到成功訊息」計算延遲
+- 結束時報告每秒送出筆數與延遲百分位數（p50 / p90 / p95 / p99）
+
+CSV 欄位:
+    form : name, email, country, subscribe（subscribe 為 1 / true / yes / 是 時勾選）
+    login: username, password
+沒有指定 CSV 時自動產生 --records 筆測試資料。
+
+使用方式:
+    python form_load.py --contexts 8 --records 500
+    python form_load.py --target login --csv accounts.csv --contexts 4
+    python form_load.py --target form --url https://staging.example.com/register --csv people.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from playwright.async_api import Page, async_playwright
+
+from local_site import serve
+
+
+COUNTRIES = ("Taiwan", "China", "Japan", "Korea", "USA")
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ==================== 測試資料 ====================
+
+def load_records(path: str) -> List[Dict[str, str]]:
+    """讀取 CSV（UTF-8，可含 BOM）"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return [dict(row) for row in csv.DictReader(f)]
+
+
+def generate_records(target: str, count: int) -> List[Dict[str, str]]:
+    """產生測試資料"""
+    if target == "login":
+        return [{"username": "admin", "password": "password"} for _ in range(count)]
+    return [
+        {
+            "name": f"測試用戶{i:04d}",
+            "email": f"user{i:04d}@example.com",
+            "country": COUNTRIES[i % len(COUNTRIES)],
+            "subscribe": "1" if i % 2 else "0",
+        }
+        for i in range(count)
+    ]
+
+
+def _checked(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes", "y", "是")
+
+
+# ==================== 填寫表單 ====================
+
+async def submit_form(page: Page, url: str, record: Dict[str, str]):
+    """填寫 form_demo.html（與 lession4_3.py 相同的欄位），等到成功訊息出現"""
+    await page.goto(url, wait_until="domcontentloaded")
+    await page.fill("input#name", record.get("name", ""))
+    await page.fill("input#email", record.get("email", ""))
+    await page.select_option("select#country", record.get("country", ""))
+    await page.set_checked("input#subscribe", _checked(record.get("subscribe")))
+    await page.click("button#submit")
+    await page.wait_for_selector("#successMessage", state="visible")
+
+
+async def submit_login(page: Page, url: str, record: Dict[str, str]):
+    """
+    填寫 login_demo.html（與 lession4_4.py 相同的欄位）
+
+    帳密錯誤時頁面會跳出 alert，視為失敗。
+    """
+    rejected = asyncio.get_running_loop().create_future()
+
+    async def on_dialog(dialog):
+        if not rejected.done():
+            rejected.set_result(dialog.message)
+        await dialog.dismiss()
+
+    page.on("dialog", on_dialog)
+    try:
+        await page.goto(url, wait_until="domcontentloaded")
+        await page.fill("#username", record.get("username", ""))
+        await page.fill("#password", record.get("password", ""))
+        await page.click("#login-button")
+        success = asyncio.ensure_future(page.wait_for_selector("#success-message.show", state="visible"))
+        done, _ = await asyncio.wait({success, rejected}, return_when=asyncio.FIRST_COMPLETED)
+        if rejected in done:
+            success.cancel()
+            raise RuntimeError(f"登入被拒絕: {rejected.result().splitlines()[0]}")
+        success.result()
+    finally:
+        page.remove_listener("dialog", on_dialog)
+
+
+TARGETS = {
+    "form": ("form_demo.html", submit_form),
+    "login": ("login_demo.html", submit_login),
+}
+
+
+# ==================== 壓力測試 ====================
+
+async def run_load(
+    target: str,
+    url: str,
+    records: List[Dict[str, str]],
+    contexts: int,
+    timeout: float = 10.0
+) -> Tuple[List[float], List[str], float]:
+    """
+    以 N 個 context 並行送出所有資料
+
+    Args:
+        target: 'form' 或 'login'
+        url: 表單網址
+        records: 要送出的資料
+        contexts: 同時進行的 context 數
+        timeout: 單筆送出的逾時秒數
+
+    Returns:
+        (成功送出的延遲秒數列表, 失敗訊息列表, 總耗時秒數)
+    """
+    submit = TARGETS[target][1]
+    queue: asyncio.Queue = asyncio.Queue()
+    for record in records:
+        queue.put_nowait(record)
+
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        # context 與頁面先建立好，不算在測試時間內
+        pages = []
+        for _ in range(contexts):
+            context = await browser.new_context()
+            page = await context.new_page()
+            page.set_default_timeout(timeout * 1000)
+            pages.append(page)
+
+        async def worker(page: Page):
+            while True:
+                try:
+                    record = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                try:
+                    await submit(page, url, record)
+                except Exception as e:
+                    errors.append(str(e).splitlines()[0] if str(e) else type(e).__name__)
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(page) for page in pages))
+        elapsed = time.perf_counter() - start
+        await browser.close()
+
+    return latencies, errors, elapsed
+
+
+def report(latencies: List[float], errors: List[str], elapsed: float):
+    """輸出吞吐量與延遲百分位數"""
+    total = len(latencies) + len(errors)
+    print(f"送出 {total} 筆：成功 {len(latencies)}，失敗 {len(errors)}，耗時 {elapsed:.2f} 秒")
+    if elapsed > 0:
+        print(f"吞吐量: {len(latencies) / elapsed:.1f} 筆/秒")
+    if latencies:
+        values = np.array(latencies) * 1000
+        parts = [f"p{p} {value:.0f}" for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))]
+        print(f"延遲 (ms): {'  '.join(parts)}  max {values.max():.0f}  平均 {values.mean():.0f}")
+    if errors:
+        print("失敗原因:")
+        for message in sorted(set(errors)):
+            print(f"  {errors.count(message):>5} × {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表單送出壓力測試")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="form", help="要填寫的表單")
+    parser.add_argument("--csv", default=None, help="測試資料 CSV")
+    parser.add_argument("--records", type=int, default=200, help="沒有 CSV 時產生的資料筆數")
+    parser.add_argument("--contexts", type=int, default=8, help="同時進行的 context 數")
+    parser.add_argument("--url", default=None, help="表單網址（預設以本機伺服器提供 lession4 的網頁）")
+    parser.add_argument("--timeout", type=float, default=10.0, help="單筆逾時秒數")
+    args = parser.parse_args()
+
+    records = load_records(args.csv) if args.csv else generate_records(args.target, args.records)
+    if not records:
+        print("沒有任何測試資料")
+        return
+
+    if args.url:
+        url = args.url
+        print(f"目標: {url}  context: {args.contexts}  資料: {len(records)} 筆\n")
+        report(*asyncio.run(run_load(args.target, url, records, args.contexts, args.timeout)))
+        return
+
+    with serve() as base_url:
+        url = base_url + TARGETS[args.target][0]
+        print(f"目標: {url}  context: {args.contexts}  資料: {len(records)} 筆\n")
+        report(*asyncio.run(run_load(args.target, url, records, args.contexts, args.timeout)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+以本機 HTTP 伺服器提供 lession4 的示範網頁
+
+file:// 網址沒有 origin，cookie / localStorage 與真實網站的行為不同，
+也無法讓多個瀏覽器 context 模擬對同一個後端送出請求。
+這裡以 ThreadingHTTPServer 在背景執行緒提供整個 lession4 資料夾，
+form_demo.html、login_demo.html、waiting_demo.html 都以 http://127.0.0.1:<port>/ 存取。
+"""
+
+import contextlib
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+
+SITE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """不輸出每個請求的紀錄（壓力測試時會有上千筆）"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve(directory: str = SITE_DIR, port: int = 0) -> Iterator[str]:
+    """
+    在背景執行緒啟動靜態檔案伺服器
+
+    Args:
+        directory: 提供的資料夾
+        port: 連接埠（0 表示自動選擇）
+
+    Yields:
+        網站根網址，例如 'http://127.0.0.1:54321/'
+    """
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='local-site', daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import time
+    import urllib.request
+
+    with serve() as base_url:
+        for name in ('form_demo.html', 'login_demo.html', 'waiting_demo.html'):
+            with urllib.request.urlopen(base_url + name) as response:
+                print(f"✓ {base_url}{name}  {response.status}  {len(response.read()):,} bytes")
+        print("按 Ctrl+C 結束")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,229 @@
+"""
+登入狀態共用（Playwright storage state）
+
+lession4_4.py 每次執行都重新走一次登入流程（載入頁面、填帳密、按登入、等待結果），
+需要登入的爬蟲每個工作都重複這些步驟。這裡改為：
+- 只登入一次，把 storage state（cookie + localStorage）寫到磁碟
+- 之後建立的 context 都以這份 state 開始，直接就是登入狀態
+- 先以輕量的驗證（probe）確認 state 仍然有效，失敗時才重新登入
+- 多個並行的 worker 共用同一份 state：同一時間只會有一個在登入，
+  其他 worker 等待並沿用結果；跨行程時以檔案鎖（fcntl）排隊
+
+使用方式:
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        sessions = LoginSession(browser, login_url)
+        context = await sessions.new_context()        # 已登入的 context
+        ...
+        # 工作中發現被登出時:
+        await sessions.invalidate(generation)         # 只有第一個回報的 worker 會觸發重新登入
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+try:
+    import fcntl  # 只有 Linux / macOS 有
+except ImportError:
+    fcntl = None
+
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "login_state.json")
+
+
+# ==================== login_demo.html 的登入與驗證 ====================
+
+async def demo_login(page: Page, login_url: str, username: str = "admin", password: str = "password"):
+    """與 lession4_4.py 相同的登入步驟（不等固定秒數，改為等待登入成功的訊息）"""
+    await page.goto(login_url, wait_until="domcontentloaded")
+    await page.fill("#username", username)
+    await page.fill("#password", password)
+    await page.click("#login-button")
+    await page.wait_for_selector("#success-message.show", state="visible")
+
+
+async def demo_probe(page: Page, login_url: str) -> bool:
+    """載入頁面，確認 localStorage 中的登入狀態仍然有效"""
+    await page.goto(login_url, wait_until="domcontentloaded")
+    return bool(await page.evaluate("() => document.body.dataset.user || ''"))
+
+
+# ==================== 共用的登入狀態 ====================
+
+class LoginSession:
+    """以 storage state 檔共用的登入狀態"""
+
+    def __init__(
+        self,
+        browser: Browser,
+        login_url: str,
+        state_path: str = DEFAULT_STATE_PATH,
+        login: Callable[[Page, str], Awaitable[None]] = demo_login,
+        probe: Callable[[Page, str], Awaitable[bool]] = demo_probe,
+        probe_interval: float = 60.0
+    ):
+        """
+        初始化
+
+        Args:
+            browser: 共用的瀏覽器
+            login_url: 登入頁網址（也傳給 login / probe）
+            state_path: storage state 檔
+            login: 登入流程 (page, login_url)
+            probe: 驗證登入狀態 (page, login_url) → 是否有效
+            probe_interval: 驗證通過後多少秒內不再重複驗證
+        """
+        self.browser = browser
+        self.login_url = login_url
+        self.state_path = state_path
+        self.login = login
+        self.probe = probe
+        self.probe_interval = probe_interval
+
+        # 每次重新登入加一；worker 回報失效時帶上自己拿到的版本，避免重複登入
+        self.generation = 0
+        self.logins = 0
+        self.probes = 0
+
+        self._state: Optional[Dict[str, Any]] = None
+        self._verified_at = 0.0
+        self._lock = asyncio.Lock()
+
+    # ---------- 磁碟 ----------
+
+    def _read_state(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_state(self, state: Dict[str, Any]):
+        """暫存檔 + os.replace 原子寫入（state 含登入 cookie，只有自己可讀）"""
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    async def _file_lock(self):
+        """取得跨行程的檔案鎖（在執行緒中等待，不阻塞事件迴圈）"""
+        if fcntl is None:
+            return None
+        lock_file = open(self.state_path + ".lock", "w")
+        await asyncio.get_running_loop().run_in_executor(None, fcntl.flock, lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    @staticmethod
+    def _file_unlock(lock_file):
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    # ---------- 驗證與登入 ----------
+
+    async def _is_valid(self, state: Dict[str, Any]) -> bool:
+        context = await self.browser.new_context(storage_state=state)
+        try:
+            page = await context.new_page()
+            self.probes += 1
+            return await self.probe(page, self.login_url)
+        except Exception:
+            return False
+        finally:
+            await context.close()
+
+    async def _login(self) -> Dict[str, Any]:
+        context = await self.browser.new_context()
+        try:
+            page = await context.new_page()
+            await self.login(page, self.login_url)
+            self.logins += 1
+            return await context.storage_state()
+        finally:
+            await context.close()
+
+    async def ensure(self) -> Dict[str, Any]:
+        """
+        取得有效的 storage state（必要時才驗證或重新登入）
+
+        Returns:
+            storage state dict（可直接傳給 browser.new_context(storage_state=...)）
+        """
+        if self._state is not None and time.monotonic() - self._verified_at < self.probe_interval:
+            return self._state
+
+        async with self._lock:
+            # 等待鎖的期間可能已經有其他 worker 完成驗證 / 登入
+            if self._state is not None and time.monotonic() - self._verified_at < self.probe_interval:
+                return self._state
+
+            lock_file = await self._file_lock()
+            try:
+                # 另一個行程可能剛寫入新的 state
+                state = self._read_state()
+                if state is None or not await self._is_valid(state):
+                    state = await self._login()
+                    self._write_state(state)
+                    self.generation += 1
+                elif state != self._state:
+                    self.generation += 1
+            finally:
+                self._file_unlock(lock_file)
+
+            self._state = state
+            self._verified_at = time.monotonic()
+            return state
+
+    async def invalidate(self, generation: Optional[int] = None):
+        """
+        回報登入狀態已失效（下次 ensure 會重新驗證）
+
+        Args:
+            generation: 使用中的 state 版本；已經有人換過新版本時忽略
+        """
+        async with self._lock:
+            if generation is None or generation == self.generation:
+                self._verified_at = 0.0
+
+    async def new_context(self, **kwargs) -> BrowserContext:
+        """建立已登入的 context（其他參數同 browser.new_context）"""
+        state = await self.ensure()
+        return await self.browser.new_context(storage_state=state, **kwargs)
+
+
+if __name__ == "__main__":
+    # 以本機伺服器上的 login_demo.html 示範：8 個並行 worker 只登入一次，第二次執行完全不登入
+    from playwright.async_api import async_playwright
+
+    from local_site import serve
+
+    async def worker(sessions: LoginSession, index: int) -> str:
+        context = await sessions.new_context()
+        try:
+            page = await context.new_page()
+            await page.goto(sessions.login_url, wait_until="domcontentloaded")
+            user = await page.evaluate("() => document.body.dataset.user || ''")
+            return f"worker {index}: {'已登入 ' + user if user else '未登入'}"
+        finally:
+            await context.close()
+
+    async def demo(login_url: str):
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            sessions = LoginSession(browser, login_url)
+            start = time.perf_counter()
+            for line in await asyncio.gather(*(worker(sessions, i) for i in range(8))):
+                print(line)
+            print(f"\n登入 {sessions.logins} 次，驗證 {sessions.probes} 次，"
+                  f"{time.perf_counter() - start:.2f} 秒（state: {sessions.state_path}）")
+            await browser.close()
+
+    # localStorage 以 origin 區分，固定連接埠才能在下次執行時沿用
+    with serve(port=8765) as base_url:
+        asyncio.run(demo(base_url + "login_demo.html"))
@@ -0,0 +1,287 @@
+"""
+等待策略效能比較（waiting_demo.html，headless，不需網路）
+
+lession5_1.x / 5_2.x 用了好幾種等待方式：
+    wait_for_load_state("networkidle")、wait_for_selector 的 visible / hidden 成對等待、
+    wait_for_function 輪詢，以及固定秒數的 wait_for_timeout。
+這裡把每種策略對 waiting_demo.html 的每個情境重複執行多次，量測：
+- 取得內容時間：按下按鈕到策略返回的時間
+- 延遲：策略返回時，內容實際已經出現多久（頁面中以 MutationObserver 記錄內容出現的時間）
+- 不穩定率：策略返回時內容其實還沒好（太早返回）或逾時的比例
+最後列出每個情境中「完全穩定且最快」的策略，作為正式爬蟲 wait_for 預設值的依據。
+
+每次執行前重新載入頁面（上一輪的結果不會殘留），多個情境 / 策略在不同 context 中並行。
+
+執行方式:
+    python bench_waiting.py
+    python bench_waiting.py --runs 30 --contexts 10 --json waiting_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+from playwright.async_api import Page, async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+
+HTML_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "waiting_demo.html")
+
+# 情境：觸發按鈕、載入指示器、結果區塊，以及「內容已經正確出現」的判斷式
+SCENARIOS = {
+    "延遲載入": {
+        "button": "#trigger-delayed",
+        "loading": "#loading-1",
+        "result": "#delayed-result.show",
+        "ready": "document.querySelector('#delayed-result').classList.contains('show')",
+    },
+    "動態內容": {
+        "button": "#load-data",
+        "loading": "#loading-2",
+        "result": "#data-result.show",
+        "ready": "document.querySelectorAll('#dynamic-content > .item').length >= 3",
+    },
+    "表單提交": {
+        "button": "#submit-form",
+        "loading": "#loading-3",
+        "result": "#form-result.show",
+        "ready": "document.querySelector('#submit-message').textContent.length > 0",
+    },
+    "批次載入": {
+        "button": "#load-items",
+        "loading": "#loading-4",
+        "result": "#items-result.show",
+        "ready": "document.querySelectorAll('#items-container > .item').length >= 5",
+    },
+    "API 請求": {
+        "button": "#api-request",
+        "loading": "#loading-5",
+        "result": "#api-result.show",
+        "ready": "document.querySelector('#api-response').textContent.length > 0",
+    },
+}
+
+
+# ==================== 等待策略 ====================
+# 每個策略在按下按鈕之後呼叫：(page, scenario) → 等到策略認為內容已經好了
+
+async def wait_networkidle(page: Page, scenario: Dict[str, str]):
+    """lession5_1.x：wait_for_load_state("networkidle")"""
+    await page.wait_for_load_state("networkidle")
+
+
+async def wait_selector_pair(page: Page, scenario: Dict[str, str]):
+    """lession5_1.1：載入指示器 visible → hidden → 結果 visible"""
+    await page.wait_for_selector(scenario["loading"], state="visible")
+    await page.wait_for_selector(scenario["loading"], state="hidden")
+    await page.wait_for_selector(scenario["result"], state="visible")
+
+
+async def wait_result_selector(page: Page, scenario: Dict[str, str]):
+    """直接等待結果區塊 visible"""
+    await page.wait_for_selector(scenario["result"], state="visible")
+
+
+async def wait_function_raf(page: Page, scenario: Dict[str, str]):
+    """lession5_1.3：wait_for_function（預設每個畫格檢查一次）"""
+    await page.wait_for_function(f"() => {scenario['ready']}")
+
+
+async def wait_function_100ms(page: Page, scenario: Dict[str, str]):
+    """wait_for_function 每 100 ms 檢查一次"""
+    await page.wait_for_function(f"() => {scenario['ready']}", polling=100)
+
+
+async def wait_sleep_1s(page: Page, scenario: Dict[str, str]):
+    """固定等待 1 秒"""
+    await page.wait_for_timeout(1000)
+
+
+async def wait_sleep_3s(page: Page, scenario: Dict[str, str]):
+    """lession5_2.x：固定等待 3 秒"""
+    await page.wait_for_timeout(3000)
+
+
+STRATEGIES: Dict[str, Callable[[Page, Dict[str, str]], Awaitable[None]]] = {
+    "networkidle": wait_networkidle,
+    "selector 成對": wait_selector_pair,
+    "結果 selector": wait_result_selector,
+    "function (raf)": wait_function_raf,
+    "function (100ms)": wait_function_100ms,
+    "sleep 1s": wait_sleep_1s,
+    "sleep 3s": wait_sleep_3s,
+}
+
+
+# ==================== 量測 ====================
+
+# 在頁面中記錄按下按鈕與內容出現的時間（performance.now()，毫秒）
+_INSTALL_WATCHER_JS = """
+([button, ready]) => {
+    window.__clickedAt = null;
+    window.__readyAt = null;
+    const isReady = new Function('return (' + ready + ')');
+    document.querySelector(button).addEventListener('click', () => {
+        window.__clickedAt = performance.now();
+        const observer = new MutationObserver(() => {
+            if (window.__readyAt === null && isReady()) {
+                window.__readyAt = performance.now();
+                observer.disconnect();
+            }
+        });
+        observer.observe(document.body, {subtree: true, childList: true, attributes: true, characterData: true});
+    }, {capture: true, once: true});
+}
+"""
+
+_READ_RESULT_JS = """
+(ready) => ({
+    ready: Boolean(new Function('return (' + ready + ')')()),
+    clickedAt: window.__clickedAt,
+    readyAt: window.__readyAt,
+    now: performance.now(),
+})
+"""
+
+
+async def run_once(page: Page, url: str, scenario: Dict[str, str], strategy, timeout: float) -> Dict[str, Any]:
+    """
+    執行一次：重新載入頁面 → 安裝觀察器 → 按下按鈕 → 等待策略返回 → 檢查內容
+
+    Returns:
+        {'ok', 'seconds', 'overshoot', 'error'}
+        overshoot 為策略返回時內容已經出現多久（秒；太早返回時為負值或 None）
+    """
+    await page.goto(url, wait_until="load")
+    await page.evaluate(_INSTALL_WATCHER_JS, [scenario["button"], scenario["ready"]])
+    page.set_default_timeout(timeout * 1000)
+
+    start = time.perf_counter()
+    try:
+        await page.click(scenario["button"])
+        await strategy(page, scenario)
+    except PlaywrightTimeoutError:
+        return {"ok": False, "seconds": time.perf_counter() - start, "overshoot": None, "error": "timeout"}
+    seconds = time.perf_counter() - start
+
+    state = await page.evaluate(_READ_RESULT_JS, scenario["ready"])
+    overshoot = None
+    if state["readyAt"] is not None:
+        overshoot = (state["now"] - state["readyAt"]) / 1000
+    return {
+        "ok": state["ready"],
+        "seconds": seconds,
+        "overshoot": overshoot,
+        "error": None if state["ready"] else "early",
+    }
+
+
+async def run_benchmark(runs: int, contexts: int, timeout: float) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    """
+    每個（情境, 策略）各執行 runs 次，在 contexts 個 context 中並行
+
+    Returns:
+        {(情境, 策略): [run_once 的結果, ...]}
+    """
+    url = f"file://{HTML_PATH}"
+    jobs = [(name, label) for name in SCENARIOS for label in STRATEGIES for _ in range(runs)]
+    random.shuffle(jobs)  # 交錯執行，避免某個策略剛好碰上機器忙碌的時段
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    results: Dict[Tuple[str, str], List[Dict[str, Any]]] = {
+        (name, label): [] for name in SCENARIOS for label in STRATEGIES
+    }
+    done = 0
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+
+        async def worker():
+            nonlocal done
+            context = await browser.new_context()
+            page = await context.new_page()
+            while True:
+                try:
+                    name, label = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                result = await run_once(page, url, SCENARIOS[name], STRATEGIES[label], timeout)
+                results[(name, label)].append(result)
+                done += 1
+                if done % 20 == 0 or done == len(jobs):
+                    print(f"  進度 {done}/{len(jobs)}")
+            await context.close()
+
+        await asyncio.gather(*(worker() for _ in range(contexts)))
+        await browser.close()
+    return results
+
+
+# ==================== 報告 ====================
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """一組結果的中位數 / p95 時間、延遲與不穩定率"""
+    seconds = np.array([result["seconds"] for result in results]) * 1000
+    overshoot = np.array([result["overshoot"] for result in results if result["ok"] and result["overshoot"] is not None]) * 1000
+    failures = sum(not result["ok"] for result in results)
+    return {
+        "runs": len(results),
+        "median_ms": float(np.median(seconds)),
+        "p95_ms": float(np.percentile(seconds, 95)),
+        "overshoot_ms": float(np.median(overshoot)) if overshoot.size else None,
+        "flaky": failures / len(results),
+        "early": sum(result["error"] == "early" for result in results),
+        "timeouts": sum(result["error"] == "timeout" for result in results),
+    }
+
+
+def report(results: Dict[Tuple[str, str], List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """輸出各情境的比較表，並回傳可存成 JSON 的摘要"""
+    summary: Dict[str, Any] = {}
+    for name in SCENARIOS:
+        rows = {label: summarize(results[(name, label)]) for label in STRATEGIES}
+        stable = {label: row for label, row in rows.items() if row["flaky"] == 0}
+        best = min(stable, key=lambda label: stable[label]["median_ms"]) if stable else None
+        summary[name] = {"best": best, "strategies": rows}
+
+        print(f"\n【{name}】")
+        print(f"  {'策略':<18}{'中位數':>9}{'p95':>9}{'多等了':>9}{'不穩定':>9}")
+        for label, row in rows.items():
+            overshoot = f"{row['overshoot_ms']:.0f}" if row["overshoot_ms"] is not None else "-"
+            mark = " ★" if label == best else ""
+            print(f"  {label:<18}{row['median_ms']:>9.0f}{row['p95_ms']:>9.0f}{overshoot:>9}"
+                  f"{row['flaky']:>8.0%}{mark}")
+
+    print("\n建議（完全穩定且最快）:")
+    for name, item in summary.items():
+        print(f"  {name}: {item['best'] or '沒有完全穩定的策略'}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="waiting_demo.html 等待策略效能比較")
+    parser.add_argument("--runs", type=int, default=10, help="每個情境 × 策略的執行次數")
+    parser.add_argument("--contexts", type=int, default=8, help="並行的 context 數")
+    parser.add_argument("--timeout", type=float, default=10.0, help="單次等待逾時秒數")
+    parser.add_argument("--json", default=None, help="摘要輸出的 JSON 檔")
+    args = parser.parse_args()
+
+    total = len(SCENARIOS) * len(STRATEGIES) * args.runs
+    print(f"{len(SCENARIOS)} 個情境 × {len(STRATEGIES)} 種策略 × {args.runs} 次 = {total} 次，{args.contexts} 個 context 並行")
+    results = asyncio.run(run_benchmark(args.runs, args.contexts, args.timeout))
+    summary = report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n摘要: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+高鐵時刻表查詢引擎（async Playwright，多個 context 並行）
+
+lession5_2.4.py 的流程是：每次查詢啟動一個瀏覽器、slow_mo=500、
+查詢後固定 wait_for_timeout(10000)，一次只能查一組「台北 → 台南」。
+要查完所有站別組合（12 站 × 11 = 132 組）× 多個出發時間，照原本的方式要好幾個小時。
+
+這裡改為：
+- 整個程式只啟動一個瀏覽器，開 N 個 context 組成 pool，每個 context 只按一次「我同意」
+- 每個 context 擋掉圖片、字型、影片，頁面保持在首頁重複使用
+- 查詢送出後等待時刻表的 XHR 回應（/TimeTable/Search）直接取得 JSON，
+  沒有攔截到時才等待結果列的 selector 出現，以一次 evaluate 讀出整張表，不再固定 sleep
+- 多組查詢以 asyncio 並行，context 用完歸還 pool；失敗的查詢換一頁重試
+- 回傳結構化的時刻表列（dict），整個矩陣可輸出為 JSON / CSV
+
+使用方式:
+    python thsrc_engine.py                           # 台北 → 台南，一小時後出發
+    python thsrc_engine.py --matrix --times 08:00,12:00,18:00 --contexts 6 --output matrix.json
+
+    # 錄製後離線重播（查詢內容包含日期時間，重播時要指定與錄製時相同的 --date / --times）
+    CRAWL_REPLAY=record python thsrc_engine.py --date 2026/01/05 --times 08:00
+    CRAWL_REPLAY=replay python thsrc_engine.py --date 2026/01/05 --times 08:00
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from playwright.async_api import Browser, BrowserContext, Page, Response, async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# 共用 lession8 的錄製 / 重播（CRAWL_REPLAY=record / replay）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lession8'))
+import replay
+
+
+THSRC_URL = "https://www.thsrc.com.tw/"
+
+# 南到北的所有車站（與 #select_location01 / #select_location02 的選項文字相同）
+STATIONS = ("南港", "台北", "板橋", "桃園", "新竹", "苗栗", "台中", "彰化", "雲林", "嘉義", "台南", "左營")
+
+# 查詢表單與結果（與 lession5_2.4.py 相同的 selector）
+START_SELECT = "#select_location01"
+END_SELECT = "#select_location02"
+DATE_INPUT = "#Departdate01"
+TIME_INPUT = "#outWardTime"
+CONSENT_BUTTON_TEXT = "我同意"
+SEARCH_BUTTON_TEXT = "查詢"
+
+# 時刻表查詢的 XHR 與結果列（攔截不到 XHR 時才讀 DOM）
+TIMETABLE_API = "/TimeTable/Search"
+RESULT_ROW_SELECTOR = "#ttab-01 .tr-row"
+
+# 不需要的資源類型（時刻表只需要 HTML、JS 與 XHR）
+BLOCKED_RESOURCES = {"image", "media", "font"}
+
+# 結果列的欄位
+ROW_FIELDS = ("起站", "迄站", "查詢日期", "查詢時間", "車次", "出發時間", "抵達時間", "行車時間", "早鳥優惠", "大學生優惠")
+
+# 結果列在 DOM 中的讀法（一次 evaluate 讀出整張表）
+_READ_ROWS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map(row => {
+    const text = (css) => {
+        const node = row.querySelector(css);
+        return node ? node.textContent.trim() : '';
+    };
+    const times = Array.from(row.querySelectorAll('.font-16r')).map(node => node.textContent.trim());
+    return {
+        train: text('#QueryCode') || text('.train-code'),
+        departure: times[0] || '',
+        arrival: times[1] || '',
+        duration: text('.traffic-time') || text('#QueryTime'),
+        early_bird: text('.early-bird'),
+        student: text('.student-discount'),
+    };
+})
+"""
+
+# 送出查詢前清掉上一次的結果列（pool 中的頁面會留著舊的時刻表）
+_CLEAR_ROWS_JS = "(selector) => document.querySelectorAll(selector).forEach(row => row.remove())"
+
+
+# ==================== 結果解析 ====================
+
+def _first(item: Dict[str, Any], *keys: str) -> str:
+    """取第一個存在的鍵（API 欄位名稱偶有不同）"""
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def rows_from_api(data: Dict[str, Any], query: Dict[str, str]) -> List[Dict[str, str]]:
+    """
+    將 /TimeTable/Search 的 JSON 回應轉為時刻表列
+
+    Args:
+        data: 回應 JSON（data.DepartureTable.TrainItem 為車次列表）
+        query: 查詢條件（起站、迄站、查詢日期、查詢時間）
+
+    Returns:
+        時刻表列，欄位見 ROW_FIELDS
+    """
+    body = data.get("data") or data.get("Data") or {}
+    table = body.get("DepartureTable") or body.get("departureTable") or {}
+    items = table.get("TrainItem") or table.get("trainItem") or []
+    rows = []
+    for item in items:
+        discounts = item.get("Discount") or []
+        early = [d for d in discounts if "早鳥" in _first(d, "Name", "Id")]
+        student = [d for d in discounts if "大學" in _first(d, "Name", "Id")]
+        rows.append({
+            **query,
+            "車次": _first(item, "TrainNumber", "TrainNo"),
+            "出發時間": _first(item, "DepartureTime"),
+            "抵達時間": _first(item, "DestinationTime", "ArrivalTime"),
+            "行車時間": _first(item, "Duration"),
+            "早鳥優惠": _first(early[0], "Value") if early else "",
+            "大學生優惠": _first(student[0], "Value") if student else "",
+        })
+    return rows
+
+
+def rows_from_dom(raw_rows: List[Dict[str, str]], query: Dict[str, str]) -> List[Dict[str, str]]:
+    """將 _READ_ROWS_JS 讀出的結果列轉為時刻表列"""
+    return [
+        {
+            **query,
+            "車次": row["train"],
+            "出發時間": row["departure"],
+            "抵達時間": row["arrival"],
+            "行車時間": row["duration"],
+            "早鳥優惠": row["early_bird"],
+            "大學生優惠": row["student"],
+        }
+        for row in raw_rows
+        if row["train"] or row["departure"]
+    ]
+
+
+# ==================== 引擎 ====================
+
+class THSRCEngine:
+    """共用一個瀏覽器、以 context pool 並行查詢的高鐵時刻表引擎"""
+
+    def __init__(
+        self,
+        contexts: int = 4,
+        headless: bool = True,
+        timeout: float = 20.0,
+        retries: int = 2
+    ):
+        """
+        初始化（進入 async with 時才啟動瀏覽器）
+
+        Args:
+            contexts: context 數量（同時進行的查詢數）
+            headless: 是否無頭模式
+            timeout: 單次查詢等待結果的秒數
+            retries: 失敗時重試次數（每次換一個重新載入的頁面）
+        """
+        self.size = contexts
+        self.headless = headless
+        self.timeout = timeout
+        self.retries = retries
+
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._contexts: List[BrowserContext] = []
+        self._pool: Optional[asyncio.Queue] = None
+        self._created = 0
+        self._creating = asyncio.Lock()
+
+    async def __aenter__(self) -> "THSRCEngine":
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._pool = asyncio.Queue()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    # ---------- context pool ----------
+
+    async def _new_page(self) -> Page:
+        """建立新的 context：擋掉不需要的資源、載入首頁並按一次「我同意」"""
+        context = await self._browser.new_context(locale="zh-TW")
+        self._contexts.append(context)
+        await replay.attach(context)
+
+        async def block(route):
+            if route.request.resource_type in BLOCKED_RESOURCES:
+                await route.abort()
+            else:
+                await route.fallback()  # 交給錄製 / 重播（未設定時直接送出）
+
+        await context.route("**/*", block)
+        page = await context.new_page()
+        page.set_default_timeout(self.timeout * 1000)
+        await self._open_form(page, consent=True)
+        return page
+
+    async def _open_form(self, page: Page, consent: bool = False):
+        """
+        載入首頁直到查詢表單可用
+
+        Args:
+            consent: 是否等待並按下「我同意」（每個 context 只需要第一次，之後由 cookie 記住）
+        """
+        await page.goto(THSRC_URL, wait_until="domcontentloaded")
+        if consent:
+            try:
+                await page.locator("button", has_text=CONSENT_BUTTON_TEXT).click(timeout=5000)
+            except PlaywrightTimeoutError:
+                pass  # 沒有出現同意視窗
+        await page.locator(START_SELECT).wait_for(state="attached")
+
+    async def _acquire(self) -> Page:
+        """從 pool 取得頁面（pool 未滿時建立新的 context）"""
+        while True:
+            async with self._creating:
+                create = self._pool.empty() and self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                break
+            page = await self._pool.get()
+            if page is not None:
+                return page
+            # None 表示有頁面被關閉而空出位置：重新檢查，由這個查詢建立新的 context
+        try:
+            return await self._new_page()
+        except Exception:
+            self._created -= 1
+            self._pool.put_nowait(None)  # 喚醒等待中的查詢，讓它們自己重試建立
+            raise
+
+    def _release(self, page: Page):
+        self._pool.put_nowait(page)
+
+    async def _discard(self, page: Page):
+        """關閉無法復原的頁面（連同 context），不放回 pool"""
+        context = page.context
+        try:
+            await context.close()
+        except Exception:
+            pass
+        if context in self._contexts:
+            self._contexts.remove(context)
+        self._created -= 1
+        self._pool.put_nowait(None)
+
+    # ---------- 查詢 ----------
+
+    async def _fill_form(self, page: Page, start: str, end: str, when: datetime):
+        """填入起迄站與出發時間後送出（與 schedule_and_fare 相同的步驟，不再 slow_mo）"""
+        if not await page.locator(START_SELECT).count():
+            await self._open_form(page)
+        await page.locator(START_SELECT).select_option(start)
+        await page.locator(END_SELECT).select_option(end)
+
+        date_input = page.locator(DATE_INPUT)
+        await date_input.click()
+        await date_input.fill("")
+        await date_input.fill(when.strftime("%Y/%m/%d"))
+
+        time_input = page.locator(TIME_INPUT)
+        await time_input.click()
+        await time_input.fill("")
+        await time_input.fill(when.strftime("%H:%M"))
+
+        # 讀 DOM 的備援路徑要等的是這次查詢的結果列，而不是上一次留下的
+        await page.evaluate(_CLEAR_ROWS_JS, RESULT_ROW_SELECTOR)
+        await page.locator("button", has_text=SEARCH_BUTTON_TEXT).click()
+
+    async def _query_page(self, page: Page, start: str, end: str, when: datetime) -> List[Dict[str, str]]:
+        """在指定頁面上查詢一次，等待 XHR 回應（或結果列）而不是固定秒數"""
+        query = {
+            "起站": start,
+            "迄站": end,
+            "查詢日期": when.strftime("%Y/%m/%d"),
+            "查詢時間": when.strftime("%H:%M"),
+        }
+
+        def is_timetable(response: Response) -> bool:
+            return TIMETABLE_API in response.url and response.request.method == "POST"
+
+        try:
+            async with page.expect_response(is_timetable, timeout=self.timeout * 1000) as response_info:
+                await self._fill_form(page, start, end, when)
+            response = await response_info.value
+            return rows_from_api(await response.json(), query)
+        except (PlaywrightTimeoutError, ValueError):
+            # 沒有攔截到 JSON：改為等待結果列出現，再一次讀出整張表
+            await page.wait_for_selector(RESULT_ROW_SELECTOR, state="attached")
+            return rows_from_dom(await page.evaluate(_READ_ROWS_JS, RESULT_ROW_SELECTOR), query)
+
+    async def query(self, start: str, end: str, when: datetime) -> List[Dict[str, str]]:
+        """
+        查詢一組起迄站的時刻表
+
+        Args:
+            start: 起站（STATIONS 之一）
+            end: 迄站
+            when: 出發日期時間
+
+        Returns:
+            時刻表列（欄位見 ROW_FIELDS）
+        """
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            try:
+                page = await self._acquire()
+            except Exception as e:
+                last_error = e  # 建立 context 失敗（例如首頁載入逾時）
+                continue
+            try:
+                rows = await self._query_page(page, start, end, when)
+            except Exception as e:
+                last_error = e
+                # 頁面狀態不明（彈出視窗、導向錯誤頁…），重新載入後再放回 pool；
+                # 重新載入也失敗就關閉，空出的位置由下一次取得頁面時重新建立
+                try:
+                    await self._open_form(page)
+                except Exception:
+                    await self._discard(page)
+                    continue
+                self._release(page)
+                continue
+            self._release(page)
+            return rows
+        raise RuntimeError(f"{start} → {end} {when:%Y/%m/%d %H:%M} 查詢失敗: {last_error}")
+
+    async def query_many(
+        self,
+        queries: Iterable[Tuple[str, str, datetime]],
+        progress: bool = True
+    ) -> Tuple[List[Dict[str, str]], List[Tuple[str, str, datetime, str]]]:
+        """
+        並行查詢多組條件（同時進行的數量等於 context 數）
+
+        Args:
+            queries: [(起站, 迄站, 出發時間), ...]
+            progress: 是否顯示進度
+
+        Returns:
+            (所有時刻表列, 失敗的查詢 [(起站, 迄站, 出發時間, 錯誤訊息), ...])
+        """
+        queries = list(queries)
+        rows: List[Dict[str, str]] = []
+        failed: List[Tuple[str, str, datetime, str]] = []
+        done = 0
+        start_time = time.perf_counter()
+
+        async def run(start: str, end: str, when: datetime):
+            nonlocal done
+            try:
+                result = await self.query(start, end, when)
+                rows.extend(result)
+                status = f"{len(result)} 班"
+            except Exception as e:
+                failed.append((start, end, when, str(e)))
+                status = "失敗"
+            done += 1
+            if progress:
+                elapsed = time.perf_counter() - start_time
+                print(f"[{done}/{len(queries)}] {start} → {end} {when:%H:%M}  {status}"
+                      f"  （{elapsed:.0f} 秒，平均 {elapsed / done:.1f} 秒/組）")
+
+        await asyncio.gather(*(run(*query) for query in queries))
+        return rows, failed
+
+    async def query_matrix(
+        self,
+        day: date,
+        times: Iterable[str],
+        stations: Iterable[str] = STATIONS,
+        progress: bool = True
+    ) -> Tuple[List[Dict[str, str]], List[Tuple[str, str, datetime, str]]]:
+        """
+        查詢所有站別組合 × 出發時間
+
+        Args:
+            day: 出發日期
+            times: 出發時間，例如 ["08:00", "12:00"]
+            stations: 車站（預設全部 12 站）
+
+        Returns:
+            同 query_many
+        """
+        stations = list(stations)
+        moments = [datetime.combine(day, datetime.strptime(value, "%H:%M").time()) for value in times]
+        queries = [
+            (start, end, when)
+            for when in moments
+            for start, end in itertools.permutations(stations, 2)
+        ]
+        return await self.query_many(queries, progress)
+
+
+# ==================== 輸出 ====================
+
+def save_rows(rows: List[Dict[str, str]], path: str):
+    """依副檔名存成 JSON 或 CSV"""
+    rows = sorted(rows, key=lambda row: (
+        STATIONS.index(row["起站"]), STATIONS.index(row["迄站"]), row["查詢時間"], row["出發時間"]
+    ))
+    if path.lower().endswith(".csv"):
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=ROW_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="高鐵時刻表並行查詢")
+    parser.add_argument("--start", default="台北", help="起站")
+    parser.add_argument("--end", default="台南", help="迄站")
+    parser.add_argument("--matrix", action="store_true", help="查詢所有站別組合")
+    parser.add_argument("--date", default=None, help="出發日期 YYYY/MM/DD（預設今天或一小時後）")
+    parser.add_argument("--times", default=None, help="出發時間，以逗號分隔（預設一小時後）")
+    parser.add_argument("--contexts", type=int, default=4, help="同時進行的查詢數")
+    parser.add_argument("--show", action="store_true", help="顯示瀏覽器視窗")
+    parser.add_argument("--output", default=None, help="輸出檔（.json 或 .csv）")
+    args = parser.parse_args()
+
+    departure = datetime.now() + timedelta(hours=1)
+    day = datetime.strptime(args.date, "%Y/%m/%d").date() if args.date else departure.date()
+    times = args.times.split(",") if args.times else [departure.strftime("%H:%M")]
+
+    start_time = time.perf_counter()
+    async with THSRCEngine(contexts=args.contexts, headless=not args.show) as engine:
+        if args.matrix:
+            rows, failed = await engine.query_matrix(day, times)
+        else:
+            queries = [
+                (args.start, args.end, datetime.combine(day, datetime.strptime(value, "%H:%M").time()))
+                for value in times
+            ]
+            rows, failed = await engine.query_many(queries)
+    elapsed = time.perf_counter() - start_time
+
+    if not args.matrix:
+        for row in rows:
+            print(f"{row['車次']:>5}  {row['出發時間']} → {row['抵達時間']}  {row['行車時間']}"
+                  f"  {row['早鳥優惠']} {row['大學生優惠']}")
+    print(f"\n共 {len(rows)} 班車，失敗 {len(failed)} 組，耗時 {elapsed:.1f} 秒")
+    for start, end, when, error in failed:
+        print(f"  ⚠️ {start} → {end} {when:%Y/%m/%d %H:%M}: {error}")
+    if args.output:
+        save_rows(rows, args.output)
+        print(f"輸出: {args.output}")
+    if replay.mode():
+        print(replay.archive().stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
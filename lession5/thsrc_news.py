@@ -0,0 +1,222 @@
+"""
+高鐵最新消息 - 增量擷取（持久化游標）
+
+lession5 的 get_news 每次都重新讀取所有 ul#alltype-news.news-list > li，
+每一則再各呼叫兩次 text_content()，每個 locator 呼叫都是一次與瀏覽器的往返。
+這裡改為：
+- 一次 page.evaluate 在頁面中讀出整個列表（日期、標題、連結），只有一次往返
+- 游標檔記錄上次看到的最新日期與標題雜湊，只輸出新的消息，遇到已知的消息就停止
+- 定期輪詢時瀏覽器保持開啟，每次只是一次不載入圖片 / 字型 / CSS 的頁面載入
+
+使用方式:
+    python thsrc_news.py                    # 輸出上次執行後的新消息
+    python thsrc_news.py --interval 600     # 每 10 分鐘檢查一次
+    python thsrc_news.py --reset            # 清除游標，重新輸出全部
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from playwright.async_api import Page, async_playwright
+
+from thsrc_engine import BLOCKED_RESOURCES, THSRC_URL, replay
+
+
+NEWS_SELECTOR = "ul#alltype-news.news-list > li"
+DEFAULT_CURSOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thsrc_news_cursor.json")
+
+# 游標保留最近幾則的雜湊（同一天有多則消息時用來判斷哪些已經看過）
+RECENT_LIMIT = 50
+
+# 一次讀出整個列表（與 get_news 相同的 selector）
+_READ_NEWS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map(item => {
+    const text = (css) => {
+        const node = item.querySelector(css);
+        return node ? node.textContent.trim() : '';
+    };
+    const link = item.querySelector('a[href]');
+    return {date: text('div.news-date'), title: text('div.news-title'), url: link ? link.href : ''};
+})
+"""
+
+_DATE_PATTERN = re.compile(r"(\d{4})\D(\d{1,2})\D(\d{1,2})")
+
+
+# ==================== 游標 ====================
+
+def normalize_date(text: str) -> str:
+    """'2025/12/19' → '2025-12-19'（無法辨識時為空字串）"""
+    match = _DATE_PATTERN.search(text or "")
+    if match is None:
+        return ""
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def news_hash(item: Dict[str, str]) -> str:
+    """以日期 + 標題計算雜湊（標題相同但日期不同視為不同消息）"""
+    key = f"{normalize_date(item['date'])}|{item['title'].strip()}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class NewsCursor:
+    """上次看到的最新日期與最近消息的雜湊，持久化於 JSON 檔"""
+
+    def __init__(self, path: str = DEFAULT_CURSOR_PATH):
+        self.path = path
+        self.date = ""
+        self.recent: List[str] = []
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.date = data.get("date", "")
+            self.recent = list(data.get("recent", []))
+        except (OSError, ValueError):
+            self.date, self.recent = "", []
+
+    def save(self):
+        """暫存檔 + os.replace 原子寫入"""
+        data = {"date": self.date, "recent": self.recent[:RECENT_LIMIT], "updated_at": datetime.now().isoformat()}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.date, self.recent = "", []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def select_new(self, items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        從最新到最舊掃描，取出新的消息
+
+        遇到比游標日期更舊的消息即停止（後面都是看過的）；
+        與游標同一天的消息以雜湊判斷是否看過。
+
+        Args:
+            items: 頁面上的消息（最新的在前）
+
+        Returns:
+            新的消息（保持頁面順序）
+        """
+        known = set(self.recent)
+        new_items = []
+        for item in items:
+            day = normalize_date(item["date"])
+            if self.date and day and day < self.date:
+                break
+            if news_hash(item) in known:
+                if day == self.date or not day:
+                    continue
+                break
+            new_items.append(item)
+        return new_items
+
+    def advance(self, new_items: List[Dict[str, str]]):
+        """記錄新看到的消息"""
+        if not new_items:
+            return
+        days = [normalize_date(item["date"]) for item in new_items]
+        self.date = max([self.date] + [day for day in days if day])
+        self.recent = [news_hash(item) for item in new_items] + self.recent
+        del self.recent[RECENT_LIMIT:]
+
+
+# ==================== 擷取 ====================
+
+async def read_news(page: Page) -> List[Dict[str, str]]:
+    """
+    載入首頁並以一次 evaluate 讀出所有消息
+
+    Returns:
+        [{"date", "title", "url"}, ...]
+    """
+    await page.goto(THSRC_URL, wait_until="domcontentloaded")
+    await page.wait_for_selector(NEWS_SELECTOR, state="attached")
+    return await page.evaluate(_READ_NEWS_JS, NEWS_SELECTOR)
+
+
+async def poll_news(cursor: NewsCursor, interval: Optional[float] = None, output: Optional[str] = None):
+    """
+    取得新消息（interval 不為 None 時持續輪詢）
+
+    Args:
+        cursor: 游標
+        interval: 輪詢間隔秒數（None 只執行一次）
+        output: 新消息附加寫入的 JSONL 檔
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(locale="zh-TW")
+        await replay.attach(context)
+
+        async def block(route):
+            # 只需要 HTML 中的列表：圖片、字型與 CSS 都不載入
+            if route.request.resource_type in BLOCKED_RESOURCES | {"stylesheet"}:
+                await route.abort()
+            else:
+                await route.fallback()
+
+        await context.route("**/*", block)
+        page = await context.new_page()
+
+        while True:
+            try:
+                items = await read_news(page)
+            except Exception as e:
+                print(f"讀取最新消息失敗: {e}")
+                items = None
+
+            if items is not None:
+                new_items = cursor.select_new(items)
+                checked = datetime.now().strftime("%H:%M:%S")
+                print(f"[{checked}] 頁面 {len(items)} 則，新消息 {len(new_items)} 則")
+                for item in new_items:
+                    print(item["date"])
+                    print(item["title"])
+                    print("=" * 60)
+                if new_items:
+                    if output:
+                        with open(output, "a", encoding="utf-8") as f:
+                            for item in new_items:
+                                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    cursor.advance(new_items)
+                    cursor.save()
+
+            if interval is None:
+                break
+            await asyncio.sleep(interval)
+
+        await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="高鐵最新消息增量擷取")
+    parser.add_argument("--interval", type=float, default=None, help="輪詢間隔秒數（不指定則只執行一次）")
+    parser.add_argument("--cursor", default=DEFAULT_CURSOR_PATH, help="游標檔")
+    parser.add_argument("--output", default=None, help="新消息附加寫入的 JSONL 檔")
+    parser.add_argument("--reset", action="store_true", help="清除游標")
+    args = parser.parse_args()
+
+    cursor = NewsCursor(args.cursor)
+    if args.reset:
+        cursor.reset()
+    try:
+        asyncio.run(poll_news(cursor, args.interval, args.output))
+    except KeyboardInterrupt:
+        print("停止輪詢")
+
+
+if __name__ == "__main__":
+    main()
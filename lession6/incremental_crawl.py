@@ -0,0 +1,438 @@
+"""
+增量爬取網站並輸出 markdown（每個網址一個檔案）
+
+lession6_2.1.py 每次執行都重新抓取 bnext 首頁，並以完整的 markdown 覆寫 output.md。
+這裡改為增量爬取整個網站：
+- URL frontier：從起始網址出發，依深度廣度優先展開站內連結（只爬起始網址的網站）
+- 網址正規化：scheme / host 小寫、去掉預設連接埠與 #fragment、查詢參數排序、
+  去掉 utm_* 等追蹤參數，同一頁面不會因為連結寫法不同而重複抓取
+- 每個網站的禮貌限制：遵守 robots.txt（含 Crawl-delay），同一網站的請求之間至少間隔 --delay 秒
+- 條件式 GET：記住每頁的 ETag / Last-Modified，伺服器回應 304 時不需要下載內容
+- 內容雜湊與 simhash：下載後的 markdown 與上次寫出的版本完全相同，
+  或 simhash 只差幾個位元（廣告、時間戳記之類的小變動）時不寫檔
+- 只有新的或內容有改變的頁面才寫出 markdown
+
+狀態（驗證碼、雜湊、站內連結）存在輸出資料夾的 crawl_state.json；
+頁面回應 304 時沿用上次記錄的連結繼續展開，不需要重新解析。
+重複爬取沒有改變的網站時，每頁只是一次沒有內容的 304 請求。
+
+頁面以 HTTP 直接下載（與 lession8/bot_rates.py 的快速路徑相同，不啟動瀏覽器），
+再以 crawl4ai 的 LXMLWebScrapingStrategy + DefaultMarkdownGenerator 轉成 markdown，
+與 AsyncWebCrawler 的 result.markdown 相同的轉換。
+CRAWL_REPLAY=record / replay 時經由 lession8/replay.py 錄製或離線重播。
+
+使用方式:
+    python incremental_crawl.py                                   # bnext 首頁，深度 1
+    python incremental_crawl.py https://www.bnext.com.tw/ --depth 2 --max-pages 300 --output bnext_md
+    python incremental_crawl.py --max-age 3600                    # 一小時內檢查過的頁面不再請求
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+import urllib.robotparser
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import numpy as np
+from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+from lxml import html as lxml_html
+
+# 共用 lession8 的錄製 / 重播
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lession8'))
+import replay
+
+
+START_URL = 'https://www.bnext.com.tw/'
+STATE_FILE = 'crawl_state.json'
+
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/131.0 Safari/537.36',
+    'Accept-Language': 'zh-TW,zh;q=0.9',
+}
+
+# 追蹤用的查詢參數（不影響頁面內容）
+TRACKING_PARAMS = {'fbclid', 'gclid', 'yclid', 'mc_cid', 'mc_eid', 'igshid'}
+
+# 不是網頁的連結
+_SKIPPED_EXTENSIONS = re.compile(
+    r'\.(jpe?g|png|gif|webp|svg|ico|css|js|json|xml|pdf|zip|gz|mp3|mp4|webm|woff2?|ttf)$', re.IGNORECASE
+)
+
+# simhash 特徵：英數字詞與單一中文字（中文以相鄰三字為一組）
+_TOKEN_PATTERN = re.compile(r'[A-Za-z0-9]+|[一-鿿]')
+
+
+# ==================== 網址正規化 ====================
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    網址正規化
+
+    Args:
+        url: 網址（可以是相對網址）
+        base: 相對網址的基準
+
+    Returns:
+        正規化後的網址；不是 http(s) 網頁或格式錯誤時為 None
+    """
+    try:
+        url = urljoin(base, url.strip()) if base else url.strip()
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        # 格式錯誤的 href（http://host:PORT/、http://[bad …），urlsplit / port 會拋出 ValueError
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    if _SKIPPED_EXTENSIONS.search(parts.path):
+        return None
+
+    host = parts.hostname.lower()
+    if port and port != {'http': 80, 'https': 443}[scheme]:
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def extract_links(page: str, base_url: str, hosts: Set[str]) -> List[str]:
+    """取出頁面中指定網站的連結（正規化、去除重複，保持頁面順序）"""
+    try:
+        document = lxml_html.fromstring(page)
+    except (ValueError, lxml_html.etree.ParserError):
+        return []
+    links = {}
+    for href in document.xpath('//a/@href'):
+        url = normalize_url(href, base_url)
+        if url is not None and urlsplit(url).netloc in hosts:
+            links[url] = None
+    return list(links)
+
+
+# ==================== 內容比對 ====================
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def simhash(text: str) -> int:
+    """
+    64 位元 simhash（內容只有小幅改變時，只有少數位元不同）
+
+    以相鄰三個字詞為一組特徵，每組取 64 位元雜湊，
+    逐位元累加 (+1 / -1) 後取正負號。
+    """
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    shingles = {' '.join(tokens[i:i + 3]) for i in range(max(len(tokens) - 2, 1))}
+    if not shingles or shingles == {''}:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles],
+        dtype=np.uint64,
+    )
+    bits = (hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+    return int(sum(1 << i for i in np.flatnonzero(votes > 0)))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+# ==================== 爬取狀態 ====================
+
+class CrawlState:
+    """每個網址的驗證碼、內容雜湊與站內連結（JSON 檔）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.pages: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self.pages = {}
+
+    def get(self, url: str) -> Dict[str, Any]:
+        return self.pages.get(url, {})
+
+    def update(self, url: str, **values):
+        self.pages.setdefault(url, {}).update(values)
+
+    def save(self):
+        """暫存檔 + os.replace 原子寫入"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.pages, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+# ==================== 禮貌限制 ====================
+
+class HostPolicy:
+    """每個網站的 robots.txt 與請求間隔"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._robots: Dict[str, Optional[urllib.robotparser.RobotFileParser]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_at: Dict[str, float] = {}
+
+    def _load_robots(self, origin: str) -> Optional[urllib.robotparser.RobotFileParser]:
+        parser = urllib.robotparser.RobotFileParser(origin + '/robots.txt')
+        try:
+            request = urllib.request.Request(origin + '/robots.txt', headers=_HEADERS)
+            with replay.urlopen(request, timeout=10) as response:
+                parser.parse(response.read().decode('utf-8', 'replace').splitlines())
+        except (urllib.error.URLError, OSError, ValueError):
+            return None  # 沒有 robots.txt 或讀取失敗：不限制
+        return parser
+
+    async def wait_turn(self, url: str) -> bool:
+        """
+        等到可以對這個網站送出請求
+
+        Returns:
+            robots.txt 是否允許抓取
+        """
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            if origin not in self._robots:
+                self._robots[origin] = await asyncio.to_thread(self._load_robots, origin)
+            robots = self._robots[origin]
+            if robots is not None and not robots.can_fetch(_HEADERS['User-Agent'], url):
+                return False
+
+            delay = self.delay
+            if robots is not None:
+                delay = max(delay, float(robots.crawl_delay(_HEADERS['User-Agent']) or 0))
+            wait = self._next_at.get(origin, 0.0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_at[origin] = time.monotonic() + delay
+            return True
+
+
+# ==================== 增量爬蟲 ====================
+
+def _decode(body: bytes, content_type: str) -> str:
+    match = re.search(r'charset=([\w-]+)', content_type or '', re.IGNORECASE)
+    return body.decode(match.group(1) if match else 'utf-8', 'replace')
+
+
+def to_markdown(page: str, url: str) -> str:
+    """與 AsyncWebCrawler 相同的 HTML → markdown 轉換"""
+    scraped = LXMLWebScrapingStrategy().scrap(url, page)
+    return DefaultMarkdownGenerator().generate_markdown(scraped.cleaned_html, base_url=url).raw_markdown
+
+
+def markdown_path(output_dir: str, url: str) -> str:
+    """網址對應的 markdown 檔：<輸出資料夾>/<網站>/<路徑>_<網址雜湊>.md"""
+    parts = urlsplit(url)
+    slug = re.sub(r'[^\w\-]+', '_', parts.path.strip('/'))[:80] or 'index'
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(output_dir, parts.netloc.replace(':', '_'), f"{slug}_{digest}.md")
+
+
+class IncrementalCrawler:
+    """增量爬取並輸出 markdown"""
+
+    def __init__(
+        self,
+        start_urls: List[str],
+        output_dir: str,
+        max_depth: int = 1,
+        max_pages: int = 200,
+        workers: int = 4,
+        delay: float = 1.0,
+        max_age: float = 0.0,
+        near_duplicate_bits: int = 3,
+        timeout: float = 20.0
+    ):
+        """
+        初始化
+
+        Args:
+            start_urls: 起始網址（只爬這些網址的網站）
+            output_dir: markdown 與狀態檔的資料夾
+            max_depth: 從起始網址展開的連結深度
+            max_pages: 最多處理的網址數
+            workers: 同時進行的請求數（不同網站之間；同一網站仍受 delay 限制）
+            delay: 同一網站的請求間隔秒數
+            max_age: 這麼多秒內檢查過的頁面不再請求（0 表示每次都以條件式 GET 檢查）
+            near_duplicate_bits: simhash 差異在這個位元數以內視為沒有改變
+            timeout: 單一請求逾時秒數
+        """
+        self.start_urls = [url for url in map(normalize_url, start_urls) if url]
+        self.hosts = {urlsplit(url).netloc for url in self.start_urls}
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.workers = workers
+        self.max_age = max_age
+        self.near_duplicate_bits = near_duplicate_bits
+        self.timeout = timeout
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.state = CrawlState(os.path.join(output_dir, STATE_FILE))
+        self.policy = HostPolicy(delay)
+        self.stats = dict.fromkeys(
+            ('new', 'changed', 'unchanged', 'near_duplicate', 'not_modified', 'fresh', 'disallowed', 'failed', 'bytes'), 0
+        )
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._seen: Set[str] = set()
+
+    def _enqueue(self, url: str, depth: int):
+        if url in self._seen or depth > self.max_depth or len(self._seen) >= self.max_pages:
+            return
+        self._seen.add(url)
+        self._queue.put_nowait((url, depth))
+
+    # ---------- 單一頁面 ----------
+
+    def _fetch(self, url: str, entry: Dict[str, Any]) -> Tuple[int, bytes, Dict[str, str]]:
+        """條件式 GET（304 時內容為空）"""
+        headers = dict(_HEADERS)
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with replay.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read(), dict(response.headers.items())
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, b'', dict(e.headers.items())
+            raise
+
+    def _process(self, url: str, body: bytes, content_type: str) -> Tuple[str, List[str]]:
+        page = _decode(body, content_type)
+        return to_markdown(page, url), extract_links(page, url, self.hosts)
+
+    def _write(self, url: str, markdown: str, fetched_at: str) -> str:
+        path = markdown_path(self.output_dir, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"<!-- source: {url} | fetched: {fetched_at} -->\n\n")
+            f.write(markdown)
+        os.replace(tmp_path, path)
+        return path
+
+    async def _crawl_page(self, url: str, depth: int):
+        entry = self.state.get(url)
+
+        if self.max_age and time.time() - entry.get('checked', 0) < self.max_age:
+            self.stats['fresh'] += 1
+            links = entry.get('links', [])
+        else:
+            if not await self.policy.wait_turn(url):
+                self.stats['disallowed'] += 1
+                return
+            status, body, headers = await asyncio.to_thread(self._fetch, url, entry)
+            headers = {k.lower(): v for k, v in headers.items()}
+            validators = {
+                'etag': headers.get('etag', entry.get('etag')),
+                'last_modified': headers.get('last-modified', entry.get('last_modified')),
+                'checked': time.time(),
+            }
+
+            if status == 304:
+                self.stats['not_modified'] += 1
+                self.state.update(url, **validators)
+                links = entry.get('links', [])
+            else:
+                self.stats['bytes'] += len(body)
+                markdown, links = await asyncio.to_thread(self._process, url, body, headers.get('content-type', ''))
+                digest, fingerprint = content_hash(markdown), simhash(markdown)
+                self.state.update(url, links=links, **validators)
+
+                if entry.get('hash') == digest:
+                    self.stats['unchanged'] += 1
+                elif 'simhash' in entry and hamming(entry['simhash'], fingerprint) <= self.near_duplicate_bits:
+                    # 與上次寫出的版本幾乎相同：不寫檔，也不更新比對基準（避免小變動累積）
+                    self.stats['near_duplicate'] += 1
+                else:
+                    fetched_at = datetime.now().isoformat(timespec='seconds')
+                    path = self._write(url, markdown, fetched_at)
+                    self.stats['changed' if entry.get('hash') else 'new'] += 1
+                    self.state.update(url, hash=digest, simhash=fingerprint, file=path, written=fetched_at)
+                    print(f"{'更新' if entry.get('hash') else '新增'}: {url}")
+
+        for link in links:
+            self._enqueue(link, depth + 1)
+
+    async def _worker(self):
+        while True:
+            url, depth = await self._queue.get()
+            try:
+                await self._crawl_page(url, depth)
+            except Exception as e:
+                self.stats['failed'] += 1
+                print(f"失敗: {url}（{e}）")
+            finally:
+                self._queue.task_done()
+
+    async def run(self) -> Dict[str, int]:
+        """
+        執行一次增量爬取
+
+        Returns:
+            各種結果的頁數與下載的位元組數
+        """
+        for url in self.start_urls:
+            self._enqueue(url, 0)
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.state.save()
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量爬取網站並輸出 markdown')
+    parser.add_argument('urls', nargs='*', default=[START_URL], help='起始網址')
+    parser.add_argument('--output', default='bnext_markdown', help='輸出資料夾')
+    parser.add_argument('--depth', type=int, default=1, help='連結深度')
+    parser.add_argument('--max-pages', type=int, default=200, help='最多處理的網址數')
+    parser.add_argument('--workers', type=int, default=4, help='同時進行的請求數')
+    parser.add_argument('--delay', type=float, default=1.0, help='同一網站的請求間隔秒數')
+    parser.add_argument('--max-age', type=float, default=0.0, help='多少秒內檢查過的頁面不再請求')
+    args = parser.parse_args()
+
+    crawler = IncrementalCrawler(
+        args.urls, args.output, max_depth=args.depth, max_pages=args.max_pages,
+        workers=args.workers, delay=args.delay, max_age=args.max_age
+    )
+    start = time.perf_counter()
+    stats = asyncio.run(crawler.run())
+    print(f"\n新增 {stats['new']}，更新 {stats['changed']}，內容相同 {stats['unchanged']}，"
+          f"幾乎相同 {stats['near_duplicate']}，304 {stats['not_modified']}，未到期 {stats['fresh']}，"
+          f"robots 禁止 {stats['disallowed']}，失敗 {stats['failed']}")
+    print(f"下載 {stats['bytes'] / 1024:.1f} KiB，耗時 {time.perf_counter() - start:.2f} 秒（{args.output}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""
+HTML → markdown 平行轉換管線（下載與轉換分開）
+
+lession6 的 crawler.arun 在同一個事件迴圈中先下載頁面、再把 HTML 轉成 markdown，
+轉換是吃 CPU 的工作，會卡住其他頁面的網路 I/O，也只用得到一個核心。
+這裡拆成三個可以各自調整大小的階段：
+
+    下載（--fetchers 個協程） → 有上限的佇列 → 轉換（--converters 個行程） → 有上限的佇列 → 寫檔（批次）
+
+- 下載：以 HTTP 取得原始 HTML（或從資料夾讀取 .html 檔），放進佇列
+- 轉換：ProcessPoolExecutor 中以 crawl4ai 的 LXMLWebScrapingStrategy + DefaultMarkdownGenerator 轉換
+- 寫檔：累積 --batch 筆（或 1 秒）後一次交給執行緒寫出，並附加到 index.jsonl
+佇列滿了時前一個階段會停下來等待（背壓），不會把整個網站的 HTML 都堆在記憶體中。
+
+結束時報告每個階段的吞吐量，以及每個佇列的背壓指標：
+- 放入等待：前一階段因為佇列滿了而等待的時間（下一階段太慢）
+- 取出等待：下一階段因為佇列空了而等待的時間（前一階段太慢）
+- 平均 / 最大深度
+
+使用方式:
+    python markdown_pipeline.py urls.txt --output md_out --fetchers 16 --converters 8
+    python markdown_pipeline.py --from-dir saved_html --output md_out --converters 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from incremental_crawl import _HEADERS, _decode, markdown_path, replay, to_markdown
+
+
+# ==================== 有背壓指標的佇列 ====================
+
+@dataclass
+class QueueStats:
+    """佇列的背壓指標"""
+    put_wait: float = 0.0
+    get_wait: float = 0.0
+    max_depth: int = 0
+    depth_samples: List[int] = field(default_factory=list)
+
+    @property
+    def mean_depth(self) -> float:
+        return sum(self.depth_samples) / len(self.depth_samples) if self.depth_samples else 0.0
+
+
+class MeteredQueue:
+    """記錄放入 / 取出等待時間與深度的 asyncio.Queue"""
+
+    def __init__(self, maxsize: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.maxsize = maxsize
+        self.stats = QueueStats()
+
+    async def put(self, item: Any):
+        start = time.perf_counter()
+        await self._queue.put(item)
+        self.stats.put_wait += time.perf_counter() - start
+        self._sample()
+
+    async def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        取出一個項目
+
+        Args:
+            timeout: 最多等待秒數（None 為一直等待）
+
+        Raises:
+            asyncio.TimeoutError: 逾時（等待的時間照樣計入 get_wait）
+        """
+        start = time.perf_counter()
+        try:
+            if timeout is None:
+                item = await self._queue.get()
+            else:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+        finally:
+            # 在 wait_for 外面計時：逾時被取消的 get 也要算進等待時間
+            self.stats.get_wait += time.perf_counter() - start
+        self._sample()
+        return item
+
+    def get_nowait(self) -> Any:
+        item = self._queue.get_nowait()
+        self._sample()
+        return item
+
+    def _sample(self):
+        depth = self._queue.qsize()
+        self.stats.max_depth = max(self.stats.max_depth, depth)
+        self.stats.depth_samples.append(depth)
+
+
+# 佇列結束標記
+_DONE = None
+
+
+# ==================== 各階段 ====================
+
+def convert(url: str, body: bytes, content_type: str) -> Tuple[str, str, float]:
+    """
+    在轉換行程中執行：解碼並轉成 markdown
+
+    Returns:
+        (url, markdown, 轉換秒數)
+    """
+    start = time.perf_counter()
+    markdown = to_markdown(_decode(body, content_type), url)
+    return url, markdown, time.perf_counter() - start
+
+
+def _fetch(url: str, timeout: float) -> Tuple[bytes, str]:
+    request = urllib.request.Request(url, headers=_HEADERS)
+    with replay.urlopen(request, timeout=timeout) as response:
+        return response.read(), response.headers.get('Content-Type', '')
+
+
+def _read_file(path: str) -> Tuple[bytes, str]:
+    with open(path, 'rb') as f:
+        return f.read(), ''
+
+
+def _write_batch(output_dir: str, batch: List[Tuple[str, str]]) -> int:
+    """在執行緒中寫出一批 markdown，並附加到 index.jsonl"""
+    written = 0
+    with open(os.path.join(output_dir, 'index.jsonl'), 'a', encoding='utf-8') as index:
+        for url, markdown in batch:
+            path = markdown_path(output_dir, url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(markdown)
+            index.write(json.dumps({'url': url, 'file': os.path.relpath(path, output_dir)}, ensure_ascii=False) + '\n')
+            written += len(markdown.encode('utf-8'))
+    return written
+
+
+class MarkdownPipeline:
+    """下載 → 轉換 → 寫檔 三階段管線"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        fetchers: int = 8,
+        converters: Optional[int] = None,
+        queue_size: int = 64,
+        batch: int = 32,
+        flush_interval: float = 1.0,
+        timeout: float = 20.0
+    ):
+        """
+        初始化
+
+        Args:
+            output_dir: markdown 輸出資料夾
+            fetchers: 同時下載的數量
+            converters: 轉換行程數（預設為 CPU 核心數）
+            queue_size: 每個佇列的上限（HTML 與 markdown 各一個）
+            batch: 每次寫檔的筆數
+            flush_interval: 不滿一批時最多等待的秒數
+            timeout: 單一下載逾時秒數
+        """
+        self.output_dir = output_dir
+        self.fetchers = fetchers
+        self.converters = converters or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+
+        self.fetched = MeteredQueue(queue_size)     # (url, body, content_type)
+        self.converted = MeteredQueue(queue_size)   # (url, markdown)
+        self.counts = dict.fromkeys(('fetched', 'fetch_failed', 'converted', 'convert_failed', 'written'), 0)
+        self.busy = dict.fromkeys(('fetch', 'convert', 'write'), 0.0)
+        self.bytes = dict.fromkeys(('html', 'markdown'), 0)
+        self.elapsed = 0.0
+
+    async def _fetch_stage(self, sources: asyncio.Queue, from_dir: bool):
+        while True:
+            try:
+                source = sources.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                if from_dir:
+                    body, content_type = await asyncio.to_thread(_read_file, source)
+                    url = 'file://' + os.path.abspath(source)
+                else:
+                    body, content_type = await asyncio.to_thread(_fetch, source, self.timeout)
+                    url = source
+            except Exception as e:
+                self.counts['fetch_failed'] += 1
+                print(f"下載失敗: {source}（{e}）")
+                continue
+            finally:
+                self.busy['fetch'] += time.perf_counter() - start
+            self.counts['fetched'] += 1
+            self.bytes['html'] += len(body)
+            await self.fetched.put((url, body, content_type))
+
+    async def _convert_stage(self, pool: ProcessPoolExecutor):
+        """每個協程同時只交給行程池一筆，協程數 = 行程數，行程池不會堆積工作"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.fetched.get()
+            if item is _DONE:
+                return
+            try:
+                url, markdown, seconds = await loop.run_in_executor(pool, convert, *item)
+            except Exception as e:
+                self.counts['convert_failed'] += 1
+                print(f"轉換失敗: {item[0]}（{e}）")
+                continue
+            self.busy['convert'] += seconds
+            self.counts['converted'] += 1
+            await self.converted.put((url, markdown))
+
+    async def _write_stage(self):
+        pending: List[Tuple[str, str]] = []
+        finished = False
+        while not finished:
+            try:
+                item = await self.converted.get(timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                item = False  # 逾時：寫出目前累積的
+            if item is _DONE:
+                finished = True
+            elif item:
+                pending.append(item)
+                # 佇列中已經有的一次取出，湊成一批
+                while len(pending) < self.batch:
+                    try:
+                        item = self.converted.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is _DONE:
+                        finished = True
+                        break
+                    pending.append(item)
+            if pending and (finished or item is False or len(pending) >= self.batch):
+                start = time.perf_counter()
+                self.bytes['markdown'] += await asyncio.to_thread(_write_batch, self.output_dir, pending)
+                self.busy['write'] += time.perf_counter() - start
+                self.counts['written'] += len(pending)
+                pending = []
+
+    async def run(self, sources: List[str], from_dir: bool = False) -> Dict[str, int]:
+        """
+        執行管線
+
+        Args:
+            sources: 網址列表（from_dir 時為 .html 檔路徑）
+            from_dir: 從檔案讀取而不是下載
+
+        Returns:
+            各階段處理的筆數
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        queue: asyncio.Queue = asyncio.Queue()
+        for source in sources:
+            queue.put_nowait(source)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(self.converters) as pool:
+            writer = asyncio.create_task(self._write_stage())
+            converters = [asyncio.create_task(self._convert_stage(pool)) for _ in range(self.converters)]
+            await asyncio.gather(*(self._fetch_stage(queue, from_dir) for _ in range(self.fetchers)))
+            for _ in converters:
+                await self.fetched.put(_DONE)
+            await asyncio.gather(*converters)
+            await self.converted.put(_DONE)
+            await writer
+        self.elapsed = time.perf_counter() - start
+        return self.counts
+
+    def report(self):
+        """輸出各階段吞吐量與背壓指標"""
+        elapsed = self.elapsed or 1e-9
+        print(f"\n總耗時 {self.elapsed:.2f} 秒："
+              f"下載 {self.counts['fetched']}（失敗 {self.counts['fetch_failed']}），"
+              f"轉換 {self.counts['converted']}（失敗 {self.counts['convert_failed']}），"
+              f"寫出 {self.counts['written']}")
+        print(f"\n  {'階段':<10}{'並行':>6}{'每秒筆數':>10}{'忙碌比例':>10}")
+        for stage, workers, count in (
+            ('下載', self.fetchers, self.counts['fetched']),
+            ('轉換', self.converters, self.counts['converted']),
+            ('寫檔', 1, self.counts['written']),
+        ):
+            key = {'下載': 'fetch', '轉換': 'convert', '寫檔': 'write'}[stage]
+            print(f"  {stage:<10}{workers:>6}{count / elapsed:>10.1f}{self.busy[key] / (elapsed * workers):>10.0%}")
+
+        print(f"\n  {'佇列':<14}{'放入等待':>10}{'取出等待':>10}{'平均深度':>10}{'最大深度':>10}")
+        for name, queue in (('HTML → 轉換', self.fetched), ('markdown → 寫檔', self.converted)):
+            stats = queue.stats
+            print(f"  {name:<14}{stats.put_wait:>9.2f}s{stats.get_wait:>9.2f}s"
+                  f"{stats.mean_depth:>10.1f}{stats.max_depth:>7}/{queue.maxsize}")
+        print(f"\nHTML {self.bytes['html'] / 1048576:.1f} MiB → markdown {self.bytes['markdown'] / 1048576:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML → markdown 平行轉換管線')
+    parser.add_argument('urls', nargs='?', default=None, help='網址清單檔（每行一個網址）')
+    parser.add_argument('--from-dir', default=None, help='改為轉換資料夾中的 .html 檔')
+    parser.add_argument('--output', default='markdown_out', help='輸出資料夾')
+    parser.add_argument('--fetchers', type=int, default=8, help='同時下載的數量')
+    parser.add_argument('--converters', type=int, default=None, help='轉換行程數（預設為 CPU 核心數）')
+    parser.add_argument('--queue-size', type=int, default=64, help='佇列上限')
+    parser.add_argument('--batch', type=int, default=32, help='每次寫檔的筆數')
+    args = parser.parse_args()
+
+    if args.from_dir:
+        sources = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(args.from_dir) for name in names if name.endswith(('.html', '.htm'))
+        )
+    elif args.urls:
+        with open(args.urls, 'r', encoding='utf-8') as f:
+            sources = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    else:
+        parser.error('請指定網址清單檔或 --from-dir')
+    if not sources:
+        print('沒有任何要轉換的頁面')
+        return
+
+    pipeline = MarkdownPipeline(
+        args.output, fetchers=args.fetchers, converters=args.converters,
+        queue_size=args.queue_size, batch=args.batch
+    )
+    print(f"{len(sources)} 個頁面：下載 {pipeline.fetchers}、轉換 {pipeline.converters} 個行程、"
+          f"佇列上限 {pipeline.queue_size}、每批 {pipeline.batch} 筆")
+    asyncio.run(pipeline.run(sources, from_dir=bool(args.from_dir)))
+    pipeline.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""
+批次擷取：整個資料夾的已存 HTML → 一個 JSONL 檔
+
+schema 修改後需要重新處理歸檔的網頁時，不必再以瀏覽器逐一載入 raw:// 文件：
+- 以 schema_compiler 編譯 schema（每個子行程只編譯一次），lxml 直接解析檔案
+- ProcessPoolExecutor 將檔案分散到所有 CPU 核心
+- 每筆資料寫成 JSONL 的一行：{"file": 相對路徑, "record": 擷取結果}
+- --typed 時依 schema 欄位的 value_type 將字串轉為數值（lession8/field_types，每個檔案整欄轉換一次）
+- 顯示進度與每個檔案的處理時間，結束時列出最慢的檔案
+- 檢查點（輸出檔 + ".checkpoint"）記錄已完成的檔案與當時輸出檔的長度，
+  中斷後以 --resume 繼續：已完成的檔案略過，未記錄到檢查點的半筆輸出會被截掉
+
+schema 可以是 JSON 檔、「模組:變數」或模組名稱（使用其中的 PRODUCT_SCHEMA）:
+    lession7_1:ITEM_SCHEMA      div.item 的標題與連結
+    lession7_2:CRYPTO_SCHEMA    加密貨幣列表（list 欄位）
+    lession7_3                  .product-card 商品卡片（PRODUCT_SCHEMA）
+    lession7_4                  .product 產品目錄（PRODUCT_SCHEMA，預設）
+    lession7_5:RATE_SCHEMA      臺灣銀行牌告匯率表格
+
+    python batch_extract.py archive/ products.jsonl --schema lession7_4
+    python batch_extract.py archive/ rates.jsonl --schema lession7_5:RATE_SCHEMA
+    python batch_extract.py archive/ products.jsonl --schema my_schema.json --workers 4
+    python batch_extract.py archive/ products.jsonl --schema lession7_4 --resume
+    python batch_extract.py archive/ products.jsonl --schema lession7_4 --typed
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from schema_compiler import compile_schema
+
+# 共用 lession8 的欄位型別轉換
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lession8'))
+from field_types import field_types, normalize
+
+
+HTML_SUFFIXES = ('.html', '.htm')
+
+
+# ==================== schema 與檔案 ====================
+
+def load_schema(name: str) -> Dict[str, Any]:
+    """
+    載入 schema
+
+    Args:
+        name: JSON 檔路徑、'模組:變數'（例如 'lession7_5:RATE_SCHEMA'），
+              或模組名稱（例如 'lession7_4'，使用其中的 PRODUCT_SCHEMA）
+
+    Returns:
+        schema dict
+
+    Raises:
+        ValueError: 模組中沒有該變數（訊息列出模組中可用的 *_SCHEMA）
+    """
+    module_name, _, attribute = name.partition(':')
+    if name.endswith('.json') or (os.path.isfile(name) and not module_name.endswith('.py')):
+        with open(name, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    if module_name.endswith('.py'):
+        module_name = module_name[:-3]
+    attribute = attribute or 'PRODUCT_SCHEMA'
+    module = importlib.import_module(module_name)
+    schema = getattr(module, attribute, None)
+    if not isinstance(schema, dict):
+        available = [key for key, value in vars(module).items() if key.endswith('_SCHEMA') and isinstance(value, dict)]
+        hint = f"（可用: {', '.join(f'{module_name}:{key}' for key in available)}）" if available else ''
+        raise ValueError(f"{module_name} 沒有定義 {attribute}{hint}")
+    return schema
+
+
+def schema_digest(schema: Dict[str, Any]) -> str:
+    """schema 的雜湊值（檢查點用來確認續跑時 schema 沒有改變）"""
+    text = json.dumps(schema, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def find_html_files(directory: str) -> List[str]:
+    """
+    遞迴列出資料夾中的 HTML 檔
+
+    Returns:
+        相對於 directory 的路徑（排序後，每次執行順序相同）
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.lower().endswith(HTML_SUFFIXES):
+                files.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(files)
+
+
+# ==================== 子行程 ====================
+
+_compiled = None
+_typed = False
+
+
+def _init_worker(schema: Dict[str, Any], typed: bool = False):
+    """子行程啟動時編譯 schema"""
+    global _compiled, _typed
+    _compiled = compile_schema(schema)
+    _typed = typed
+
+
+def extract_file(directory: str, relative: str) -> Tuple[str, Optional[List[str]], float, Optional[str]]:
+    """
+    擷取一個檔案（在子行程中執行）
+
+    JSON 序列化也在子行程完成，主行程只需要寫檔。
+
+    Returns:
+        (相對路徑, JSONL 行列表, 秒數, 錯誤訊息)；失敗時行列表為 None
+    """
+    start = time.perf_counter()
+    try:
+        with open(os.path.join(directory, relative), 'rb') as f:
+            items = _compiled.extract(f.read())
+        if _typed:
+            normalize(items, _compiled.schema)
+        lines = [
+            json.dumps({'file': relative, 'record': item}, ensure_ascii=False, default=str)
+            for item in items
+        ]
+    except Exception as e:
+        return relative, None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return relative, lines, time.perf_counter() - start, None
+
+
+# ==================== 檢查點 ====================
+
+class Checkpoint:
+    """
+    記錄已完成檔案的檢查點（JSONL，每完成一個檔案附加一行）
+
+    第一行為 {"schema": 雜湊值}，之後每行為
+    {"file", "records", "seconds", "offset"}，offset 是寫完該檔案後輸出檔的長度。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        self.offset = 0
+        self.schema: Optional[str] = None
+        self._file = None
+
+    def load(self):
+        """讀取既有的檢查點（最後一行不完整時忽略）"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if 'schema' in entry:
+                    self.schema = entry['schema']
+                else:
+                    self.done[entry['file']] = entry
+                    self.offset = entry['offset']
+
+    def open(self, schema: str, fresh: bool):
+        """開啟檢查點準備附加（fresh 時清空重來）"""
+        if fresh:
+            self.done.clear()
+            self.offset = 0
+        self._file = open(self.path, 'w' if fresh else 'a', encoding='utf-8')
+        if fresh:
+            self.schema = schema
+            self._append({'schema': schema})
+
+    def record(self, relative: str, records: int, seconds: float, offset: int):
+        """記錄一個完成的檔案"""
+        entry = {'file': relative, 'records': records, 'seconds': round(seconds, 4), 'offset': offset}
+        self.done[relative] = entry
+        self.offset = offset
+        self._append(entry)
+
+    def _append(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# ==================== 批次執行 ====================
+
+def run_batch(
+    directory: str,
+    output: str,
+    schema: Dict[str, Any],
+    workers: Optional[int] = None,
+    resume: bool = False,
+    quiet: bool = False,
+    typed: bool = False
+) -> Dict[str, Any]:
+    """
+    批次擷取資料夾中的所有 HTML 檔
+
+    Args:
+        directory: HTML 資料夾
+        output: 輸出的 JSONL 檔
+        schema: JsonCssExtractionStrategy 格式的 schema
+        workers: 子行程數（None 為 CPU 核心數）
+        resume: 依檢查點略過已完成的檔案
+        quiet: 不顯示每個檔案的進度
+        typed: 依 value_type 轉換欄位型別
+
+    Returns:
+        {'files', 'skipped', 'failed', 'records', 'seconds', 'timings'}
+        timings 為 [(相對路徑, 秒數), ...]（本次處理的檔案）
+    """
+    compile_schema(schema)  # schema 有誤時在啟動子行程前就報錯
+    if typed:
+        field_types(schema)  # value_type 有誤時同樣先報錯
+    digest = schema_digest(dict(schema, typed=True) if typed else schema)
+    checkpoint = Checkpoint(output + '.checkpoint')
+    fresh = True
+    if resume:
+        checkpoint.load()
+        if checkpoint.schema is not None and checkpoint.schema != digest:
+            raise ValueError("schema（或 --typed 設定）與檢查點記錄的不同，無法續跑（請改用新的輸出檔或不加 --resume）")
+        fresh = checkpoint.schema is None or not os.path.exists(output)
+
+    checkpoint.open(digest, fresh)
+    files = find_html_files(directory)
+    pending = [name for name in files if name not in checkpoint.done]
+    skipped = len(files) - len(pending)
+
+    out = open(output, 'wb' if fresh else 'r+b')
+    if not fresh:
+        # 截掉最後一個檔案寫到一半、還沒記錄到檢查點的輸出
+        out.truncate(checkpoint.offset)
+        out.seek(checkpoint.offset)
+
+    if skipped and not quiet:
+        print(f"依檢查點略過 {skipped} 個已完成的檔案")
+
+    records = 0
+    failed: List[Tuple[str, str]] = []
+    timings: List[Tuple[str, float]] = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema, typed)) as pool:
+            # 每個子行程一次拿一小批檔案，減少行程間往返
+            chunksize = max(1, min(32, len(pending) // ((workers or os.cpu_count() or 1) * 4)))
+            results = pool.map(extract_file, [directory] * len(pending), pending, chunksize=chunksize)
+            for done, (relative, lines, seconds, error) in enumerate(results, 1):
+                if error is not None:
+                    failed.append((relative, error))
+                    if not quiet:
+                        print(f"[{done}/{len(pending)}] {relative}  失敗: {error}")
+                    continue
+                if lines:
+                    out.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                out.flush()
+                checkpoint.record(relative, len(lines), seconds, out.tell())
+                records += len(lines)
+                timings.append((relative, seconds))
+                if not quiet:
+                    elapsed = time.perf_counter() - start
+                    print(f"[{done}/{len(pending)}] {relative}  {len(lines)} 筆  {seconds * 1000:.1f} ms"
+                          f"  （累計 {records:,} 筆，{done / elapsed:.1f} 檔/秒）")
+    finally:
+        out.close()
+        checkpoint.close()
+
+    return {
+        'files': len(pending),
+        'skipped': skipped,
+        'failed': failed,
+        'records': records,
+        'seconds': time.perf_counter() - start,
+        'timings': timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以多個行程批次擷取資料夾中的 HTML 檔，輸出 JSONL")
+    parser.add_argument('directory', help="HTML 資料夾（遞迴搜尋 .html / .htm）")
+    parser.add_argument('output', help="輸出的 JSONL 檔")
+    parser.add_argument('--schema', default='lession7_4', help="schema JSON 檔、模組:變數（例如 lession7_5:RATE_SCHEMA）或模組名稱")
+    parser.add_argument('--workers', type=int, default=None, help="子行程數（預設為 CPU 核心數）")
+    parser.add_argument('--resume', action='store_true', help="依檢查點繼續上次中斷的批次")
+    parser.add_argument('--quiet', action='store_true', help="不顯示每個檔案的進度")
+    parser.add_argument('--typed', action='store_true', help="依 schema 的 value_type 將字串轉為數值")
+    args = parser.parse_args()
+
+    try:
+        schema = load_schema(args.schema)
+        summary = run_batch(args.directory, args.output, schema, args.workers, args.resume, args.quiet, args.typed)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    seconds = summary['seconds']
+    print(f"\n完成 {summary['files']} 個檔案（略過 {summary['skipped']}，失敗 {len(summary['failed'])}），"
+          f"共 {summary['records']:,} 筆，{seconds:.2f} 秒"
+          f"（{summary['files'] / seconds if seconds else 0:.1f} 檔/秒）")
+    slowest = sorted(summary['timings'], key=lambda timing: timing[1], reverse=True)[:5]
+    if slowest:
+        print("最慢的檔案:")
+        for relative, file_seconds in slowest:
+            print(f"  {file_seconds * 1000:8.1f} ms  {relative}")
+    for relative, error in summary['failed']:
+        print(f"  ⚠️ {relative}: {error}")
+    print(f"輸出: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
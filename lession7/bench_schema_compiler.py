@@ -0,0 +1,177 @@
+"""
+schema 編譯器效能比較（lession7_4 的產品頁面放大到 N 個商品，不需網路與瀏覽器）
+
+比較項目：
+    編譯後單次走訪   - schema_compiler.compile_schema(PRODUCT_SCHEMA).extract
+    串流擷取         - compile_schema(PRODUCT_SCHEMA).iter_extract（從檔案邊解析邊輸出）
+    crawl4ai 提取    - JsonCssExtractionStrategy(PRODUCT_SCHEMA).extract
+
+每種方法在獨立的子行程中執行，記憶體以行程的最大 RSS 計算並列出擷取前的數值
+（lxml 的樹配置在 C 層，tracemalloc 看不到；沒有 resource 模組的平台才改用 tracemalloc）。
+
+執行方式:
+    python bench_schema_compiler.py
+    python bench_schema_compiler.py --products 20000
+    python bench_schema_compiler.py --products 1000000 --skip-crawl4ai
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from lession7_4 import PRODUCT_HTML, PRODUCT_SCHEMA
+
+try:
+    import resource  # 只有 Linux / macOS 有
+except ImportError:
+    resource = None
+
+
+def build_catalog(count: int) -> str:
+    """
+    將 lession7_4 的產品目錄放大為 count 個商品（兩種商品輪流出現，名稱加上編號）
+
+    Returns:
+        HTML 原始碼
+    """
+    head, rest = PRODUCT_HTML.split('<!-- 產品 1 -->', 1)
+    products, tail = rest.rsplit('    </div>\n</body>', 1)
+    first, second = products.split('<!-- 產品 2 -->', 1)
+    templates = [
+        first.replace('無線藍牙耳機 Pro', '無線藍牙耳機 Pro #{}'),
+        second.replace('智能運動手環', '智能運動手環 #{}'),
+    ]
+    parts = [head]
+    parts.extend(templates[i % 2].format(i) for i in range(count))
+    parts.append('    </div>\n</body>' + tail)
+    return ''.join(parts)
+
+
+def _max_rss_kib() -> int:
+    """目前行程的最大 RSS（KiB；macOS 的單位是 bytes）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _growth(result: dict) -> int:
+    """擷取期間增加的記憶體（KiB）"""
+    return result['memory_kib'] - result['baseline_kib']
+
+
+def run_method(method: str, path: str) -> dict:
+    """
+    在子行程中執行一種擷取方法
+
+    Args:
+        method: 'compiled'、'stream' 或 'crawl4ai'
+        path: 產品目錄 HTML 檔
+
+    Returns:
+        {'seconds', 'memory_kib', 'baseline_kib', 'items', 'digest'}
+    """
+    if method == 'stream':
+        # 串流模式直接讀檔，文件本身不放進記憶體
+        catalog = path
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            catalog = f.read()
+
+    if method in ('compiled', 'stream'):
+        from schema_compiler import compile_schema
+        compiled = compile_schema(PRODUCT_SCHEMA)
+        extract = compiled.iter_extract if method == 'stream' else compiled.extract
+    else:
+        from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+        strategy = JsonCssExtractionStrategy(PRODUCT_SCHEMA)
+        extract = lambda html: strategy.extract('', html)
+
+    baseline = 0
+    if resource is None:
+        tracemalloc.start()
+    else:
+        baseline = _max_rss_kib()
+
+    # 逐筆計算摘要，各方法的結果可以互相比對
+    digest = hashlib.sha256()
+    items = 0
+    start = time.perf_counter()
+    for item in extract(catalog):
+        digest.update(json.dumps(item, ensure_ascii=False).encode('utf-8'))
+        items += 1
+    seconds = time.perf_counter() - start
+
+    if resource is None:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory_kib = peak // 1024
+    else:
+        memory_kib = _max_rss_kib()
+
+    return {
+        'seconds': seconds,
+        'memory_kib': memory_kib,
+        'baseline_kib': baseline,
+        'items': items,
+        'digest': digest.hexdigest(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="schema 編譯器與 crawl4ai 的擷取效能比較")
+    parser.add_argument('--products', type=int, default=100_000, help="商品數量")
+    parser.add_argument('--skip-crawl4ai', action='store_true', help="只測量編譯後的擷取（crawl4ai 需要數分鐘與數 GB 記憶體）")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.html')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(build_catalog(args.products))
+    size = os.path.getsize(path)
+    print(f"產品目錄: {args.products:,} 個商品（{size / 1024 / 1024:.1f} MiB）\n")
+
+    methods = [('compiled', "編譯後單次走訪"), ('stream', "串流擷取")]
+    if not args.skip_crawl4ai:
+        methods.append(('crawl4ai', "crawl4ai 提取"))
+
+    # 每種方法使用全新的行程，記憶體峰值才不會互相影響
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for method, label in methods:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                result = pool.submit(run_method, method, path).result()
+            except Exception as e:
+                # 記憶體不足時子行程會被系統終止（BrokenProcessPool）
+                print(f"{label:<16} 執行失敗: {e!r}")
+                continue
+        results[method] = result
+        if resource is not None:
+            memory = (f"最大 RSS {result['memory_kib'] / 1024:8.1f} MiB"
+                      f"（擷取前 {result['baseline_kib'] / 1024:.1f} MiB）")
+        else:
+            memory = f"Python 記憶體峰值 {result['memory_kib'] / 1024:8.1f} MiB"
+        print(f"{label:<16} {result['seconds']:8.2f} 秒  "
+              f"{result['items'] / result['seconds']:>10,.0f} 筆/秒  {memory}")
+
+    os.remove(path)
+
+    if len(set(result['digest'] for result in results.values())) == 1:
+        print(f"\n各方法結果完全一致（{next(iter(results.values()))['items']:,} 筆）")
+    else:
+        print("\n⚠️ 各方法結果不一致")
+    if 'crawl4ai' in results:
+        crawl4ai = results['crawl4ai']
+        for method, label in methods[:2]:
+            if method in results:
+                result = results[method]
+                print(f"{label}: 速度 {crawl4ai['seconds'] / result['seconds']:.1f} 倍，"
+                      f"擷取增加的記憶體 {_growth(result) / 1024:.1f} MiB"
+                      f"（crawl4ai {_growth(crawl4ai) / 1024:.1f} MiB）")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,29 @@ import asyncio,json
 from crawl4ai import AsyncWebCrawler,CrawlerRunConfig,CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 
+ITEM_SCHEMA = {
+    "name":"項目名稱",
+    "baseSelector":"div.item",
+    "fields":[
+        {
+            "name":"標題",
+            "selector":"h2",
+            "type":"text"
+        },
+        {
+            "name":"連結名稱",
+            "selector":"a",
+            "type":"text"
+        },
+        {
+            "name":"連結網址",
+            "selector":"a",
+            "type":"attribute",
+            "attribute":"href"
+        }
+    ]
+}
+
 async def main():
     html = """
 <div class="item">
@@ -9,30 +32,7 @@ async def main():
     <a href="https://example.com/item1">連結1</a>
 </div>"""
 
-    schema ={
-        "name":"項目名稱",
-        "baseSelector":"div.item",
-        "fields":[
-            {
-                "name":"標題",
-                "selector":"h2",
-                "type":"text"
-            },
-            {
-                "name":"連結名稱",
-                "selector":"a",
-                "type":"text"
-            },
-            {
-                "name":"連結網址",
-                "selector":"a",
-                "type":"attribute",
-                "attribute":"href"
-            }
-        ]
-    }
-
-    strategy = JsonCssExtractionStrategy(schema)
+    strategy = JsonCssExtractionStrategy(ITEM_SCHEMA)
 
     run_config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
@@ -2,6 +2,30 @@ import asyncio,json
 from crawl4ai import AsyncWebCrawler,CrawlerRunConfig,CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 
+CRYPTO_SCHEMA = {
+    "name":"加密貨幣列表",
+    "baseSelector":"body",
+    "fields":[
+        {
+            "name":"加密貨幣",
+            "selector":"div.crypto-row",
+            "type":"list",
+            "fields":[
+                {
+                    "name":"加密貨幣名",
+                    "selector":"h2.coin-name",
+                    "type":"text"
+                },
+                {
+                    "name":"價格",
+                    "selector":"span.coin-price",
+                    "type":"text"
+                }
+            ] 
+        }
+    ]
+}
+
 async def main():
     # 模擬加密貨幣網頁
     html = """
@@ -19,31 +43,7 @@ async def main():
     </html>
     """
 
-    schema ={
-        "name":"加密貨幣列表",
-        "baseSelector":"body",
-        "fields":[
-            {
-                "name":"加密貨幣",
-                "selector":"div.crypto-row",
-                "type":"list",
-                "fields":[
-                    {
-                        "name":"加密貨幣名",
-                        "selector":"h2.coin-name",
-                        "type":"text"
-                    },
-                    {
-                        "name":"價格",
-                        "selector":"span.coin-price",
-                        "type":"text"
-                    }
-                ] 
-            }
-        ]
-    }
-
-    strategy = JsonCssExtractionStrategy(schema)
+    strategy = JsonCssExtractionStrategy(CRYPTO_SCHEMA)
 
     run_config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
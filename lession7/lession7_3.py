@@ -2,6 +2,41 @@ import asyncio,json
 from crawl4ai import AsyncWebCrawler,CrawlerRunConfig,CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 
+PRODUCT_SCHEMA = {
+    "name": "products",
+    "baseSelector": ".product-card",
+    "fields": [
+        {
+            "name": "title",
+            "selector": "h2",
+            "type": "text"
+        },
+        {
+            "name": "description",
+            "selector": "p",
+            "type": "text"
+        },
+        {
+            "name": "price",
+            "selector": ".new-price",
+            "type": "text"
+        },
+        {
+            "name": "link",
+            "selector": "a",
+            "type": "attribute",
+            "attribute": "href"
+        }
+    ]
+}
+
+
+def print_product(item):
+    print(f"產品名稱: {item['title']}")
+    print(f"價格: {item['price']}")
+    print(f"連結: {item['link']}")
+    print("=============")
+
 async def main():
     # 模擬加密貨幣網頁
     html = """<html>
@@ -28,35 +63,7 @@ async def main():
     </html> 
     """
 
-    schema = {
-        "name": "products",
-        "baseSelector": ".product-card",
-        "fields": [
-            {
-                "name": "title",
-                "selector": "h2",
-                "type": "text"
-            },
-            {
-                "name": "description",
-                "selector": "p",
-                "type": "text"
-            },
-            {
-                "name": "price",
-                "selector": ".new-price",
-                "type": "text"
-            },
-            {
-                "name": "link",
-                "selector": "a",
-                "type": "attribute",
-                "attribute": "href"
-            }
-        ]
-    }
-
-    strategy = JsonCssExtractionStrategy(schema)
+    strategy = JsonCssExtractionStrategy(PRODUCT_SCHEMA)
 
     run_config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
@@ -68,10 +75,18 @@ async def main():
             config=run_config)
         data = json.loads(result.extracted_content)
         for item in data:
-            print(f"產品名稱: {item['title']}")
-            print(f"價格: {item['price']}")
-            print(f"連結: {item['link']}")
-            print("=============")
+            print_product(item)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # python lession7_3.py 商品頁.html [--encoding big5] → 以串流方式逐筆擷取本地大檔（記憶體用量固定）
+    import argparse
+    parser = argparse.ArgumentParser(description="不帶參數執行 crawl4ai 範例；指定 HTML 檔則以串流方式擷取")
+    parser.add_argument('path', nargs='?', help="本地 HTML 檔")
+    parser.add_argument('--encoding', default=None, help="檔案編碼（預設依 <meta charset> 判斷，沒有時為 UTF-8）")
+    args = parser.parse_args()
+    if args.path:
+        from schema_compiler import compile_schema
+        for item in compile_schema(PRODUCT_SCHEMA).iter_extract(args.path, encoding=args.encoding):
+            print_product(item)
+    else:
+        asyncio.run(main())
\ No newline at end of file
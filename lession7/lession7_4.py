@@ -1,13 +1,13 @@
 import asyncio
 import json
+from typing import Optional
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 from pprint import pprint
 
 
-async def main():
-    # 模擬電子商務網頁
-    html = """
+# 模擬電子商務網頁
+PRODUCT_HTML = """
     <!DOCTYPE html>
 <html lang="zh-Hant">
 <head>
@@ -65,67 +65,110 @@ async def main():
     </div>
 </body>
 </html>
-    """
+"""
+
+# 修正後的 schema：使用 nested_list 處理評論
+PRODUCT_SCHEMA = {
+    "name": "產品",
+    "baseSelector": ".product",
+    "fields": [
+        {
+            "name": "產品名稱",
+            "selector": ".product-name",
+            "type": "text"
+        },
+        {
+            "name": "價格",
+            "selector": ".product-price",
+            "type": "text",
+            "value_type": "currency"
+        },
+        {
+            "name": "品牌",
+            "selector": ".brand",
+            "type": "text"
+        },
+        {
+            "name": "型號",
+            "selector": ".model",
+            "type": "text"
+        },
+        {
+            "name": "特徵",
+            "selector": ".product-features li",
+            "type": "list",
+            "fields": [
+                {"name": "內容", "type": "text"}
+            ]
+        },
+        {
+            "name": "評論",
+            "selector": ".review",
+            "type": "nested_list",
+            "fields": [
+                {
+                    "name": "評論者",
+                    "selector": ".reviewer",
+                    "type": "text"
+                },
+                {
+                    "name": "評分",
+                    "selector": ".rating",
+                    "type": "text",
+                    "value_type": "rating"
+                },
+                {
+                    "name": "評論內容",
+                    "selector": ".review-text",
+                    "type": "text"
+                }
+            ]
+        }
+    ]
+}
+
+
+def print_product(product: dict):
+    """印出一筆產品資料"""
+    print(f"產品名稱: {product.get('產品名稱', 'N/A')}")
+    print(f"價格: {product.get('價格', 'N/A')}")
+    print(f"品牌: {product.get('品牌', 'N/A')}")
+    print(f"型號: {product.get('型號', 'N/A')}")
+
+    # 處理特徵
+    features = product.get('特徵', [])
+    if features:
+        if isinstance(features, list):
+            # 如果是 list 型態，提取每個特徵的內容
+            feature_texts = []
+            for f in features:
+                if isinstance(f, dict):
+                    feature_texts.append(f.get('內容', ''))
+                else:
+                    feature_texts.append(str(f))
+            print(f"特徵: {', '.join(feature_texts)}")
+        else:
+            print(f"特徵: {features}")
+
+    # 處理評論（使用 nested_list 結構）
+    reviews = product.get('評論', [])
+    if reviews:
+        print("評論:")
+        if isinstance(reviews, list):
+            for review in reviews:
+                if isinstance(review, dict):
+                    reviewer = review.get('評論者', 'N/A')
+                    rating = review.get('評分', 'N/A')
+                    text = review.get('評論內容', 'N/A')
+                    print(f"  - {reviewer} {rating}: {text}")
+        else:
+            print(f"  - {reviews}")
+
+    print("-" * 50)
 
-    # 修正後的 schema：使用 nested_list 處理評論
-    schema = {
-        "name": "產品",
-        "baseSelector": ".product",
-        "fields": [
-            {
-                "name": "產品名稱",
-                "selector": ".product-name",
-                "type": "text"
-            },
-            {
-                "name": "價格",
-                "selector": ".product-price",
-                "type": "text"
-            },
-            {
-                "name": "品牌",
-                "selector": ".brand",
-                "type": "text"
-            },
-            {
-                "name": "型號",
-                "selector": ".model",
-                "type": "text"
-            },
-            {
-                "name": "特徵",
-                "selector": ".product-features li",
-                "type": "list",
-                "fields": [
-                    {"name": "內容", "type": "text"}
-                ]
-            },
-            {
-                "name": "評論",
-                "selector": ".review",
-                "type": "nested_list",
-                "fields": [
-                    {
-                        "name": "評論者",
-                        "selector": ".reviewer",
-                        "type": "text"
-                    },
-                    {
-                        "name": "評分",
-                        "selector": ".rating",
-                        "type": "text"
-                    },
-                    {
-                        "name": "評論內容",
-                        "selector": ".review-text",
-                        "type": "text"
-                    }
-                ]
-            }
-        ]
-    }
-
-    strategy = JsonCssExtractionStrategy(schema)
+
+async def main():
+    strategy = JsonCssExtractionStrategy(PRODUCT_SCHEMA)
 
     run_config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
@@ -134,7 +177,7 @@ async def main():
 
     async with AsyncWebCrawler() as crawler:
         result = await crawler.arun(
-            url=f"raw://{html}",
+            url=f"raw://{PRODUCT_HTML}",
             config=run_config
         )
         data = json.loads(result.extracted_content)
@@ -142,42 +185,31 @@ async def main():
 
         if isinstance(data, list):
             for product in data:
-                print(f"產品名稱: {product.get('產品名稱', 'N/A')}")
-                print(f"價格: {product.get('價格', 'N/A')}")
-                print(f"品牌: {product.get('品牌', 'N/A')}")
-                print(f"型號: {product.get('型號', 'N/A')}")
-
-                # 處理特徵
-                features = product.get('特徵', [])
-                if features:
-                    if isinstance(features, list):
-                        # 如果是 list 型態，提取每個特徵的內容
-                        feature_texts = []
-                        for f in features:
-                            if isinstance(f, dict):
-                                feature_texts.append(f.get('內容', ''))
-                            else:
-                                feature_texts.append(str(f))
-                        print(f"特徵: {', '.join(feature_texts)}")
-                    else:
-                        print(f"特徵: {features}")
-
-                # 處理評論（使用 nested_list 結構）
-                reviews = product.get('評論', [])
-                if reviews:
-                    print("評論:")
-                    if isinstance(reviews, list):
-                        for review in reviews:
-                            if isinstance(review, dict):
-                                reviewer = review.get('評論者', 'N/A')
-                                rating = review.get('評分', 'N/A')
-                                text = review.get('評論內容', 'N/A')
-                                print(f"  - {reviewer} {rating}: {text}")
-                    else:
-                        print(f"  - {reviews}")
-
-                print("-" * 50)
+                print_product(product)
+
+
+def stream_file(path: str, encoding: Optional[str] = None):
+    """
+    以串流方式擷取大型 HTML 檔（每解析完一個 .product 就輸出一筆，記憶體用量固定）
+
+    Args:
+        path: HTML 檔路徑
+        encoding: 檔案編碼（None 時依 <meta charset> 判斷，沒有時為 UTF-8）
+    """
+    from schema_compiler import compile_schema
+
+    for product in compile_schema(PRODUCT_SCHEMA).iter_extract(path, encoding=encoding):
+        print_product(product)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # python lession7_4.py 產品目錄.html [--encoding big5] → 串流擷取本地檔案；不帶參數則執行 crawl4ai 範例
+    import argparse
+    parser = argparse.ArgumentParser(description="不帶參數執行 crawl4ai 範例；指定 HTML 檔則以串流方式擷取")
+    parser.add_argument('path', nargs='?', help="本地 HTML 檔")
+    parser.add_argument('--encoding', default=None, help="檔案編碼（預設依 <meta charset> 判斷，沒有時為 UTF-8）")
+    args = parser.parse_args()
+    if args.path:
+        stream_file(args.path, args.encoding)
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -1,35 +1,40 @@
 
-import asyncio,json
+import asyncio,json,os,sys
 from crawl4ai import AsyncWebCrawler,CrawlerRunConfig,CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 from pprint import pprint
 
-async def main():
+# 共用 lession8 的免瀏覽器擷取（HTTP + lxml）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lession8'))
+from bot_rates import fetch_rate_rows_fast
+
+RATE_SCHEMA = {
+    "name":"匯率資訊",
+    "baseSelector":"table[title='牌告匯率'] tr",
+    "fields":[
+        {
+            "name":"幣別",
+            "selector":"td[data-table='幣別'] div.print_show",
+            "type":"text"
+        },
+        {
+            "name":"本行即期買入",
+            "selector":"td[data-table='本行即期買入']",
+            "type":"text"
+        },
+        {
+            "name":"本行即期賣出",
+            "selector":"td[data-table='本行即期賣出']",
+            "type":"text"
+        }
+        
+    ]
+}
+
+async def crawl_with_browser():
+    """crawl4ai 版本（備援）：啟動瀏覽器後以 JsonCssExtractionStrategy 提取"""
     
-    schema ={
-        "name":"匯率資訊",
-        "baseSelector":"table[title='牌告匯率'] tr",
-        "fields":[
-            {
-                "name":"幣別",
-                "selector":"td[data-table='幣別'] div.print_show",
-                "type":"text"
-            },
-            {
-                "name":"本行即期買入",
-                "selector":"td[data-table='本行即期買入']",
-                "type":"text"
-            },
-            {
-                "name":"本行即期賣出",
-                "selector":"td[data-table='本行即期賣出']",
-                "type":"text"
-            }
-            
-        ]
-    }
-
-    extraction_strategy = JsonCssExtractionStrategy(schema)
+    extraction_strategy = JsonCssExtractionStrategy(RATE_SCHEMA)
 
     run_config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
@@ -40,9 +45,19 @@ async def main():
         result = await crawler.arun(
             url=url,
             config=run_config)
-        data = json.loads(result.extracted_content)
-        pprint(data)
-        
+        return json.loads(result.extracted_content)
+
+async def main():
+    # 牌告匯率是伺服器端產生的靜態表格，先直接下載解析，失敗時才啟動瀏覽器
+    try:
+        data = fetch_rate_rows_fast()
+    except Exception as e:
+        print(f"快速路徑失敗，改用 crawl4ai: {e}")
+        data = None
+    if not data:
+        data = await crawl_with_browser()
+    pprint(data)
+
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,67 +1,73 @@
-import asyncio
-import json
-from datetime import datetime
+import os
+import sys
 import streamlit as st
 import pandas as pd
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+
+# 共用 lession8 的牌告匯率擷取模組
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lession8'))
+
+from bot_csv import RATE_COLUMNS
+from cross_rates import CrossRateMatrix
+from rate_cache import RateCache
+from rate_history import RateHistory
+
+
+@st.cache_resource
+def get_rate_history():
+    """與 lession8 共用的匯率歷史時間序列"""
+    return RateHistory()
+
+
+@st.cache_resource
+def get_rate_cache():
+    """
+    與 lession8 共用的磁碟匯率快取（整個 Streamlit 程序共用一個實例）
+    
+    所有工作階段共用同一個更新；更新在常駐事件迴圈上執行，
+    需要 crawl4ai 備援時瀏覽器保持開啟，並在資料過期前主動更新，
+    因此任何使用者都不必等待下載或瀏覽器啟動。
+    """
+    cache = RateCache()
+    # 每次取得的匯率表都附加到歷史時間序列
+    cache.subscribe(get_rate_history().append)
+    cache.start_auto_refresh()
+    return cache
+
+
+@st.cache_resource(max_entries=2)
+def build_rate_matrix(fetched_at, _rows):
+    """每次匯率更新（fetched_at 改變）只建立一次交叉匯率矩陣"""
+    return CrossRateMatrix.from_rows(_rows)
 
 
-@st.cache_data(ttl=600)  # 10分鐘快取
 def fetch_exchange_rates():
-    """爬取台灣銀行匯率資料"""
+    """
+    取得台灣銀行匯率資料
     
-    async def _fetch():
-        schema = {
-            "name": "匯率資訊",
-            "baseSelector": "table[title='牌告匯率'] tr",
-            "fields": [
-                {
-                    "name": "幣別",
-                    "selector": "td[data-table='幣別'] div.print_show",
-                    "type": "text"
-                },
-                {
-                    "name": "本行即期買入",
-                    "selector": "td[data-table='本行即期買入']",
-                    "type": "text"
-                },
-                {
-                    "name": "本行即期賣出",
-                    "selector": "td[data-table='本行即期賣出']",
-                    "type": "text"
-                }
-            ]
-        }
-
-        strategy = JsonCssExtractionStrategy(schema)
-        run_config = CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,
-            extraction_strategy=strategy
-        )
-        
-        async with AsyncWebCrawler() as crawler:
-            url = 'https://rate.bot.com.tw/xrt?Lang=zh-TW'
-            result = await crawler.arun(url=url, config=run_config)
-            data = json.loads(result.extracted_content)
-            return data
+    立即回傳快取中的匯率表，過期時於背景更新（stale-while-revalidate），
+    只有在完全沒有資料（第一次執行）時才等待下載。
     
-    # 執行非同步函數
-    data = asyncio.run(_fetch())
+    Returns:
+        (匯率 DataFrame, 交叉匯率矩陣, 取得時間)
+    """
+    cache = get_rate_cache()
+    data, fetched_at = cache.get()
+    if data is None:
+        data = cache.refresh() or []
+        fetched_at = cache.fetched_at
     
-    # 轉換為 DataFrame
-    df = pd.DataFrame(data)
+    # 轉換為 DataFrame（匯率欄位為 float，未掛牌為 NaN）
+    df = pd.DataFrame(data, columns=['幣別', '代碼', *RATE_COLUMNS])
     
-    # 處理資料
-    if not df.empty:
-        # 處理空值顯示為「暫停交易」
-        df['本行即期買入'] = df['本行即期買入'].replace('', '暫停交易').fillna('暫停交易')
-        df['本行即期賣出'] = df['本行即期賣出'].replace('', '暫停交易').fillna('暫停交易')
-        
-        # 過濾掉無法交易的貨幣（買入和賣出都是暫停交易的）
-        df = df[~((df['本行即期買入'] == '暫停交易') & (df['本行即期賣出'] == '暫停交易'))]
+    # 過濾掉無法交易的貨幣（即期買入和賣出都未掛牌）
+    df = df[df['本行即期買入'].notna() | df['本行即期賣出'].notna()]
     
-    return df
+    return df, build_rate_matrix(fetched_at, data), fetched_at
+
+
+def format_rate(value) -> str:
+    """匯率顯示文字（未掛牌顯示為暫停交易）"""
+    return '暫停交易' if pd.isna(value) else f"{value:g}"
 
 
 def main():
@@ -74,19 +80,21 @@ def main():
     st.title("💱 台幣匯率轉換系統")
     st.markdown("---")
     
-    # 手動更新按鈕
+    # 手動更新按鈕（背景重新驗證，不阻塞畫面）
     col_update = st.columns([6, 1])[1]
     with col_update:
         if st.button("🔄 手動更新", use_container_width=True):
-            st.cache_data.clear()
-            st.rerun()
-    
-    # 顯示更新時間
-    st.info(f"📅 最後更新時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            get_rate_cache().revalidate()
     
     # 獲取匯率資料
     try:
-        df = fetch_exchange_rates()
+        df, matrix, fetched_at = fetch_exchange_rates()
+        
+        # 顯示更新時間
+        if fetched_at is not None:
+            st.info(f"📅 最後更新時間：{fetched_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        if get_rate_cache().is_refreshing():
+            st.caption("⏳ 背景更新中，重新整理頁面即可看到最新匯率")
         
         if df.empty:
             st.error("❌ 無法取得匯率資料")
@@ -98,86 +106,110 @@ def main():
         # 左欄：顯示匯率表格
         with col1:
             st.subheader("📊 台灣銀行牌告匯率")
+            display_df = df.drop(columns=['代碼'])
+            for column in RATE_COLUMNS:
+                display_df[column] = display_df[column].map(format_rate)
             st.dataframe(
-                df,
+                display_df,
                 use_container_width=True,
                 hide_index=True,
                 height=600
             )
         
-        # 右欄：台幣轉換計算器
+        # 右欄：匯率轉換計算器（以交叉匯率矩陣查表）
         with col2:
-            st.subheader("💰 台幣轉換計算器")
+            st.subheader("💰 匯率轉換計算器")
             
-            # 過濾可交易的貨幣（至少有一個欄位不是暫停交易）
-            tradable_df = df[
-                (df['本行即期買入'] != '暫停交易') | 
-                (df['本行即期賣出'] != '暫停交易')
-            ].copy()
-            
-            if tradable_df.empty:
+            # 可交易的貨幣（即期買入與賣出皆有掛牌），新台幣排在第一個
+            tradable_codes = matrix.tradable()
+            if len(tradable_codes) < 2:
                 st.warning("⚠️ 目前沒有可交易的貨幣")
                 return
+            labels = {matrix.label(code): code for code in tradable_codes}
+            label_list = list(labels)
             
-            # 輸入台幣金額
-            twd_amount = st.number_input(
-                "輸入台幣金額 (TWD)",
+            # 輸入金額
+            amount = st.number_input(
+                "輸入金額",
                 min_value=0.0,
                 value=10000.0,
                 step=100.0,
                 format="%.2f"
             )
             
-            # 選擇目標貨幣
-            currency_list = tradable_df['幣別'].tolist()
-            selected_currency = st.selectbox(
-                "選擇目標貨幣",
-                currency_list
-            )
+            # 選擇來源與目標貨幣
+            col_source, col_target = st.columns(2)
+            with col_source:
+                source_label = st.selectbox("來源貨幣", label_list, index=0)
+            with col_target:
+                selected_currency = st.selectbox("目標貨幣", label_list, index=1)
             
             # 計算轉換
-            if selected_currency:
-                selected_row = tradable_df[tradable_df['幣別'] == selected_currency].iloc[0]
+            if source_label and selected_currency:
+                source = labels[source_label]
+                target = labels[selected_currency]
                 
                 st.markdown("---")
-                st.markdown(f"### 📈 {selected_currency} 匯率資訊")
+                st.markdown(f"### 📈 {source_label} → {selected_currency}")
                 
-                # 顯示匯率資訊
-                col_buy, col_sell = st.columns(2)
+                # 顯示兌換匯率與所用的牌告（來源以本行買入、目標以本行賣出計算）
+                col_rate, col_buy, col_sell = st.columns(3)
                 
+                with col_rate:
+                    st.metric("兌換匯率", f"{matrix.rate(source, target):.6g}")
+                    
                 with col_buy:
-                    buy_rate = selected_row['本行即期買入']
-                    st.metric(
-                        "本行買入",
-                        buy_rate if buy_rate != '暫停交易' else '暫停交易'
-                    )
+                    st.metric(f"{source} 本行買入", f"{matrix.quote(source, '買入'):.6g}")
                     
                 with col_sell:
-                    sell_rate = selected_row['本行即期賣出']
-                    st.metric(
-                        "本行賣出",
-                        sell_rate if sell_rate != '暫停交易' else '暫停交易'
-                    )
+                    st.metric(f"{target} 本行賣出", f"{matrix.quote(target, '賣出'):.6g}")
                 
                 st.markdown("---")
                 st.markdown("### 💵 轉換結果")
                 
-                # 計算轉換金額（使用銀行賣出匯率，因為客戶是買外幣）
-                if sell_rate != '暫停交易':
+                # 計算轉換金額（銀行以買入匯率收下來源貨幣、以賣出匯率付出目標貨幣）
+                foreign_amount = float(matrix.convert(amount, source, target))
+                st.success(
+                    f"**{amount:,.2f} {source}** = "
+                    f"**{foreign_amount:,.4f} {target}**"
+                )
+                st.caption(f"使用匯率：1 {source} = {matrix.rate(source, target):.6g} {target} (兌換)")
+                
+                # 近 90 天走勢（來自本地歷史資料，不重新抓取）
+                chart_code = target if target != 'TWD' else source
+                if chart_code != 'TWD':
+                    times, values = get_rate_history().last(chart_code, '本行即期賣出', days=90)
+                    if len(values) > 1:
+                        st.markdown(f"### 📈 {chart_code} 近 90 天即期賣出走勢")
+                        # 歷史資料的時間戳記為 UTC，轉成台灣時間再顯示
+                        local_times = pd.to_datetime(times).tz_localize('UTC').tz_convert('Asia/Taipei').tz_localize(None)
+                        st.line_chart(pd.DataFrame({'本行即期賣出': values}, index=local_times))
+            
+            # 批次轉換：上傳含金額與幣別欄位的 CSV，一次向量化轉換全部金額
+            with st.expander("📄 批次轉換 (CSV)"):
+                uploaded = st.file_uploader("上傳 CSV（需有 amount 與 currency 欄位）", type="csv")
+                batch_target = st.selectbox("轉換為", label_list, index=0, key="batch_target")
+                batch_side = st.radio("匯率", ["兌換", "賣出", "買入"], horizontal=True, key="batch_side")
+                if uploaded is not None:
+                    invoices = pd.read_csv(uploaded)
+                    target_code = labels[batch_target]
                     try:
-                        sell_rate_float = float(sell_rate)
-                        foreign_amount = twd_amount / sell_rate_float
-                        
-                        st.success(
-                            f"**{twd_amount:,.2f} TWD** = "
-                            f"**{foreign_amount:,.4f} {selected_currency}**"
+                        invoices[f'{target_code}_amount'] = matrix.convert_many(
+                            invoices['amount'].to_numpy(),
+                            invoices['currency'].astype(str).str.strip().to_numpy(),
+                            target_code,
+                            batch_side
+                        ).round(4)
+                    except KeyError as e:
+                        st.error(f"❌ 欄位或幣別錯誤：{e}")
+                    else:
+                        st.dataframe(invoices.head(1000), use_container_width=True, hide_index=True)
+                        st.download_button(
+                            "⬇️ 下載轉換結果",
+                            invoices.to_csv(index=False).encode('utf-8-sig'),
+                            file_name=f"converted_{target_code}.csv",
+                            mime="text/csv"
                         )
-                        
-                        st.caption(f"使用匯率：{sell_rate_float:.4f} (本行賣出)")
-                    except ValueError:
-                        st.error("❌ 匯率資料格式錯誤")
-                else:
-                    st.warning("⚠️ 此貨幣暫停交易")
     
     except Exception as e:
         st.error(f"❌ 發生錯誤：{str(e)}")
@@ -0,0 +1,104 @@
+"""
+牌告匯率擷取效能比較（使用保存的頁面 bot_xrt_sample.html，不需網路）
+
+比較項目：
+    lxml 快速路徑     - bot_rates.parse_rate_table
+    crawl4ai 提取     - JsonCssExtractionStrategy.extract（不含瀏覽器，只比較解析成本）
+    crawl4ai 瀏覽器   - AsyncWebCrawler 開啟 raw: HTML（含啟動 Chromium，需加 --browser）
+
+執行方式:
+    python bench_bot_rates.py
+    python bench_bot_rates.py --rounds 500 --browser
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+from bot_rates import RATE_SCHEMA, parse_rate_table
+
+try:
+    import resource  # 只有 Linux / macOS 有，用來讀取子行程（Chromium）的最大 RSS
+except ImportError:
+    resource = None
+
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot_xrt_sample.html')
+
+
+def measure(label: str, fn, rounds: int):
+    """
+    重複執行 fn 並輸出耗時與 Python 記憶體峰值
+
+    Returns:
+        最後一次的執行結果
+    """
+    fn()  # 暖身
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations.sort()
+    print(f"{label:<18} 中位數 {statistics.median(durations):8.3f} ms  "
+          f"p95 {durations[int(len(durations) * 0.95) - 1]:8.3f} ms  "
+          f"記憶體峰值 {peak / 1024:8.1f} KiB")
+    return result
+
+
+async def crawl_with_browser(html: str):
+    """以 crawl4ai 開啟 raw: HTML（包含瀏覽器啟動與關閉）"""
+    from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
+    from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+
+    run_config = CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,
+        extraction_strategy=JsonCssExtractionStrategy(RATE_SCHEMA)
+    )
+    async with AsyncWebCrawler() as crawler:
+        result = await crawler.arun(url=f"raw:{html}", config=run_config)
+        return json.loads(result.extracted_content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="牌告匯率擷取效能比較")
+    parser.add_argument('--rounds', type=int, default=200, help="每種方法重複次數")
+    parser.add_argument('--browser', action='store_true', help="另外測量 crawl4ai 含瀏覽器的完整流程")
+    args = parser.parse_args()
+
+    with open(SAMPLE_PATH, 'rb') as f:
+        page = f.read()
+    html = page.decode('utf-8')
+    print(f"樣本頁面: {SAMPLE_PATH} ({len(page) / 1024:.1f} KiB)，重複 {args.rounds} 次\n")
+
+    fast_rows = measure("lxml 快速路徑", lambda: parse_rate_table(page), args.rounds)
+
+    from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+    strategy = JsonCssExtractionStrategy(RATE_SCHEMA)
+    crawl4ai_rows = measure("crawl4ai 提取", lambda: strategy.extract('', html), args.rounds)
+
+    print(f"\n兩者結果一致: {fast_rows == crawl4ai_rows}（{len(fast_rows)} 種貨幣）")
+
+    if args.browser:
+        start = time.perf_counter()
+        browser_rows = asyncio.run(crawl_with_browser(html))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n{'crawl4ai 瀏覽器':<18} 單次 {elapsed:10.1f} ms  結果一致: {browser_rows == fast_rows}")
+        if resource is not None:
+            # Linux 單位為 KiB，macOS 為 bytes
+            max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            print(f"{'':<18} 瀏覽器子行程最大 RSS: {max_rss / 1024:.1f} MiB（Linux）")
+
+
+if __name__ == "__main__":
+    main()
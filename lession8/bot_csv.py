@@ -0,0 +1,265 @@
+"""
+台灣銀行牌告匯率 - CSV 下載來源
+
+臺灣銀行提供牌告匯率的 CSV 檔（flcsv），比 HTML 小且不需 DOM 解析：
+一次讀過所有列，直接轉成現金 / 即期買入、賣出的 float。
+下載時帶上 ETag / Last-Modified，匯率沒變時伺服器只回 304，不必重新下載與解析。
+CSV 取得失敗時改用 bot_rates 的 HTML 擷取（其中再以 crawl4ai 作最後備援）。
+"""
+
+import asyncio
+import csv
+import io
+import re
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from bot_rates import BOT_RATE_URL, RATE_SCHEMA, fetch_rate_rows
+from field_types import typed_columns
+import replay
+
+
+BOT_CSV_URL = 'https://rate.bot.com.tw/xrt/flcsv/0/day'
+
+# 幣別代碼 → 中文名稱（顯示格式與網頁相同，例如「美金 (USD)」）
+CURRENCY_NAMES = {
+    'USD': '美金', 'HKD': '港幣', 'GBP': '英鎊', 'AUD': '澳幣',
+    'CAD': '加拿大幣', 'SGD': '新加坡幣', 'CHF': '瑞士法郎', 'JPY': '日圓',
+    'ZAR': '南非幣', 'SEK': '瑞典幣', 'NZD': '紐元', 'THB': '泰幣',
+    'PHP': '菲國比索', 'IDR': '印尼幣', 'EUR': '歐元', 'KRW': '韓元',
+    'VND': '越南盾', 'MYR': '馬來幣', 'CNY': '人民幣',
+}
+
+# 每列匯率的數值欄位
+RATE_COLUMNS = ('本行現金買入', '本行現金賣出', '本行即期買入', '本行即期賣出')
+
+_CODE_PATTERN = re.compile(r'\(([A-Z]{3})\)')
+
+
+# ==================== 解析 ====================
+
+def to_rate(text: Optional[str]) -> Optional[float]:
+    """
+    將匯率文字轉為 float
+
+    Returns:
+        匯率；空字串、"-" 或 0（CSV 以 0.00000 表示未掛牌）時返回 None
+    """
+    try:
+        value = float(text.strip())
+    except (AttributeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def currency_label(code: str) -> str:
+    """幣別代碼 → 顯示名稱，例如 'USD' → '美金 (USD)'"""
+    name = CURRENCY_NAMES.get(code)
+    return f"{name} ({code})" if name else code
+
+
+def _decode(data: Union[str, bytes]) -> str:
+    """CSV 以 UTF-8（含 BOM）提供，舊檔案可能是 Big5"""
+    if isinstance(data, str):
+        return data.lstrip('\ufeff')
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('cp950')
+
+
+def parse_rate_csv(data: Union[str, bytes]) -> List[Dict]:
+    """
+    解析牌告匯率 CSV
+
+    表頭為「幣別,匯率,現金,即期,遠期…,匯率,現金,即期,遠期…」，
+    第一組現金 / 即期為本行買入，第二組為本行賣出，欄位位置由表頭決定。
+
+    Args:
+        data: CSV 內容
+
+    Returns:
+        匯率列表，格式:
+        [
+            {
+                "幣別": "美金 (USD)",
+                "代碼": "USD",
+                "本行現金買入": 30.045,
+                "本行現金賣出": 30.715,
+                "本行即期買入": 30.37,
+                "本行即期賣出": 30.52
+            },
+            ...
+        ]
+        未掛牌的欄位為 None
+    """
+    reader = csv.reader(io.StringIO(_decode(data)))
+    header = [cell.strip() for cell in next(reader, [])]
+    cash = [i for i, name in enumerate(header) if name == '現金']
+    spot = [i for i, name in enumerate(header) if name == '即期']
+    if len(cash) < 2 or len(spot) < 2:
+        raise ValueError(f"無法辨識的 CSV 表頭: {header}")
+    columns = (cash[0], cash[1], spot[0], spot[1])
+
+    rows = []
+    for record in reader:
+        if not record or not record[0].strip():
+            continue
+        code = record[0].strip()
+        row = {"幣別": currency_label(code), "代碼": code}
+        for name, index in zip(RATE_COLUMNS, columns):
+            row[name] = to_rate(record[index]) if index < len(record) else None
+        rows.append(row)
+    return rows
+
+
+def _rates(column: np.ndarray) -> List[Optional[float]]:
+    """數值欄 → 匯率列表（NaN 與 0 表示未掛牌，為 None）"""
+    listed = column > 0
+    values = column.tolist()
+    return [value if ok else None for value, ok in zip(values, listed.tolist())]
+
+
+def typed_rows_from_html(rows: List[Dict[str, str]]) -> List[Dict]:
+    """
+    將 HTML 擷取的文字列轉為與 parse_rate_csv 相同的格式
+
+    匯率欄依 RATE_SCHEMA 的 value_type 整欄轉換；HTML schema 只有即期匯率，現金欄位為 None。
+    """
+    rows = [item for item in rows if item.get("幣別", "").strip()]
+    columns = typed_columns(rows, RATE_SCHEMA)
+    buy = _rates(columns["本行即期買入"])
+    sell = _rates(columns["本行即期賣出"])
+
+    typed = []
+    for item, spot_buy, spot_sell in zip(rows, buy, sell):
+        label = item["幣別"].strip()
+        match = _CODE_PATTERN.search(label)
+        typed.append({
+            "幣別": label,
+            "代碼": match.group(1) if match else label,
+            "本行現金買入": None,
+            "本行現金賣出": None,
+            "本行即期買入": spot_buy,
+            "本行即期賣出": spot_sell,
+        })
+    return typed
+
+
+# ==================== 條件式下載 ====================
+
+class CsvRateSource:
+    """
+    記住上次的 ETag / Last-Modified 與解析結果的 CSV 匯率來源
+
+    同一個實例重複呼叫 fetch() 時，匯率沒變只會收到 304，直接回傳上次的結果。
+    """
+
+    def __init__(self, url: str = BOT_CSV_URL, timeout: float = 10.0):
+        """
+        初始化
+
+        Args:
+            url: CSV 下載網址
+            timeout: 逾時秒數
+        """
+        self.url = url
+        self.timeout = timeout
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.rows: Optional[List[Dict]] = None
+
+    def fetch(self) -> Tuple[List[Dict], bool]:
+        """
+        條件式下載並解析 CSV
+
+        Returns:
+            (匯率列表, 是否有變動)；收到 304 時返回上次的結果與 False
+        """
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        if self.rows is not None:
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+
+        request = urllib.request.Request(self.url, headers=headers)
+        try:
+            with replay.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and self.rows is not None:
+                return self.rows, False
+            raise
+
+        rows = parse_rate_csv(body)
+        if not rows:
+            raise ValueError("CSV 中沒有任何匯率資料")
+        self.rows = rows
+        self.etag = etag
+        self.last_modified = last_modified
+        return rows, True
+
+
+async def fetch_typed_rates(source: CsvRateSource, html_url: str = BOT_RATE_URL) -> List[Dict]:
+    """
+    取得匯率：CSV（條件式下載）優先，失敗時改用 HTML 擷取
+
+    Args:
+        source: CSV 來源（保存 ETag / Last-Modified 的實例）
+        html_url: 備援的牌告匯率網頁
+
+    Returns:
+        匯率列表（格式同 parse_rate_csv）
+    """
+    try:
+        # 同步的 HTTP 下載放到執行緒中，避免阻塞共用的事件迴圈
+        rows, _ = await asyncio.get_running_loop().run_in_executor(None, source.fetch)
+        return rows
+    except Exception as e:
+        print(f"CSV 下載失敗，改用 HTML 擷取: {e}")
+    return typed_rows_from_html(await fetch_rate_rows(html_url))
+
+
+if __name__ == "__main__":
+    # 以本地範例檔驗證：CSV 解析結果須與 HTML 範例一致，第二次下載須得到 304
+    import functools
+    import os
+    import threading
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    from bot_rates import parse_rate_table
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(here, 'bot_rates_sample.csv'), 'rb') as f:
+        csv_rows = parse_rate_csv(f.read())
+    with open(os.path.join(here, 'bot_xrt_sample.html'), 'rb') as f:
+        html_rows = typed_rows_from_html(parse_rate_table(f.read()))
+
+    for csv_row, html_row in zip(csv_rows, html_rows):
+        assert csv_row["幣別"] == html_row["幣別"], (csv_row, html_row)
+        assert csv_row["本行即期買入"] == html_row["本行即期買入"], (csv_row, html_row)
+        assert csv_row["本行即期賣出"] == html_row["本行即期賣出"], (csv_row, html_row)
+    assert len(csv_rows) == len(html_rows)
+    print(f"✓ CSV 與 HTML 範例一致（{len(csv_rows)} 種貨幣）")
+
+    class LoggingHandler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            print(f"  伺服器: {format % args}")
+
+    handler = functools.partial(LoggingHandler, directory=here)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    source = CsvRateSource(f"http://127.0.0.1:{server.server_port}/bot_rates_sample.csv")
+    rows, changed = source.fetch()
+    assert changed and rows == csv_rows
+    rows, changed = source.fetch()
+    assert not changed and rows == csv_rows
+    server.shutdown()
+    print("✓ 第二次下載收到 304，沿用上次的解析結果")
@@ -0,0 +1,182 @@
+"""
+台灣銀行牌告匯率 - 免瀏覽器快速路徑
+
+牌告匯率表格（table[title='牌告匯率']）是伺服器端產生的靜態 HTML，
+不需要啟動 Chromium：直接以 HTTP 下載頁面，再用預先編譯好的
+lxml XPath 取出「幣別、本行即期買入、本行即期賣出」三個欄位。
+輸出格式與原本的 JsonCssExtractionStrategy schema 完全相同，
+快速路徑失敗（網路錯誤、版面改變找不到資料）時才改用 crawl4ai。
+"""
+
+import asyncio
+import json
+import urllib.request
+from typing import Dict, List, Optional, Union
+
+from lxml import etree, html as lxml_html
+
+import replay
+from warm_crawler import warm_crawler
+
+
+BOT_RATE_URL = 'https://rate.bot.com.tw/xrt?Lang=zh-TW'
+
+# 與 lession7/lession7_5.py 相同的 crawl4ai schema（備援路徑使用）
+RATE_SCHEMA = {
+    "name": "匯率資訊",
+    "baseSelector": "table[title='牌告匯率'] tr",
+    "fields": [
+        {
+            "name": "幣別",
+            "selector": "td[data-table='幣別'] div.print_show",
+            "type": "text"
+        },
+        {
+            "name": "本行即期買入",
+            "selector": "td[data-table='本行即期買入']",
+            "type": "text",
+            "value_type": "decimal"
+        },
+        {
+            "name": "本行即期賣出",
+            "selector": "td[data-table='本行即期賣出']",
+            "type": "text",
+            "value_type": "decimal"
+        }
+    ]
+}
+
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/131.0 Safari/537.36',
+    'Accept-Language': 'zh-TW,zh;q=0.9',
+}
+
+
+# ==================== 編譯好的 XPath ====================
+
+def _has_class(name: str) -> str:
+    """CSS 的 .class 對應的 XPath 條件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 與 RATE_SCHEMA 的 CSS selector 一一對應，只編譯一次
+_ROWS = etree.XPath("//table[@title='牌告匯率']//tr")
+_FIELD_XPATHS = [
+    ("幣別", etree.XPath(f"(.//td[@data-table='幣別']//div[{_has_class('print_show')}])[1]")),
+    ("本行即期買入", etree.XPath("(.//td[@data-table='本行即期買入'])[1]")),
+    ("本行即期賣出", etree.XPath("(.//td[@data-table='本行即期賣出'])[1]")),
+]
+
+
+def _element_text(element) -> str:
+    """等同 BeautifulSoup 的 get_text(strip=True)：每段文字去空白後直接串接"""
+    return "".join(text.strip() for text in element.itertext())
+
+
+# ==================== 快速路徑 ====================
+
+def download_rate_page(url: str = BOT_RATE_URL, timeout: float = 10.0) -> bytes:
+    """
+    以一般 HTTP 請求下載牌告匯率頁面
+
+    Args:
+        url: 牌告匯率網址
+        timeout: 逾時秒數
+
+    Returns:
+        頁面原始位元組（交給 lxml 依 meta charset 解碼）
+    """
+    request = urllib.request.Request(url, headers=_HEADERS)
+    with replay.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def parse_rate_table(page: Union[str, bytes]) -> List[Dict[str, str]]:
+    """
+    從牌告匯率頁面取出匯率列
+
+    Args:
+        page: 頁面 HTML
+
+    Returns:
+        與 JsonCssExtractionStrategy(RATE_SCHEMA) 相同的結果：
+        每列一個字典，找不到的欄位省略，沒有任何欄位的列（表頭）不輸出
+    """
+    tree = lxml_html.fromstring(page)
+    rows = []
+    for tr in _ROWS(tree):
+        item = {}
+        for name, xpath in _FIELD_XPATHS:
+            found = xpath(tr)
+            if found:
+                item[name] = _element_text(found[0])
+        if item:
+            rows.append(item)
+    return rows
+
+
+def fetch_rate_rows_fast(url: str = BOT_RATE_URL, timeout: float = 10.0) -> List[Dict[str, str]]:
+    """下載並解析牌告匯率（不啟動瀏覽器）"""
+    return parse_rate_table(download_rate_page(url, timeout))
+
+
+# ==================== crawl4ai 備援路徑 ====================
+
+async def fetch_rate_rows_crawl4ai(url: str = BOT_RATE_URL) -> List[Dict[str, str]]:
+    """
+    以 crawl4ai（Chromium）抓取牌告匯率
+
+    只在快速路徑失敗時使用，因此延後匯入 crawl4ai，
+    讓快速路徑不必負擔載入瀏覽器相關模組的時間與記憶體。
+    瀏覽器由程序共用的 warm_crawler 保持開啟，之後的備援不必再次啟動。
+    """
+    from crawl4ai import CrawlerRunConfig, CacheMode
+    from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+
+    run_config = CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,
+        extraction_strategy=JsonCssExtractionStrategy(RATE_SCHEMA)
+    )
+    result = await warm_crawler.arun(url, run_config)
+    if not result.success:
+        raise RuntimeError(f"crawl4ai 抓取失敗: {result.error_message}")
+    return json.loads(result.extracted_content)
+
+
+async def fetch_rate_rows(url: str = BOT_RATE_URL, timeout: float = 10.0) -> List[Dict[str, str]]:
+    """
+    取得牌告匯率列：先走 HTTP + lxml，失敗或沒有資料時改用 crawl4ai
+
+    Args:
+        url: 牌告匯率網址
+        timeout: 快速路徑的逾時秒數
+
+    Returns:
+        匯率列（格式同 parse_rate_table）
+    """
+    error: Optional[Exception] = None
+    try:
+        rows = parse_rate_table(await _download_in_thread(url, timeout))
+        if any(row.get("幣別") for row in rows):
+            return rows
+    except Exception as e:
+        error = e
+
+    print(f"快速路徑失敗，改用 crawl4ai: {error or '找不到匯率表格'}")
+    return await fetch_rate_rows_crawl4ai(url)
+
+
+async def _download_in_thread(url: str, timeout: float) -> bytes:
+    """在執行緒中下載，避免阻塞事件迴圈"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, download_rate_page, url, timeout)
+
+
+if __name__ == "__main__":
+    import os
+    from pprint import pprint
+
+    sample = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot_xrt_sample.html')
+    with open(sample, 'rb') as f:
+        pprint(parse_rate_table(f.read()))
@@ -0,0 +1,222 @@
+"""
+交叉匯率矩陣與批次轉換
+
+每次匯率更新時建立一次 NumPy 矩陣（包含新台幣與所有外幣，皆經由新台幣換算）：
+    buy[i, j]   以「本行買入」匯率計算，1 單位 i 可換得多少 j
+    sell[i, j]  以「本行賣出」匯率計算，1 單位 i 可換得多少 j
+    兌換[i, j]  實際換匯：銀行以「本行買入」收下 i、以「本行賣出」付出 j
+之後任何幣別對的轉換都只是查表，再乘上金額陣列，
+一百萬筆發票金額也能在一次向量化運算中完成。
+"""
+
+import csv
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from bot_csv import currency_label
+
+
+BASE_CURRENCY = 'TWD'
+BASE_LABEL = '新台幣 (TWD)'
+
+# 買賣別（對應「本行買入」、「本行賣出」）
+SIDES = ('買入', '賣出')
+
+# 實際換匯使用的矩陣：來源幣別以本行買入、目標幣別以本行賣出計算（新台幣固定為 1）
+EXCHANGE = '兌換'
+
+
+class CrossRateMatrix:
+    """以新台幣為中介的交叉匯率矩陣"""
+
+    def __init__(self, codes: Sequence[str], buy: np.ndarray, sell: np.ndarray, labels: Optional[Sequence[str]] = None):
+        """
+        初始化（一般請使用 from_rows 建立）
+
+        Args:
+            codes: 幣別代碼，第一個必須是 TWD
+            buy: 各幣別的本行買入匯率（每單位外幣的台幣價格，TWD 為 1，未掛牌為 NaN）
+            sell: 各幣別的本行賣出匯率
+            labels: 顯示名稱，例如「美金 (USD)」
+        """
+        self.codes: List[str] = list(codes)
+        self.labels: List[str] = list(labels) if labels is not None else list(codes)
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+
+        buy = np.asarray(buy, dtype=np.float64)
+        sell = np.asarray(sell, dtype=np.float64)
+        self.quotes = {'買入': buy, '賣出': sell}
+        # matrix[i, j] = 1 單位 i 換成 j 的數量 = (i 的台幣價格) / (j 的台幣價格)
+        self.matrices = {side: rates[:, None] / rates[None, :] for side, rates in self.quotes.items()}
+        # 客戶換匯：把 i 賣給銀行（本行買入）得到台幣，再向銀行買 j（本行賣出）
+        self.matrices[EXCHANGE] = buy[:, None] / sell[None, :]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict], kind: str = '即期') -> 'CrossRateMatrix':
+        """
+        由匯率列表建立矩陣
+
+        Args:
+            rows: bot_csv.parse_rate_csv 格式的匯率列表
+            kind: '即期' 或 '現金'
+        """
+        codes = [BASE_CURRENCY]
+        labels = [BASE_LABEL]
+        buy = [1.0]
+        sell = [1.0]
+        for row in rows:
+            codes.append(row['代碼'])
+            labels.append(row.get('幣別') or currency_label(row['代碼']))
+            buy.append(_nan_if_none(row.get(f'本行{kind}買入')))
+            sell.append(_nan_if_none(row.get(f'本行{kind}賣出')))
+        return cls(codes, np.array(buy), np.array(sell), labels)
+
+    # ==================== 查詢 ====================
+
+    def rate(self, source: str, target: str, side: str = EXCHANGE) -> float:
+        """1 單位 source 可換得多少 target（預設為實際換匯；未掛牌時為 NaN）"""
+        return float(self.matrices[side][self.index[source], self.index[target]])
+
+    def quote(self, code: str, side: str = '賣出') -> float:
+        """牌告匯率（每單位外幣的台幣價格）"""
+        return float(self.quotes[side][self.index[code]])
+
+    def tradable(self, side: Optional[str] = None) -> List[str]:
+        """有掛牌的幣別代碼（side 為 None 時需買入、賣出皆有掛牌）"""
+        sides = SIDES if side is None else (side,)
+        mask = np.ones(len(self.codes), dtype=bool)
+        for name in sides:
+            mask &= ~np.isnan(self.quotes[name])
+        return [code for code, ok in zip(self.codes, mask) if ok]
+
+    def label(self, code: str) -> str:
+        """幣別代碼 → 顯示名稱"""
+        return self.labels[self.index[code]]
+
+    # ==================== 批次轉換 ====================
+
+    def convert(self, amounts: Union[float, np.ndarray], source: str, target: str, side: str = EXCHANGE) -> np.ndarray:
+        """
+        將同一幣別的金額批次轉換為另一幣別
+
+        Args:
+            amounts: 金額（純量或陣列）
+            source: 來源幣別代碼
+            target: 目標幣別代碼
+            side: '兌換'（預設，實際換匯）、'買入' 或 '賣出'
+
+        Returns:
+            轉換後金額（與 amounts 同形狀）
+        """
+        return np.asarray(amounts, dtype=np.float64) * self.matrices[side][self.index[source], self.index[target]]
+
+    def convert_many(
+        self,
+        amounts: np.ndarray,
+        sources: Union[str, Sequence[str], np.ndarray],
+        targets: Union[str, Sequence[str], np.ndarray],
+        side: str = EXCHANGE
+    ) -> np.ndarray:
+        """
+        每筆金額各自指定來源 / 目標幣別的批次轉換
+
+        幣別字串只在 np.unique 後的少數幾個值上查表，其餘都是陣列運算。
+
+        Args:
+            amounts: 金額陣列
+            sources: 來源幣別（單一代碼或與 amounts 等長的陣列）
+            targets: 目標幣別（單一代碼或與 amounts 等長的陣列）
+            side: '兌換'（預設，實際換匯）、'買入' 或 '賣出'
+
+        Returns:
+            轉換後金額陣列；未掛牌的幣別為 NaN
+
+        Raises:
+            KeyError: 出現矩陣中沒有的幣別代碼
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        matrix = self.matrices[side]
+        return amounts * matrix[self._indices(sources, amounts.shape), self._indices(targets, amounts.shape)]
+
+    def _indices(self, codes, shape) -> np.ndarray:
+        """幣別代碼 → 矩陣索引（未知代碼拋出 KeyError）"""
+        if isinstance(codes, str):
+            return np.full(shape, self.index[codes], dtype=np.intp)
+        unique, inverse = np.unique(np.asarray(codes), return_inverse=True)
+        lookup = np.array([self.index.get(str(code), -1) for code in unique], dtype=np.intp)
+        indices = lookup[inverse].reshape(shape)
+        if (indices < 0).any():
+            raise KeyError(f"未知的幣別: {sorted(set(map(str, unique)) - set(self.codes))}")
+        return indices
+
+    def convert_csv(
+        self,
+        input_path: str,
+        output_path: str,
+        target: str,
+        amount_column: str = 'amount',
+        currency_column: str = 'currency',
+        side: str = EXCHANGE
+    ) -> int:
+        """
+        轉換 CSV 檔中的每一筆金額（例如發票清單），新增 `{target}_amount` 欄位
+
+        Args:
+            input_path: 輸入 CSV（需有金額與幣別欄位）
+            output_path: 輸出 CSV
+            target: 目標幣別代碼
+            amount_column: 金額欄位名稱
+            currency_column: 幣別欄位名稱
+            side: '兌換'（預設，實際換匯）、'買入' 或 '賣出'
+
+        Returns:
+            轉換筆數
+        """
+        with open(input_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            records = list(reader)
+        amount_index = header.index(amount_column)
+        currency_index = header.index(currency_column)
+
+        amounts = np.array([record[amount_index] for record in records], dtype=np.float64)
+        currencies = np.array([record[currency_index].strip() for record in records])
+        converted = self.convert_many(amounts, currencies, target, side)
+
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header + [f'{target}_amount'])
+            for record, value in zip(records, converted.round(4).tolist()):
+                writer.writerow(record + [value])
+        return len(records)
+
+
+def _nan_if_none(value: Optional[float]) -> float:
+    """None（未掛牌）→ NaN"""
+    return float('nan') if value is None else float(value)
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    from bot_csv import parse_rate_csv
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(here, 'bot_rates_sample.csv'), 'rb') as f:
+        matrix = CrossRateMatrix.from_rows(parse_rate_csv(f.read()))
+
+    print(f"10,000 TWD → USD（兌換）: {matrix.convert(10000, 'TWD', 'USD'):.2f}")
+    print(f"100 USD → TWD（兌換）: {matrix.convert(100, 'USD', 'TWD'):.2f}")
+    print(f"100 USD → JPY（兌換）: {matrix.convert(100, 'USD', 'JPY'):.0f}")
+
+    rng = np.random.default_rng(0)
+    count = 1_000_000
+    amounts = rng.uniform(10, 10000, count)
+    currencies = rng.choice(matrix.tradable(), count)
+
+    start = time.perf_counter()
+    converted = matrix.convert_many(amounts, currencies, 'TWD')
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{count:,} 筆混合幣別 → TWD: {elapsed:.1f} ms（合計 {converted.sum():,.0f} TWD）")
@@ -2,98 +2,33 @@
 """
 台灣銀行匯率查詢系統 - tkinter 桌面應用程式
 
-整合 crawl4ai 爬蟲與 tkinter GUI，提供即時匯率查詢與台幣轉換功能。
+整合匯率爬蟲（CSV 條件式下載，HTML 擷取與 crawl4ai 備援）與 tkinter GUI，
+提供即時匯率查詢與台幣轉換功能。匯率表存放於與 Streamlit 版共用的磁碟快取，
+啟動時立即顯示，過期或手動更新時於背景重新驗證。
 """
 
-import asyncio
-import json
 import tkinter as tk
 from tkinter import ttk, messagebox
-from threading import Thread
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict
 
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+import numpy as np
 
+from bot_csv import RATE_COLUMNS
+from cross_rates import CrossRateMatrix
+from rate_cache import RateCache
+from rate_history import TAIPEI_OFFSET, RateHistory
 
-# ============= 爬蟲模組 =============
 
-async def fetch_exchange_rates() -> Optional[List[Dict[str, str]]]:
-    """
-    爬取台灣銀行匯率資訊
-    
-    Returns:
-        匯率資料列表，格式:
-        [
-            {
-                "幣別": "美金 (USD)",
-                "本行即期買入": "31.50",
-                "本行即期賣出": "32.50"
-            },
-            ...
-        ]
-        失敗時返回 None
-    """
-    try:
-        # 定義資料提取 schema
-        schema = {
-            "name": "匯率資訊",
-            "baseSelector": "table[title='牌告匯率'] tr",
-            "fields": [
-                {
-                    "name": "幣別",
-                    "selector": "td[data-table='幣別'] div.print_show",
-                    "type": "text"
-                },
-                {
-                    "name": "本行即期買入",
-                    "selector": "td[data-table='本行即期買入']",
-                    "type": "text"
-                },
-                {
-                    "name": "本行即期賣出",
-                    "selector": "td[data-table='本行即期賣出']",
-                    "type": "text"
-                }
-            ]
-        }
-
-        # 建立提取策略
-        extraction_strategy = JsonCssExtractionStrategy(schema)
+# ============= 資料來源 =============
 
-        # 配置爬蟲
-        run_config = CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,
-            extraction_strategy=extraction_strategy
-        )
+# 與 lession7_1 共用的磁碟快取：立即回傳上次的匯率表，過期時於背景更新
+# （更新時 CSV 條件式下載優先，失敗時改用 HTML 擷取與 crawl4ai）
+rate_cache = RateCache()
 
-        # 執行爬蟲
-        async with AsyncWebCrawler() as crawler:
-            url = 'https://rate.bot.com.tw/xrt?Lang=zh-TW'
-            result = await crawler.arun(url=url, config=run_config)
-            data = json.loads(result.extracted_content)
-            
-            # 清理資料
-            cleaned_data = []
-            for item in data:
-                currency = item.get("幣別", "").strip()
-                buy_rate = item.get("本行即期買入", "").strip()
-                sell_rate = item.get("本行即期賣出", "").strip()
-                
-                # 只加入有幣別資料的項目
-                if currency:
-                    cleaned_data.append({
-                        "幣別": currency,
-                        "本行即期買入": buy_rate,
-                        "本行即期賣出": sell_rate
-                    })
-            
-            return cleaned_data if cleaned_data else None
-            
-    except Exception as e:
-        print(f"爬蟲錯誤: {e}")
-        return None
+# 每次取得的匯率表都附加到本地歷史時間序列（繪製走勢圖時不需重新抓取）
+rate_history = RateHistory()
+rate_cache.subscribe(rate_history.append)
 
 
 # ============= GUI 應用程式 =============
@@ -112,9 +47,11 @@ class ExchangeRateApp(tk.Tk):
         self.configure(bg="#f0f0f0")
         
         # 資料儲存
-        self.exchange_data: List[Dict[str, str]] = []
+        self.exchange_data: List[Dict] = []
+        # 交叉匯率矩陣（每次匯率更新時重建一次）與下拉選單顯示名稱 → 幣別代碼
+        self.rate_matrix: Optional[CrossRateMatrix] = None
+        self.currency_codes: Dict[str, str] = {}
         self.last_update: Optional[datetime] = None
-        self.is_loading: bool = False
         
         # 建立 UI
         self._setup_ui()
@@ -154,6 +91,15 @@ class ExchangeRateApp(tk.Tk):
         )
         self.update_btn.grid(row=0, column=1, padx=20, pady=5)
         
+        # 歷史走勢按鈕
+        history_btn = ttk.Button(
+            header_frame,
+            text="📈 歷史走勢",
+            command=self._open_history_window,
+            style="Large.TButton"
+        )
+        history_btn.grid(row=0, column=4, padx=20, pady=5)
+        
         # 狀態標籤
         self.status_label = ttk.Label(header_frame, text="", foreground="#27ae60", font=("Arial", 14, "bold"))
         self.status_label.grid(row=0, column=2, padx=15)
@@ -172,7 +118,7 @@ class ExchangeRateApp(tk.Tk):
         style.configure("Large.Treeview.Heading", font=("Arial", 16, "bold"), background="#3498db", foreground="white")
         
         # 建立 Treeview
-        columns = ("幣別", "本行即期買入", "本行即期賣出")
+        columns = ("幣別", "本行現金買入", "本行現金賣出", "本行即期買入", "本行即期賣出")
         self.tree = ttk.Treeview(
             left_frame,
             columns=columns,
@@ -183,13 +129,15 @@ class ExchangeRateApp(tk.Tk):
         
         # 設定欄位
         self.tree.heading("幣別", text="幣別")
-        self.tree.heading("本行即期買入", text="本行即期買入")
-        self.tree.heading("本行即期賣出", text="本行即期賣出")
+        self.tree.heading("本行現金買入", text="現金買入")
+        self.tree.heading("本行現金賣出", text="現金賣出")
+        self.tree.heading("本行即期買入", text="即期買入")
+        self.tree.heading("本行即期賣出", text="即期賣出")
         
         # 設定欄寬
         self.tree.column("幣別", width=200, anchor=tk.W)
-        self.tree.column("本行即期買入", width=160, anchor=tk.CENTER)
-        self.tree.column("本行即期賣出", width=160, anchor=tk.CENTER)
+        for column in columns[1:]:
+            self.tree.column(column, width=120, anchor=tk.CENTER)
         
         # 捲軸
         scrollbar = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self.tree.yview)
@@ -204,27 +152,32 @@ class ExchangeRateApp(tk.Tk):
         left_frame.rowconfigure(0, weight=1)
         
         # ===== 右側 - 台幣轉換計算器 =====
-        right_frame = ttk.LabelFrame(main_container, text="  💱 台幣轉換計算器  ", padding="20")
+        right_frame = ttk.LabelFrame(main_container, text="  💱 匯率轉換計算器  ", padding="20")
         right_frame.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(8, 0))
         
         # 說明文字
         instruction = ttk.Label(
             right_frame,
-            text="✨ 輸入台幣金額，選擇目標貨幣進行轉換",
+            text="✨ 輸入金額，選擇來源與目標貨幣進行轉換",
             font=("Arial", 14),
             foreground="#34495e"
         )
         instruction.grid(row=0, column=0, columnspan=2, pady=(0, 25))
         
-        # 台幣輸入
-        ttk.Label(right_frame, text="💵 台幣金額 (TWD):", font=("Arial", 16)).grid(row=1, column=0, sticky=tk.W, pady=10)
-        self.twd_entry = ttk.Entry(right_frame, width=18, font=("Arial", 16))
-        self.twd_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=10, padx=(10, 0))
+        # 金額輸入
+        ttk.Label(right_frame, text="💵 金額:", font=("Arial", 16)).grid(row=1, column=0, sticky=tk.W, pady=10)
+        self.amount_entry = ttk.Entry(right_frame, width=18, font=("Arial", 16))
+        self.amount_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=10, padx=(10, 0))
+        
+        # 來源貨幣選擇（預設新台幣）
+        ttk.Label(right_frame, text="🏠 來源貨幣:", font=("Arial", 16)).grid(row=2, column=0, sticky=tk.W, pady=10)
+        self.source_combo = ttk.Combobox(right_frame, width=16, state="readonly", font=("Arial", 16))
+        self.source_combo.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=10, padx=(10, 0))
         
         # 目標貨幣選擇
-        ttk.Label(right_frame, text="🌍 目標貨幣:", font=("Arial", 16)).grid(row=2, column=0, sticky=tk.W, pady=10)
+        ttk.Label(right_frame, text="🌍 目標貨幣:", font=("Arial", 16)).grid(row=3, column=0, sticky=tk.W, pady=10)
         self.currency_combo = ttk.Combobox(right_frame, width=16, state="readonly", font=("Arial", 16))
-        self.currency_combo.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=10, padx=(10, 0))
+        self.currency_combo.grid(row=3, column=1, sticky=(tk.W, tk.E), pady=10, padx=(10, 0))
         
         # 設定按鈕樣式
         style.configure("Large.TButton", font=("Arial", 16, "bold"), padding=15)
@@ -236,11 +189,11 @@ class ExchangeRateApp(tk.Tk):
             command=self._calculate_conversion,
             style="Large.TButton"
         )
-        calc_btn.grid(row=3, column=0, columnspan=2, pady=25, ipadx=20, ipady=5)
+        calc_btn.grid(row=4, column=0, columnspan=2, pady=25, ipadx=20, ipady=5)
         
         # 結果顯示區
         result_frame = ttk.LabelFrame(right_frame, text="  📊 轉換結果  ", padding="15")
-        result_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=15)
+        result_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=15)
         
         self.result_text = tk.Text(
             result_frame,
@@ -257,16 +210,16 @@ class ExchangeRateApp(tk.Tk):
         # 說明文字
         help_text = ttk.Label(
             right_frame,
-            text="💡 買入：您賣台幣給銀行\n💡 賣出：您向銀行買外幣",
+            text="💡 買入：以本行買入匯率換算\n💡 賣出：以本行賣出匯率換算",
             font=("Arial", 13),
             foreground="#7f8c8d",
             justify=tk.LEFT
         )
-        help_text.grid(row=5, column=0, columnspan=2, pady=(15, 0))
+        help_text.grid(row=6, column=0, columnspan=2, pady=(15, 0))
         
         # 配置右側框架權重
         right_frame.columnconfigure(1, weight=1)
-        right_frame.rowconfigure(4, weight=1)  # 讓結果顯示區能夠擴展
+        right_frame.rowconfigure(5, weight=1)  # 讓結果顯示區能夠擴展
         
         # ===== 配置主容器權重 =====
         main_container.columnconfigure(0, weight=2)  # 左側較寬
@@ -274,63 +227,65 @@ class ExchangeRateApp(tk.Tk):
         main_container.rowconfigure(1, weight=1)
     
     def _load_initial_data(self):
-        """載入初始資料"""
-        self._fetch_data_thread()
+        """載入初始資料：先顯示快取中的匯率表，過期時於背景更新"""
+        # 背景更新完成時（在背景執行緒中）通知，轉回主執行緒更新 UI
+        rate_cache.subscribe(
+            lambda rows, fetched_at: self.after(0, lambda: self._update_ui_with_data(rows, fetched_at))
+        )
+        
+        rows, fetched_at = rate_cache.get()
+        if rows:
+            self._update_ui_with_data(rows, fetched_at, announce=False)
+        # 沒有快取時 get() 已在背景開始更新；更新可能在這裡檢查前就已失敗（離線、重播沒有紀錄），
+        # 因此一律交給 _watch_refresh 判斷，不依賴 is_refreshing() 當下的狀態
+        if not rows or rate_cache.is_refreshing():
+            self._show_loading()
+            self._watch_refresh()
     
     def _manual_update(self):
-        """手動更新匯率"""
-        if not self.is_loading:
-            self._fetch_data_thread()
+        """手動更新匯率（背景重新驗證，表格與計算器維持可用）"""
+        rate_cache.revalidate()
+        self._show_loading()
+        self._watch_refresh()
     
-    def _fetch_data_thread(self):
-        """在背景執行緒中爬取資料"""
-        if self.is_loading:
+    def _watch_refresh(self):
+        """等待背景更新結束；成功由訂閱回呼更新畫面，這裡只處理失敗"""
+        if rate_cache.is_refreshing():
+            self.after(200, self._watch_refresh)
             return
         
-        self.is_loading = True
-        self._show_loading()
-        
-        def run_async():
-            """在新的事件迴圈中執行非同步函數"""
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                data = loop.run_until_complete(fetch_exchange_rates())
-                # 使用 after 確保在主執行緒中更新 UI
-                self.after(0, lambda: self._update_ui_with_data(data))
-            except Exception as e:
-                self.after(0, lambda: self._show_error(f"爬蟲失敗: {str(e)}"))
-            finally:
-                loop.close()
-                self.is_loading = False
-        
-        # 啟動背景執行緒
-        thread = Thread(target=run_async, daemon=True)
-        thread.start()
+        if rate_cache.last_error:
+            if self.exchange_data:
+                self._hide_loading()
+                self.status_label.config(text="⚠️ 更新失敗，顯示快取資料", foreground="#e67e22")
+            else:
+                self._show_error("無法取得匯率資料，請檢查網路連線或稍後再試")
     
     def _show_loading(self):
-        """顯示載入狀態"""
-        self.status_label.config(text="⏳ 載入中...", foreground="#3498db")
+        """顯示背景更新狀態（不鎖定畫面）"""
+        self.status_label.config(text="⏳ 背景更新中...", foreground="#3498db")
         self.update_btn.config(state="disabled")
-        self.config(cursor="watch")
     
     def _hide_loading(self):
         """隱藏載入狀態"""
         self.status_label.config(text="")
         self.update_btn.config(state="normal")
-        self.config(cursor="")
     
-    def _update_ui_with_data(self, data: Optional[List[Dict[str, str]]]):
-        """更新 UI 資料"""
-        self._hide_loading()
-        
-        if data is None or len(data) == 0:
-            messagebox.showerror("錯誤", "無法取得匯率資料，請檢查網路連線或稍後再試")
-            return
+    def _update_ui_with_data(self, data: List[Dict], fetched_at: datetime, announce: bool = True):
+        """
+        更新 UI 資料
+        
+        Args:
+            data: 匯率列表
+            fetched_at: 匯率取得時間
+            announce: 是否顯示「更新成功」（顯示啟動時的快取資料時為 False）
+        """
+        if announce:
+            self._hide_loading()
         
         # 儲存資料
         self.exchange_data = data
-        self.last_update = datetime.now()
+        self.last_update = fetched_at
         
         # 更新表格
         self._update_treeview()
@@ -344,8 +299,9 @@ class ExchangeRateApp(tk.Tk):
         )
         
         # 顯示成功訊息
-        self.status_label.config(text="✅ 更新成功", foreground="#27ae60")
-        self.after(3000, lambda: self.status_label.config(text=""))
+        if announce:
+            self.status_label.config(text="✅ 更新成功", foreground="#27ae60")
+            self.after(3000, lambda: self.status_label.config(text=""))
     
     def _update_treeview(self):
         """更新 Treeview 資料"""
@@ -353,92 +309,82 @@ class ExchangeRateApp(tk.Tk):
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        # 插入新資料
+        # 插入新資料（未掛牌顯示為暫停交易）
         for item in self.exchange_data:
-            currency = item.get("幣別", "N/A")
-            buy = item.get("本行即期買入", "").strip()
-            sell = item.get("本行即期賣出", "").strip()
+            values = [item.get("幣別", "N/A")]
+            for column in ("本行現金買入", "本行現金賣出", "本行即期買入", "本行即期賣出"):
+                rate = item.get(column)
+                values.append(f"{rate:g}" if rate is not None else "暫停交易")
             
-            # 空值處理
-            buy_display = buy if buy else "暫停交易"
-            sell_display = sell if sell else "暫停交易"
-            
-            self.tree.insert("", "end", values=(currency, buy_display, sell_display))
+            self.tree.insert("", "end", values=values)
     
     def _update_currency_combo(self):
-        """更新貨幣下拉選單（過濾無法交易的貨幣）"""
-        available_currencies = []
-        
-        for item in self.exchange_data:
-            currency = item.get("幣別", "")
-            buy = item.get("本行即期買入", "").strip()
-            sell = item.get("本行即期賣出", "").strip()
-            
-            # 只加入可交易的貨幣（買入和賣出都有值）
-            if currency and buy and sell:
-                available_currencies.append(currency)
-        
-        self.currency_combo['values'] = available_currencies
-        
-        # 如果有可用貨幣，設定預設選擇
-        if available_currencies:
-            self.currency_combo.current(0)
+        """重建交叉匯率矩陣並更新貨幣下拉選單（過濾無法交易的貨幣）"""
+        self.rate_matrix = CrossRateMatrix.from_rows(self.exchange_data)
+        
+        # 只加入可交易的貨幣（買入和賣出都有值），新台幣排在第一個
+        codes = self.rate_matrix.tradable()
+        self.currency_codes = {self.rate_matrix.label(code): code for code in codes}
+        labels = list(self.currency_codes)
+        
+        previous_source = self.source_combo.get()
+        previous_target = self.currency_combo.get()
+        self.source_combo['values'] = labels
+        self.currency_combo['values'] = labels
+        
+        # 保留原本的選擇，否則預設為「新台幣 → 第一個外幣」
+        self.source_combo.set(previous_source if previous_source in self.currency_codes else labels[0])
+        if previous_target in self.currency_codes:
+            self.currency_combo.set(previous_target)
+        elif len(labels) > 1:
+            self.currency_combo.set(labels[1])
     
     def _calculate_conversion(self):
-        """計算台幣轉換"""
+        """以交叉匯率矩陣計算任意兩種貨幣的轉換"""
         try:
             # 取得輸入
-            twd_text = self.twd_entry.get().strip()
-            if not twd_text:
-                messagebox.showwarning("警告", "請輸入台幣金額")
+            amount_text = self.amount_entry.get().strip()
+            if not amount_text:
+                messagebox.showwarning("警告", "請輸入金額")
                 return
             
-            twd_amount = float(twd_text)
-            if twd_amount <= 0:
+            amount = float(amount_text)
+            if amount <= 0:
                 messagebox.showwarning("警告", "金額必須大於 0")
                 return
             
-            selected_currency = self.currency_combo.get()
-            if not selected_currency:
-                messagebox.showwarning("警告", "請選擇目標貨幣")
-                return
-            
-            # 查找匯率
-            rate_data = self._find_rate_by_currency(selected_currency)
-            if not rate_data:
-                messagebox.showerror("錯誤", "找不到該貨幣的匯率")
+            source_label = self.source_combo.get()
+            target_label = self.currency_combo.get()
+            if not source_label or not target_label:
+                messagebox.showwarning("警告", "請選擇來源與目標貨幣")
                 return
             
-            buy_rate_str = rate_data["本行即期買入"]
-            sell_rate_str = rate_data["本行即期賣出"]
-            
-            if not buy_rate_str or not sell_rate_str:
-                messagebox.showerror("錯誤", "該貨幣暫停交易")
+            if self.rate_matrix is None:
+                messagebox.showerror("錯誤", "尚未取得匯率資料")
                 return
             
-            buy_rate = float(buy_rate_str)
-            sell_rate = float(sell_rate_str)
+            source = self.currency_codes[source_label]
+            target = self.currency_codes[target_label]
             
-            # 計算轉換
-            # 買入：使用者賣台幣給銀行，用買入匯率
-            buy_result = twd_amount / buy_rate
-            # 賣出：使用者向銀行買外幣，用賣出匯率
-            sell_result = twd_amount / sell_rate
+            # 查表計算：銀行以本行買入收下來源貨幣、以本行賣出付出目標貨幣
+            rate = self.rate_matrix.rate(source, target)
+            result = amount * rate
+            source_quote = self.rate_matrix.quote(source, '買入')
+            target_quote = self.rate_matrix.quote(target, '賣出')
             
             # 顯示結果
             result_text = f"""
 ═══════════════════════════
-💰 轉換金額: {twd_amount:,.2f} 台幣
-🌍 目標貨幣: {selected_currency}
+💰 轉換金額: {amount:,.2f} {source}
+🌍 目標貨幣: {target_label}
 ═══════════════════════════
 
-📤 您賣台幣給銀行 (買入匯率)
-   匯率: {buy_rate}
-   可得: {buy_result:.2f} 外幣
+💱 兌換匯率
+   1 {source} = {rate:.6g} {target}
+   可得: {result:,.2f} {target}
 
-📥 您向銀行買外幣 (賣出匯率)
-   匯率: {sell_rate}
-   需付: {sell_result:.2f} 外幣
+📤 {source} 本行買入: {source_quote:.6g} TWD
+📥 {target} 本行賣出: {target_quote:.6g} TWD
 
 ═══════════════════════════
 計算時間: {datetime.now().strftime('%H:%M:%S')}
@@ -454,12 +400,101 @@ class ExchangeRateApp(tk.Tk):
         except Exception as e:
             messagebox.showerror("錯誤", f"計算失敗: {str(e)}")
     
-    def _find_rate_by_currency(self, currency: str) -> Optional[Dict[str, str]]:
-        """根據幣別查找匯率資料"""
-        for item in self.exchange_data:
-            if item.get("幣別") == currency:
-                return item
-        return None
+    # ===== 歷史走勢 =====
+    
+    def _open_history_window(self):
+        """開啟歷史走勢視窗（資料來自本地時間序列，不重新抓取）"""
+        window = tk.Toplevel(self)
+        window.title("📈 匯率歷史走勢")
+        window.geometry("900x560")
+        
+        controls = ttk.Frame(window, padding="10")
+        controls.pack(side=tk.TOP, fill=tk.X)
+        
+        codes = sorted({item["代碼"] for item in self.exchange_data}) or ["USD"]
+        code_combo = ttk.Combobox(controls, values=codes, width=8, state="readonly", font=("Arial", 14))
+        code_combo.set("USD" if "USD" in codes else codes[0])
+        side_combo = ttk.Combobox(controls, values=RATE_COLUMNS, width=12, state="readonly", font=("Arial", 14))
+        side_combo.set("本行即期賣出")
+        range_options = {"7 天": 7, "30 天": 30, "90 天": 90, "1 年": 365, "全部": None}
+        range_combo = ttk.Combobox(controls, values=list(range_options), width=6, state="readonly", font=("Arial", 14))
+        range_combo.set("90 天")
+        
+        for label, widget in (("幣別:", code_combo), ("買賣別:", side_combo), ("區間:", range_combo)):
+            ttk.Label(controls, text=label, font=("Arial", 14)).pack(side=tk.LEFT, padx=(10, 4))
+            widget.pack(side=tk.LEFT)
+        
+        stats_label = ttk.Label(window, text="", font=("Arial", 13), foreground="#34495e", padding=(10, 0))
+        stats_label.pack(side=tk.TOP, fill=tk.X)
+        
+        canvas = tk.Canvas(window, bg="white", highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def redraw(*_):
+            days = range_options[range_combo.get()]
+            start = datetime.now() - timedelta(days=days) if days else None
+            self._draw_history_chart(canvas, stats_label, code_combo.get(), side_combo.get(), start)
+        
+        for widget in (code_combo, side_combo, range_combo):
+            widget.bind("<<ComboboxSelected>>", redraw)
+        canvas.bind("<Configure>", redraw)
+    
+    def _draw_history_chart(self, canvas: tk.Canvas, stats_label: ttk.Label,
+                            code: str, side: str, start: Optional[datetime]):
+        """在 Canvas 上繪製折線圖（點數超過畫布寬度時先重取樣）"""
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width < 100 or height < 100:
+            return
+        
+        times, values = rate_history.query(code, side, start=start)
+        if len(values) == 0:
+            stats_label.config(text="尚無歷史資料（每次更新匯率都會自動記錄）")
+            return
+        
+        # 每個像素最多一個點
+        plot_width = width - 100
+        if len(values) > plot_width:
+            span = (times[-1] - times[0]).astype(int) or 1
+            period = timedelta(seconds=max(60, int(span / plot_width)))
+            times, values = rate_history.resample(code, side, period, 'mean', start=start)
+        
+        summary = rate_history.stats(code, side, start=start)
+        stats_label.config(
+            text=f"{code} {side}　筆數 {summary['count']:,}　最低 {summary['min']:.6g}　"
+                 f"最高 {summary['max']:.6g}　平均 {summary['mean']:.6g}　最新 {summary['last']:.6g}"
+        )
+        
+        left, right, top, bottom = 80, width - 20, 20, height - 40
+        seconds = times.astype(int)
+        t0, t1 = seconds[0], max(seconds[-1], seconds[0] + 1)
+        v0, v1 = float(values.min()), float(values.max())
+        if v1 - v0 < 1e-9:
+            # 只有一個值時上下各留 0.5% 空間
+            pad = abs(v0) * 0.005 or 1.0
+            v0, v1 = v0 - pad, v1 + pad
+        
+        xs = left + (seconds - t0) / (t1 - t0) * (right - left)
+        ys = bottom - (values - v0) / (v1 - v0) * (bottom - top)
+        
+        # 座標軸與刻度
+        canvas.create_line(left, top, left, bottom, right, bottom, fill="#7f8c8d")
+        for i in range(5):
+            value = v0 + (v1 - v0) * i / 4
+            y = bottom - (bottom - top) * i / 4
+            canvas.create_line(left - 4, y, right, y, fill="#ecf0f1")
+            canvas.create_text(left - 8, y, text=f"{value:.4g}", anchor=tk.E, font=("Arial", 10))
+        for t, anchor in ((t0, tk.NW), (t1, tk.NE)):
+            x = left if anchor == tk.NW else right
+            # 與重取樣的日界相同，以台北時間顯示
+            label = datetime.fromtimestamp(int(t), timezone(TAIPEI_OFFSET)).strftime('%Y-%m-%d %H:%M')
+            canvas.create_text(x, bottom + 8, text=label, anchor=anchor, font=("Arial", 10))
+        
+        if len(xs) == 1:
+            canvas.create_oval(xs[0] - 3, ys[0] - 3, xs[0] + 3, ys[0] + 3, fill="#3498db", outline="")
+        else:
+            points = np.column_stack((xs, ys)).ravel().tolist()
+            canvas.create_line(*points, fill="#3498db", width=2)
     
     def _show_error(self, message: str):
         """顯示錯誤訊息"""
@@ -0,0 +1,227 @@
+"""
+牌告匯率共用快取（stale-while-revalidate）
+
+lession8/main.py（tkinter）與 lession7_1/main.py（Streamlit）共用同一份磁碟快取：
+- 讀取時立即回傳最後一次取得的匯率表，不等待網路
+- 資料超過 max_age 時，在背景執行緒重新驗證（同一時間只有一個更新在進行）
+- CSV 的 ETag / Last-Modified 一起保存，重新啟動後仍能以 304 確認匯率沒變
+- 寫檔使用暫存檔 + os.replace，另一個程式讀到的永遠是完整檔案
+- 更新在程序共用的常駐事件迴圈上執行（需要 crawl4ai 備援時瀏覽器保持開啟）
+- start_auto_refresh() 在資料過期前主動更新，讀取端永遠不必等待
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bot_csv import CsvRateSource, fetch_typed_rates
+from warm_crawler import LoopRunner, shared_runner
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exchange_rates_cache.json')
+
+
+class RateCache:
+    """持久化於磁碟、過期時於背景更新的匯率快取"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_age: timedelta = timedelta(minutes=10),
+        source: Optional[CsvRateSource] = None,
+        runner: LoopRunner = shared_runner
+    ):
+        """
+        初始化快取（立即載入磁碟上的資料）
+
+        Args:
+            path: 快取檔路徑（兩個程式預設使用同一個檔案）
+            max_age: 超過此時間視為過期，讀取時觸發背景更新
+            source: CSV 匯率來源
+            runner: 執行更新協程的常駐事件迴圈
+        """
+        self.path = path
+        self.max_age = max_age
+        self.source = source or CsvRateSource()
+        self.runner = runner
+
+        self.rows: Optional[List[Dict]] = None
+        self.fetched_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._file_mtime: Optional[float] = None
+        self._listeners: List[Callable[[List[Dict], datetime], None]] = []
+        self._auto_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._load()
+
+    # ==================== 磁碟存取 ====================
+
+    def _load(self):
+        """檔案比記憶體中的新時（例如另一個程式剛更新過）重新載入"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._file_mtime:
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            fetched_at = datetime.fromisoformat(data['fetched_at'])
+            rows = data['rows']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"匯率快取讀取失敗，將重新下載: {e}")
+            return
+
+        with self._lock:
+            self._file_mtime = mtime
+            if self.fetched_at is not None and fetched_at <= self.fetched_at:
+                return
+            self.rows = rows
+            self.fetched_at = fetched_at
+            self.source.rows = rows
+            self.source.etag = data.get('etag')
+            self.source.last_modified = data.get('last_modified')
+
+    def _save(self):
+        """以暫存檔 + os.replace 原子寫入"""
+        with self._lock:
+            data = {
+                'fetched_at': self.fetched_at.isoformat(),
+                'etag': self.source.etag,
+                'last_modified': self.source.last_modified,
+                'rows': self.rows,
+            }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._file_mtime = os.path.getmtime(self.path)
+
+    # ==================== 讀取 ====================
+
+    def is_stale(self, now: Optional[datetime] = None) -> bool:
+        """是否沒有資料或已超過 max_age"""
+        now = now or datetime.now()
+        return self.fetched_at is None or now - self.fetched_at >= self.max_age
+
+    def is_refreshing(self) -> bool:
+        """背景更新是否正在進行"""
+        thread = self._refresh_thread
+        return thread is not None and thread.is_alive()
+
+    def get(self) -> Tuple[Optional[List[Dict]], Optional[datetime]]:
+        """
+        立即取得最後一次的匯率表（stale-while-revalidate）
+
+        過期時啟動背景更新，但仍先回傳舊資料。
+
+        Returns:
+            (匯率列表, 取得時間)；從未取得過時為 (None, None)
+        """
+        self._load()
+        if self.is_stale():
+            self.revalidate()
+        with self._lock:
+            return self.rows, self.fetched_at
+
+    # ==================== 更新 ====================
+
+    def subscribe(self, callback: Callable[[List[Dict], datetime], None]):
+        """
+        註冊更新完成時的回呼
+
+        回呼在背景執行緒中呼叫，GUI 需自行轉回主執行緒（例如 tkinter 的 after）。
+        """
+        self._listeners.append(callback)
+
+    def revalidate(self) -> threading.Thread:
+        """
+        在背景重新驗證（已有更新進行中時直接沿用）
+
+        Returns:
+            執行更新的執行緒（需要等待結果時可 join）
+        """
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return self._refresh_thread
+            self._refresh_thread = threading.Thread(target=self._refresh, daemon=True)
+            self._refresh_thread.start()
+            return self._refresh_thread
+
+    def refresh(self) -> Optional[List[Dict]]:
+        """同步更新（只在完全沒有資料時使用）"""
+        self.revalidate().join()
+        return self.rows
+
+    def _refresh(self):
+        """背景執行緒：下載（CSV 條件式下載，失敗時改用 HTML）並寫回磁碟"""
+        try:
+            rows = self.runner.run(fetch_typed_rates(self.source))
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"匯率更新失敗: {e}")
+            return
+        if not rows:
+            self.last_error = "沒有取得任何匯率資料"
+            return
+
+        fetched_at = datetime.now()
+        with self._lock:
+            self.rows = rows
+            self.fetched_at = fetched_at
+            self.last_error = None
+        try:
+            self._save()
+        except OSError as e:
+            print(f"匯率快取寫入失敗: {e}")
+
+        for callback in list(self._listeners):
+            try:
+                callback(rows, fetched_at)
+            except Exception as e:
+                print(f"匯率更新回呼錯誤: {e}")
+
+    # ==================== 提前更新 ====================
+
+    def start_auto_refresh(self, lead: timedelta = timedelta(minutes=1), retry: float = 30.0):
+        """
+        啟動背景執行緒，在資料過期前 lead 時間主動更新（重複呼叫無作用）
+
+        Args:
+            lead: 提前多久更新
+            retry: 更新失敗後多久重試（秒）
+        """
+        with self._lock:
+            if self._auto_thread is not None and self._auto_thread.is_alive():
+                return
+            self._stop.clear()
+            self._auto_thread = threading.Thread(
+                target=self._auto_refresh, args=(lead, retry), name='rate-auto-refresh', daemon=True
+            )
+            self._auto_thread.start()
+
+    def stop_auto_refresh(self):
+        """停止提前更新"""
+        self._stop.set()
+
+    def _auto_refresh(self, lead: timedelta, retry: float):
+        """背景執行緒：睡到「過期前 lead」再更新"""
+        wait = 0.0
+        while not self._stop.wait(wait):
+            self._load()
+            if self.fetched_at is None or datetime.now() >= self.fetched_at + self.max_age - lead:
+                before = self.fetched_at
+                self.revalidate().join()
+                if self.fetched_at == before:
+                    wait = retry
+                    continue
+            due = self.fetched_at + self.max_age - lead
+            wait = max(1.0, (due - datetime.now()).total_seconds())
@@ -0,0 +1,329 @@
+"""
+牌告匯率歷史時間序列
+
+每次取得的匯率表都附加為一列：時間戳記索引 + 每個「幣別 × 買賣別」一欄。
+資料以 NumPy 原始二進位格式附加寫入（只寫新的一列，不重寫整個檔案），
+讀取時以 memmap 對應，區間查詢用 searchsorted 在排序好的時間戳記上二分搜尋，
+重取樣與 min / max / mean 都是向量化運算，數年的盤中快照也能在毫秒內回應。
+
+檔案結構（directory 底下）:
+    columns.json     欄位名稱（"USD/本行即期賣出"…）
+    timestamps.i8    int64 epoch 秒，每列一個
+    values.f4        float32，每列 len(columns) 個，未掛牌為 NaN
+    append.lock      附加寫入時的檔案鎖（tkinter 與 Streamlit 兩個程序會寫入同一份資料）
+
+時間戳記為 UTC；依日期分組（重取樣）時以台北時間對齊，與主機的時區設定無關。
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bot_csv import CURRENCY_NAMES, RATE_COLUMNS
+
+try:
+    import fcntl  # 只有 Linux / macOS 有
+except ImportError:
+    fcntl = None
+
+
+# 台北時間與 UTC 的時差（台灣不實施日光節約時間，固定 +8）
+TAIPEI_OFFSET = timedelta(hours=8)
+
+DEFAULT_HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rate_history')
+
+# 預設欄位：所有幣別 × 現金 / 即期買入、賣出
+DEFAULT_COLUMNS = [f"{code}/{side}" for code in CURRENCY_NAMES for side in RATE_COLUMNS]
+
+
+class RateHistory:
+    """附加寫入、memmap 讀取的匯率時間序列"""
+
+    def __init__(self, directory: str = DEFAULT_HISTORY_DIR):
+        """
+        初始化（目錄不存在時建立）
+
+        Args:
+            directory: 資料目錄
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        columns_path = os.path.join(directory, 'columns.json')
+        if os.path.exists(columns_path):
+            with open(columns_path, 'r', encoding='utf-8') as f:
+                self.columns: List[str] = json.load(f)
+        else:
+            self.columns = list(DEFAULT_COLUMNS)
+            with open(columns_path, 'w', encoding='utf-8') as f:
+                json.dump(self.columns, f, ensure_ascii=False, indent=2)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+        self._timestamps_path = os.path.join(directory, 'timestamps.i8')
+        self._values_path = os.path.join(directory, 'values.f4')
+        self._lock_path = os.path.join(directory, 'append.lock')
+        self._lock = threading.Lock()
+        self._cache_key: Optional[Tuple[int, int]] = None
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._values = np.empty((0, len(self.columns)), dtype=np.float32)
+
+    # ==================== 寫入 ====================
+
+    def append(self, rows: List[Dict], fetched_at: datetime):
+        """
+        附加一次匯率表快照
+
+        時間戳記不晚於最後一列時略過，確保索引維持遞增。
+
+        Args:
+            rows: 匯率列表（bot_csv.parse_rate_csv 格式）
+            fetched_at: 取得時間
+        """
+        record = np.full(len(self.columns), np.nan, dtype=np.float32)
+        for row in rows:
+            code = row.get("代碼")
+            for side in RATE_COLUMNS:
+                index = self._index.get(f"{code}/{side}")
+                value = row.get(side)
+                if index is not None and value is not None:
+                    record[index] = value
+
+        timestamp = int(fetched_at.timestamp())
+        with self._lock, open(self._lock_path, 'a') as lock_file:
+            # 執行緒鎖之外再加檔案鎖：檢查最後時間戳記與附加寫入必須是同一個不可分割的步驟
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                count = self._repair()
+                timestamps, _ = self._load()
+                if count and timestamp <= timestamps[-1]:
+                    return
+                with open(self._values_path, 'ab') as f:
+                    f.write(record.tobytes())
+                with open(self._timestamps_path, 'ab') as f:
+                    f.write(np.int64(timestamp).tobytes())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _repair(self) -> int:
+        """
+        把兩個檔案截斷為相同的完整列數（在檔案鎖內呼叫）
+
+        讀取時依位置對應時間戳記與數值列，上次寫入若在兩個檔案之間中斷，
+        多出的數值列（或寫了一半的列）會讓之後每一列都對錯時間戳記，
+        因此附加前先把多出的部分截掉。
+
+        Returns:
+            完整的列數
+        """
+        width = len(self.columns)
+        sizes = []
+        for path in (self._timestamps_path, self._values_path):
+            try:
+                sizes.append(os.path.getsize(path))
+            except OSError:
+                sizes.append(0)
+        count = min(sizes[0] // 8, sizes[1] // (4 * width))
+        for path, size, expected in ((self._timestamps_path, sizes[0], count * 8),
+                                     (self._values_path, sizes[1], count * 4 * width)):
+            if size > expected:
+                os.truncate(path, expected)
+        return count
+
+    # ==================== 讀取 ====================
+
+    def _load(self) -> Tuple[np.ndarray, np.ndarray]:
+        """以 memmap 對應檔案（檔案大小沒變時沿用上次的對應）"""
+        try:
+            key = (os.path.getsize(self._timestamps_path), os.path.getsize(self._values_path))
+        except OSError:
+            return self._timestamps, self._values
+        if key == self._cache_key:
+            return self._timestamps, self._values
+
+        width = len(self.columns)
+        count = min(key[0] // 8, key[1] // (4 * width))
+        if count == 0:
+            timestamps = np.empty(0, dtype=np.int64)
+            values = np.empty((0, width), dtype=np.float32)
+        else:
+            timestamps = np.memmap(self._timestamps_path, dtype=np.int64, mode='r', shape=(count,))
+            values = np.memmap(self._values_path, dtype=np.float32, mode='r', shape=(count, width))
+
+        self._cache_key = key
+        self._timestamps = timestamps
+        self._values = values
+        return timestamps, values
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load()[0])
+
+    def _column(self, code: str, side: str) -> int:
+        """欄位索引"""
+        name = f"{code}/{side}"
+        if name not in self._index:
+            raise KeyError(f"沒有這個欄位: {name}")
+        return self._index[name]
+
+    def _range(self, start: Optional[datetime], end: Optional[datetime]) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """以二分搜尋找出 [start, end] 的列範圍"""
+        with self._lock:
+            timestamps, values = self._load()
+        lo = 0 if start is None else int(np.searchsorted(timestamps, int(start.timestamp()), side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, int(end.timestamp()), side='right'))
+        return timestamps, values, lo, hi
+
+    def query(
+        self,
+        code: str,
+        side: str = '本行即期賣出',
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        區間查詢單一欄位
+
+        Args:
+            code: 幣別代碼，例如 'USD'
+            side: 買賣別（RATE_COLUMNS 之一）
+            start: 起始時間（含），None 表示從頭
+            end: 結束時間（含），None 表示到最後
+
+        Returns:
+            (時間戳記 datetime64[s] 陣列, 匯率 float 陣列)；未掛牌的快照會被排除
+        """
+        column = self._column(code, side)
+        timestamps, values, lo, hi = self._range(start, end)
+        series = np.asarray(values[lo:hi, column], dtype=np.float64)
+        times = np.asarray(timestamps[lo:hi])
+        mask = ~np.isnan(series)
+        return times[mask].astype('datetime64[s]'), series[mask]
+
+    def last(self, code: str, side: str = '本行即期賣出', days: float = 90) -> Tuple[np.ndarray, np.ndarray]:
+        """最近 N 天的序列，例如 last('USD', '本行即期賣出', 90)"""
+        return self.query(code, side, start=datetime.now() - timedelta(days=days))
+
+    def resample(
+        self,
+        code: str,
+        side: str = '本行即期賣出',
+        period: timedelta = timedelta(days=1),
+        how: str = 'mean',
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        utc_offset: timedelta = TAIPEI_OFFSET
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        依固定週期重取樣（沒有資料的週期不輸出）
+
+        Args:
+            period: 週期長度（依 utc_offset 的時區對齊，例如每日以台北時間午夜為界）
+            how: 'mean'、'min'、'max'、'first' 或 'last'
+            utc_offset: 對齊週期邊界的時區與 UTC 的時差（預設為台北時間）
+
+        Returns:
+            (週期起點 datetime64[s] 陣列, 聚合後的匯率陣列)
+        """
+        times, series = self.query(code, side, start, end)
+        if len(series) == 0:
+            return times, series
+
+        seconds = int(period.total_seconds())
+        # 以指定時區（預設台北）對齊週期邊界，不使用主機的時區設定
+        offset = int(utc_offset.total_seconds())
+        epoch = times.astype(np.int64)
+        buckets = (epoch + offset) // seconds
+        # 時間戳記已排序，因此每個週期是一段連續區間
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(series)]
+
+        if how == 'mean':
+            result = np.add.reduceat(series, starts) / (ends - starts)
+        elif how == 'min':
+            result = np.minimum.reduceat(series, starts)
+        elif how == 'max':
+            result = np.maximum.reduceat(series, starts)
+        elif how == 'first':
+            result = series[starts]
+        elif how == 'last':
+            result = series[ends - 1]
+        else:
+            raise ValueError(f"不支援的聚合方式: {how}")
+
+        bucket_times = (buckets[starts] * seconds - offset).astype('datetime64[s]')
+        return bucket_times, result
+
+    def stats(
+        self,
+        code: str,
+        side: str = '本行即期賣出',
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[str, float]:
+        """
+        區間統計
+
+        Returns:
+            {'count', 'min', 'max', 'mean', 'first', 'last'}；沒有資料時 count 為 0，其餘為 NaN
+        """
+        _, series = self.query(code, side, start, end)
+        if len(series) == 0:
+            nan = float('nan')
+            return {'count': 0, 'min': nan, 'max': nan, 'mean': nan, 'first': nan, 'last': nan}
+        return {
+            'count': int(len(series)),
+            'min': float(series.min()),
+            'max': float(series.max()),
+            'mean': float(series.mean()),
+            'first': float(series[0]),
+            'last': float(series[-1]),
+        }
+
+
+if __name__ == "__main__":
+    # 以模擬資料示範：3 年、每 10 分鐘一次的快照
+    import tempfile
+    import time
+
+    from bot_csv import parse_rate_csv
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(here, 'bot_rates_sample.csv'), 'rb') as f:
+        sample_rows = parse_rate_csv(f.read())
+
+    history = RateHistory(tempfile.mkdtemp())
+    count = 3 * 365 * 24 * 6
+    begin = datetime.now() - timedelta(minutes=10 * count)
+
+    # 直接寫入大量資料（實際使用時每次取得匯率呼叫一次 append）
+    base = np.full(len(history.columns), np.nan, dtype=np.float32)
+    for row in sample_rows:
+        for side in RATE_COLUMNS:
+            if row[side] is not None:
+                base[history._column(row['代碼'], side)] = row[side]
+    rng = np.random.default_rng(0)
+    drift = np.cumsum(rng.normal(0, 0.0005, size=(count, 1)), axis=0).astype(np.float32)
+    with open(history._values_path, 'wb') as f:
+        f.write((base * (1 + drift)).astype(np.float32).tobytes())
+    with open(history._timestamps_path, 'wb') as f:
+        f.write((int(begin.timestamp()) + np.arange(count, dtype=np.int64) * 600).tobytes())
+    history.append(sample_rows, datetime.now())
+    print(f"快照數: {len(history):,}")
+
+    start = time.perf_counter()
+    times, series = history.last('USD', '本行即期賣出', days=90)
+    print(f"USD 即期賣出近 90 天: {len(series):,} 筆  ({(time.perf_counter() - start) * 1000:.2f} ms)")
+
+    start = time.perf_counter()
+    days, daily = history.resample('USD', '本行即期賣出', timedelta(days=1), 'mean')
+    print(f"日平均重取樣: {len(daily):,} 天  ({(time.perf_counter() - start) * 1000:.2f} ms)")
+
+    start = time.perf_counter()
+    summary = history.stats('USD', '本行即期賣出', start=datetime.now() - timedelta(days=365))
+    print(f"近一年統計: {summary}  ({(time.perf_counter() - start) * 1000:.2f} ms)")
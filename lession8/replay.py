@@ -0,0 +1,337 @@
+"""
+離線錄製 / 重播（crawl4ai、Playwright、urllib 共用）
+
+各爬蟲都直接連線到 wantgoo、rate.bot.com.tw、thsrc.com.tw 等網站，
+測試與效能比較既慢、結果又每次不同。這裡提供一個全域開關：
+- record：照常連線，並把每個回應（狀態碼、標頭、內容）存到回應封存資料夾
+- replay：完全不連線，以請求攔截（route）從封存回應；沒有紀錄的請求直接中斷
+- 未設定：不做任何事（與原本的行為完全相同）
+
+以環境變數切換，不需要修改呼叫端的參數：
+    CRAWL_REPLAY=record python main.py       # 錄製
+    CRAWL_REPLAY=replay python main.py       # 離線重播
+    CRAWL_ARCHIVE=/tmp/archive               # 封存資料夾（預設為專案根目錄的 crawl_archive/）
+
+接上的位置:
+    urlopen(request, timeout)       取代 urllib.request.urlopen
+    await attach(context)           Playwright BrowserContext（建立後、註冊其他 route 之前呼叫）
+    install_crawl4ai(crawler)       AsyncWebCrawler（以 on_page_context_created hook 接上 attach）
+
+其他 route（例如擋掉圖片）要以 route.fallback() 交給下一個 handler，
+不能用 route.continue_()，否則請求會直接送到網路而不經過封存。
+
+比對鍵包含 If-None-Match / If-Modified-Since（其他標頭不影響比對），
+條件式 GET 會重播當時錄到的 304，而不是同一網址第一次的 200；
+urllib 的 304 / 4xx / 5xx 也會錄下，重播時同樣拋出 HTTPError。
+"""
+
+import base64
+import hashlib
+import http.client
+import io
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import urllib.response
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+MODES = ('record', 'replay')
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crawl_archive')
+
+# 防快取用的查詢參數，比對時忽略（否則每次請求的網址都不同）
+IGNORED_PARAMS = {'_', '_t', 'ts', 'timestamp', 'nocache'}
+
+# 會改變回應的請求標頭（條件式 GET），列入比對鍵
+CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+
+# 封存的內容已經解壓縮，重播時不能再帶這些標頭
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+# ==================== 回應封存 ====================
+
+def request_key(method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    請求的比對鍵：方法 + 網址（查詢參數排序、去掉防快取參數）+ 條件式標頭 + POST 內容
+
+    Args:
+        headers: 請求標頭（只取 CONDITIONAL_HEADERS；沒有這些標頭時與舊的封存相同）
+
+    Returns:
+        16 字元的雜湊
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_PARAMS)
+    normalized = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+    digest = hashlib.sha1(f"{method.upper()} {normalized}\n".encode('utf-8'))
+    conditions = {k.lower(): v for k, v in (headers or {}).items() if k.lower() in CONDITIONAL_HEADERS}
+    for name in CONDITIONAL_HEADERS:
+        if name in conditions:
+            digest.update(f"{name}: {conditions[name]}\n".encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()[:16]
+
+
+class ResponseArchive:
+    """以請求鍵存放回應的資料夾（每個網站一個子資料夾，每個回應一個 JSON 檔）"""
+
+    def __init__(self, directory: str = DEFAULT_ARCHIVE_DIR):
+        self.directory = os.path.abspath(directory)
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url: str, key: str) -> str:
+        host = urlsplit(url).netloc.lower().replace(':', '_') or 'local'
+        return os.path.join(self.directory, host, key + '.json')
+
+    def get(self, method: str, url: str, body: Optional[bytes] = None,
+            request_headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        取出封存的回應
+
+        Returns:
+            {'url', 'method', 'status', 'headers', 'body'(bytes)}，沒有紀錄時為 None
+        """
+        path = self._path(url, request_key(method, url, body, request_headers))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            print(f"replay: 沒有紀錄 {method} {url}")
+            return None
+        entry['body'] = base64.b64decode(entry['body'])
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, method: str, url: str, body: Optional[bytes], status: int,
+            headers: Dict[str, str], content: bytes, request_headers: Optional[Dict[str, str]] = None):
+        """存入一個回應（暫存檔 + os.replace，並行錄製時不會讀到寫一半的檔案）"""
+        path = self._path(url, request_key(method, url, body, request_headers))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'url': url,
+            'method': method.upper(),
+            'status': status,
+            'headers': {k.lower(): v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS},
+            'body': base64.b64encode(content).decode('ascii'),
+        }
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.recorded += 1
+
+    def stats(self) -> str:
+        return f"錄製 {self.recorded}，重播命中 {self.hits}，沒有紀錄 {self.misses}（{self.directory}）"
+
+
+# ==================== 全域開關 ====================
+
+_mode = os.environ.get('CRAWL_REPLAY', '').strip().lower()
+_archive: Optional[ResponseArchive] = None
+
+
+def configure(mode: Optional[str], directory: Optional[str] = None):
+    """
+    以程式設定模式（取代環境變數，例如效能比較腳本中切換）
+
+    Args:
+        mode: 'record'、'replay'，None / '' 表示關閉
+        directory: 封存資料夾（預設為 CRAWL_ARCHIVE 或 crawl_archive/）
+    """
+    global _mode, _archive
+    mode = (mode or '').lower()
+    if mode and mode not in MODES:
+        raise ValueError(f"未知的模式: {mode}（可用: {', '.join(MODES)}）")
+    _mode = mode
+    _archive = ResponseArchive(directory or os.environ.get('CRAWL_ARCHIVE', DEFAULT_ARCHIVE_DIR))
+
+
+def mode() -> str:
+    """目前的模式（'record'、'replay' 或 ''）"""
+    return _mode
+
+
+def archive() -> ResponseArchive:
+    """目前的回應封存（第一次使用時建立）"""
+    global _archive
+    if _archive is None:
+        _archive = ResponseArchive(os.environ.get('CRAWL_ARCHIVE', DEFAULT_ARCHIVE_DIR))
+    return _archive
+
+
+# ==================== urllib ====================
+
+def _response(url: str, status: int, headers: Dict[str, str], content: bytes):
+    """組成與 urllib.request.urlopen 相同介面的回應（read / headers / status / with）"""
+    message = http.client.HTTPMessage()
+    for name, value in headers.items():
+        message[name] = value
+    return urllib.response.addinfourl(io.BytesIO(content), message, url, status)
+
+
+def _http_error(url: str, status: int, headers: Dict[str, str], content: bytes) -> urllib.error.HTTPError:
+    """組成與 urllib 相同的 HTTPError（304 / 4xx / 5xx）"""
+    message = http.client.HTTPMessage()
+    for name, value in headers.items():
+        message[name] = value
+    reason = http.client.responses.get(status, '')
+    return urllib.error.HTTPError(url, status, reason, message, io.BytesIO(content))
+
+
+def urlopen(request, timeout: Optional[float] = None):
+    """
+    依模式錄製 / 重播的 urllib.request.urlopen
+
+    Args:
+        request: urllib.request.Request 或網址
+        timeout: 逾時秒數
+
+    Raises:
+        urllib.error.HTTPError: 錄到的回應為 304 / 4xx / 5xx（與 urllib 相同）
+        urllib.error.URLError: 重播模式中沒有紀錄
+    """
+    if not _mode:
+        return urllib.request.urlopen(request, timeout=timeout)
+
+    if isinstance(request, str):
+        request = urllib.request.Request(request)
+    method, url, body = request.get_method(), request.full_url, request.data
+    request_headers = dict(request.header_items())
+
+    if _mode == 'replay':
+        entry = archive().get(method, url, body, request_headers)
+        if entry is None:
+            raise urllib.error.URLError(f"replay 沒有紀錄: {method} {url}")
+        if not 200 <= entry['status'] < 300:
+            raise _http_error(url, entry['status'], entry['headers'], entry['body'])
+        return _response(url, entry['status'], entry['headers'], entry['body'])
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            content = response.read()
+            headers = dict(response.headers.items())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        content = e.read()
+        headers = dict(e.headers.items())
+        archive().put(method, url, body, e.code, headers, content, request_headers)
+        raise _http_error(url, e.code, headers, content) from None
+    archive().put(method, url, body, status, headers, content, request_headers)
+    return _response(url, status, headers, content)
+
+
+# ==================== Playwright / crawl4ai ====================
+
+async def _route_record(route):
+    request = route.request
+    if not request.url.startswith(('http://', 'https://')):
+        await route.fallback()
+        return
+    try:
+        response = await route.fetch()
+        content = await response.body()
+    except Exception as e:
+        # 連線失敗時要明確中斷，否則頁面會一直等到導覽逾時
+        print(f"record: 請求失敗 {request.method} {request.url}: {e}")
+        await route.abort('failed')
+        return
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+    archive().put(request.method, request.url, request.post_data_buffer, response.status, headers, content,
+                  request.headers)
+    await route.fulfill(status=response.status, headers=headers, body=content)
+
+
+async def _route_replay(route):
+    request = route.request
+    if not request.url.startswith(('http://', 'https://')):
+        await route.fallback()
+        return
+    entry = archive().get(request.method, request.url, request.post_data_buffer, request.headers)
+    if entry is None:
+        await route.abort('internetdisconnected')
+        return
+    await route.fulfill(status=entry['status'], headers=entry['headers'], body=entry['body'])
+
+
+async def attach(context):
+    """
+    在 Playwright BrowserContext 上接上錄製 / 重播（未設定模式時不做任何事）
+
+    同一個 context 重複呼叫只會接上一次。Playwright 中後註冊的 route 先執行，
+    因此要在其他 route 之前呼叫，讓其他 route 以 fallback() 交給這裡。
+    """
+    if not _mode or getattr(context, '_replay_attached', False):
+        return
+    context._replay_attached = True
+    await context.route('**/*', _route_record if _mode == 'record' else _route_replay)
+
+
+def install_crawl4ai(crawler):
+    """
+    在 AsyncWebCrawler 上接上錄製 / 重播
+
+    crawl4ai 建立（或重複使用）context 後會呼叫 on_page_context_created，
+    在這裡呼叫 attach；已經註冊的同名 hook 照常執行。
+    """
+    if not _mode:
+        return
+    strategy = crawler.crawler_strategy
+    previous = strategy.hooks.get('on_page_context_created')
+
+    async def on_page_context_created(page, context=None, **kwargs):
+        await attach(context)
+        if previous is not None:
+            result = previous(page, context=context, **kwargs)
+            if hasattr(result, '__await__'):
+                await result
+        return page
+
+    strategy.set_hook('on_page_context_created', on_page_context_created)
+
+
+if __name__ == "__main__":
+    # 以本機伺服器示範 urllib 路徑：錄製一次，關閉伺服器後重播，內容必須相同
+    import functools
+    import tempfile
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as store:
+        with open(os.path.join(site, 'rates.html'), 'w', encoding='utf-8') as f:
+            f.write('<table title="牌告匯率"><tr><td>USD</td><td>31.5</td></tr></table>')
+
+        class QuietHandler(SimpleHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+        handler = functools.partial(QuietHandler, directory=site)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/rates.html?_=1"
+
+        configure('record', store)
+        with urlopen(url, timeout=5) as response:
+            recorded = response.read()
+        server.shutdown()
+        server.server_close()
+
+        configure('replay', store)
+        with urlopen(url.replace('_=1', '_=2'), timeout=5) as response:
+            replayed = response.read()
+            print(f"重播 {response.status} {response.headers.get('Content-Type')}，內容相同: {replayed == recorded}")
+        try:
+            urlopen(url.replace('rates', 'missing'), timeout=5)
+        except urllib.error.URLError as e:
+            print(f"沒有紀錄的請求: {e.reason}")
+        print(archive().stats())
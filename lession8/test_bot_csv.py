@@ -0,0 +1,146 @@
+"""
+bot_csv 測試（使用本地範例檔，不需網路）
+
+- bot_rates_sample.csv：四個匯率欄位的型別轉換（未掛牌為 None）
+- bot_xrt_sample.html：CSV 與 HTML 快速路徑的結果一致
+- 本機 HTTP 伺服器：第二次下載收到 304，沿用上次的解析結果
+
+執行方式:
+    python -m unittest lession8/test_bot_csv.py
+"""
+
+import functools
+import os
+import sys
+import threading
+import unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bot_csv import RATE_COLUMNS, CsvRateSource, parse_rate_csv, to_rate, typed_rows_from_html
+from bot_rates import parse_rate_table
+
+
+CSV_PATH = os.path.join(HERE, 'bot_rates_sample.csv')
+HTML_PATH = os.path.join(HERE, 'bot_xrt_sample.html')
+
+
+def load_csv_rows():
+    with open(CSV_PATH, 'rb') as f:
+        return parse_rate_csv(f.read())
+
+
+def load_html_rows():
+    with open(HTML_PATH, 'rb') as f:
+        return typed_rows_from_html(parse_rate_table(f.read()))
+
+
+# ==================== 型別轉換 ====================
+
+class CsvParsingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.csv_rows = load_csv_rows()
+
+    def test_to_rate(self):
+        self.assertEqual(to_rate(' 30.37000 '), 30.37)
+        self.assertIsNone(to_rate('0.00000'))
+        self.assertIsNone(to_rate('-'))
+        self.assertIsNone(to_rate(''))
+        self.assertIsNone(to_rate(None))
+
+    def test_rate_columns_are_typed(self):
+        self.assertEqual(len(self.csv_rows), 19)
+        for row in self.csv_rows:
+            for name in RATE_COLUMNS:
+                self.assertTrue(row[name] is None or (isinstance(row[name], float) and row[name] > 0), (name, row))
+
+    def test_csv_values(self):
+        by_code = {row['代碼']: row for row in self.csv_rows}
+        self.assertEqual(by_code['USD'], {
+            '幣別': '美金 (USD)',
+            '代碼': 'USD',
+            '本行現金買入': 30.045,
+            '本行現金賣出': 30.715,
+            '本行即期買入': 30.37,
+            '本行即期賣出': 30.52,
+        })
+        # 現金未掛牌（0.00000）
+        self.assertIsNone(by_code['ZAR']['本行現金買入'])
+        self.assertIsNone(by_code['ZAR']['本行現金賣出'])
+        self.assertEqual(by_code['ZAR']['本行即期買入'], 1.719)
+        # 即期未掛牌
+        self.assertIsNone(by_code['KRW']['本行即期買入'])
+        self.assertIsNone(by_code['KRW']['本行即期賣出'])
+        self.assertEqual(by_code['KRW']['本行現金買入'], 0.01905)
+
+    def test_unknown_header_raises(self):
+        with self.assertRaises(ValueError):
+            parse_rate_csv('幣別,匯率,現金\nUSD,本行買入,30.0\n')
+
+
+# ==================== 與 HTML 比對 ====================
+
+class HtmlComparisonTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.csv_rows = load_csv_rows()
+        cls.html_rows = load_html_rows()
+
+    def test_csv_matches_html(self):
+        self.assertEqual(len(self.csv_rows), len(self.html_rows))
+        for csv_row, html_row in zip(self.csv_rows, self.html_rows):
+            self.assertEqual(csv_row['幣別'], html_row['幣別'])
+            self.assertEqual(csv_row['代碼'], html_row['代碼'])
+            self.assertEqual(csv_row['本行即期買入'], html_row['本行即期買入'])
+            self.assertEqual(csv_row['本行即期賣出'], html_row['本行即期賣出'])
+
+    def test_html_rows_have_no_cash_rates(self):
+        for row in self.html_rows:
+            self.assertIsNone(row['本行現金買入'])
+            self.assertIsNone(row['本行現金賣出'])
+
+
+# ==================== 條件式下載 ====================
+
+class ConditionalFetchTest(unittest.TestCase):
+    """以背景執行緒提供 lession8 資料夾，記錄每個請求的回應狀態碼"""
+
+    def setUp(self):
+        self.statuses = []
+        statuses = self.statuses
+
+        class Handler(SimpleHTTPRequestHandler):
+            def log_message(self, format, *args):
+                # log_request 的參數為 (請求列, 狀態碼, 大小)
+                statuses.append(args[1])
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Handler, directory=HERE))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_second_fetch_is_not_modified(self):
+        csv_rows = load_csv_rows()
+        source = CsvRateSource(self.base_url + 'bot_rates_sample.csv')
+
+        rows, changed = source.fetch()
+        self.assertTrue(changed)
+        self.assertEqual(rows, csv_rows)
+        self.assertTrue(source.last_modified)
+
+        rows, changed = source.fetch()
+        self.assertFalse(changed)
+        self.assertEqual(rows, csv_rows)
+        self.assertEqual(self.statuses, ['200', '304'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+常駐事件迴圈與保持開啟的 crawl4ai 爬蟲
+
+每次 asyncio.run() 都會建立新的事件迴圈，若其中啟動 AsyncWebCrawler，
+就等於每次更新都要重新啟動一次 Chromium。這裡改為整個程序共用：
+- 一個在背景執行緒中永久執行的事件迴圈（LoopRunner）
+- 第一次需要時才啟動、之後保持開啟的 AsyncWebCrawler（WarmCrawler）
+任何執行緒都可以把協程交給這個迴圈執行並等待結果。
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+import replay
+
+
+class LoopRunner:
+    """在背景執行緒中永久執行的事件迴圈"""
+
+    def __init__(self, name: str = 'warm-loop'):
+        """
+        初始化（第一次使用時才啟動執行緒）
+
+        Args:
+            name: 執行緒名稱
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """取得（必要時啟動）背景事件迴圈"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                threading.Thread(target=run, name=self.name, daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        從一般執行緒把協程交給背景迴圈執行，並等待結果
+
+        Args:
+            coro: 協程
+            timeout: 等待秒數（None 表示不限）
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def run_async(self, coro: Awaitable) -> Any:
+        """從另一個事件迴圈中把協程交給背景迴圈執行（可 await）"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+
+class WarmCrawler:
+    """在共用事件迴圈上保持開啟的 AsyncWebCrawler"""
+
+    def __init__(self, runner: LoopRunner, browser_config=None):
+        """
+        初始化（第一次爬取時才啟動瀏覽器）
+
+        Args:
+            runner: 共用的事件迴圈
+            browser_config: crawl4ai BrowserConfig（None 使用預設值）
+        """
+        self.runner = runner
+        self.browser_config = browser_config
+        self._crawler = None
+        self._starting: Optional[asyncio.Lock] = None
+
+    @property
+    def is_warm(self) -> bool:
+        """瀏覽器是否已啟動"""
+        return self._crawler is not None
+
+    async def _get_crawler(self):
+        """在背景迴圈中取得爬蟲（並行的第一次呼叫只會啟動一次瀏覽器）"""
+        if self._starting is None:
+            self._starting = asyncio.Lock()
+        async with self._starting:
+            if self._crawler is None:
+                # 延後匯入：只有真的需要瀏覽器時才載入 crawl4ai
+                from crawl4ai import AsyncWebCrawler
+                crawler = AsyncWebCrawler(config=self.browser_config)
+                replay.install_crawl4ai(crawler)
+                await crawler.start()
+                self._crawler = crawler
+            return self._crawler
+
+    async def _arun(self, url: str, config):
+        crawler = await self._get_crawler()
+        try:
+            return await crawler.arun(url=url, config=config)
+        except Exception:
+            # 瀏覽器可能已經當掉，關閉後下次重新啟動
+            await self._close()
+            raise
+
+    async def _close(self):
+        crawler, self._crawler = self._crawler, None
+        if crawler is not None:
+            try:
+                await crawler.close()
+            except Exception as e:
+                print(f"關閉瀏覽器時發生錯誤: {e}")
+
+    async def arun(self, url: str, config):
+        """
+        以保持開啟的爬蟲抓取（可從任何事件迴圈 await）
+
+        Args:
+            url: 網址
+            config: CrawlerRunConfig
+
+        Returns:
+            CrawlResult
+        """
+        return await self.runner.run_async(self._arun(url, config))
+
+    def warm_up(self, timeout: Optional[float] = None):
+        """預先啟動瀏覽器"""
+        self.runner.run(self._get_crawler(), timeout)
+
+    def close(self, timeout: Optional[float] = 30):
+        """關閉瀏覽器（事件迴圈保留）"""
+        if self._crawler is not None:
+            self.runner.run(self._close(), timeout)
+
+
+# 整個程序共用的事件迴圈與爬蟲
+shared_runner = LoopRunner()
+warm_crawler = WarmCrawler(shared_runner)
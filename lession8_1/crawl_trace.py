@@ -0,0 +1,241 @@
+"""
+爬蟲分段追蹤（tracing）
+
+將每次抓取拆成多個階段並記錄耗時：
+    navigation      - page.goto（before_goto → after_goto）
+    scan_full_page  - 整頁捲動（after_goto → on_execution_started）
+    wait_for        - 等待條件成立（on_execution_started → before_retrieve_html）
+    html_retrieval  - 取得 HTML（before_retrieve_html → before_return_html）
+    extraction      - crawl4ai 處理 HTML 與 CSS 提取（before_return_html → arun 返回）
+    json_decode     - 解析 extracted_content
+每個 span 帶有股票代碼、第幾次嘗試與結果，存放在固定大小的環狀緩衝區，
+可匯出為 Chrome trace-event JSON（chrome://tracing 或 Perfetto 開啟），
+並彙整各階段的 p50 / p95 / p99。
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+
+# 階段順序（fetch 為整次嘗試的總耗時）
+STAGE_ORDER = ['navigation', 'scan_full_page', 'wait_for', 'html_retrieval', 'extraction', 'json_decode', 'fetch']
+# hook 名稱 → 該 hook 結束的階段
+_HOOK_BOUNDARIES = [
+    ('after_goto', 'navigation'),
+    ('on_execution_started', 'scan_full_page'),
+    ('before_retrieve_html', 'wait_for'),
+    ('before_return_html', 'html_retrieval'),
+]
+
+
+class Span:
+    """一段已完成的追蹤區間"""
+
+    __slots__ = ('name', 'start', 'end', 'tags', 'thread_id')
+
+    def __init__(self, name: str, start: float, end: float, tags: Dict, thread_id: int):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.tags = tags
+        self.thread_id = thread_id
+
+    @property
+    def duration_ms(self) -> float:
+        """耗時（毫秒）"""
+        return (self.end - self.start) * 1000
+
+
+class CrawlTracer:
+    """以環狀緩衝區保存 span 的追蹤器"""
+
+    def __init__(self, capacity: int = 5000):
+        """
+        初始化追蹤器
+
+        Args:
+            capacity: 最多保留的 span 數量（超過時丟棄最舊的）
+        """
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+        # url -> [(邊界名稱, 時間)]，由 crawl4ai hooks 填入
+        self._page_marks: Dict[str, List] = {}
+        self._page_urls: Dict[int, str] = {}
+
+    # ==================== 記錄 ====================
+
+    def record(self, name: str, start: float, end: float, **tags):
+        """記錄一段 span（start/end 為 time.perf_counter() 的值）"""
+        span = Span(name, start, end, tags, threading.get_ident())
+        with self._lock:
+            self._spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **tags) -> Iterator[Dict]:
+        """
+        以 with 區塊記錄 span
+
+        區塊內可修改 yield 出來的 tags，例如設定 tags['outcome']；
+        發生例外時 outcome 會被設為 'exception'。
+        """
+        start = time.perf_counter()
+        try:
+            yield tags
+        except BaseException as e:
+            tags.setdefault('outcome', 'exception')
+            tags.setdefault('error', str(e))
+            raise
+        finally:
+            self.record(name, start, time.perf_counter(), **tags)
+
+    def clear(self):
+        """清空緩衝區"""
+        with self._lock:
+            self._spans.clear()
+
+    def spans(self) -> List[Span]:
+        """目前緩衝區內所有 span 的快照"""
+        with self._lock:
+            return list(self._spans)
+
+    # ==================== crawl4ai hooks ====================
+
+    def install_hooks(self, crawler):
+        """
+        在 AsyncWebCrawler 上註冊階段邊界 hooks
+
+        hooks 由同一個 crawler 上所有並行的 arun 共用，
+        因此以 page 物件對應回 before_goto 時的 URL。
+        """
+        strategy = crawler.crawler_strategy
+
+        async def before_goto(page, context=None, url=None, **kwargs):
+            self._page_urls[id(page)] = url
+            self._mark(url, 'before_goto')
+            return page
+
+        strategy.set_hook('before_goto', before_goto)
+
+        for hook_name, _ in _HOOK_BOUNDARIES:
+            strategy.set_hook(hook_name, self._make_boundary_hook(hook_name))
+
+    def _make_boundary_hook(self, hook_name: str):
+        """建立記錄時間點的 hook"""
+        async def hook(page, **kwargs):
+            url = self._page_urls.get(id(page))
+            if url is not None:
+                self._mark(url, hook_name)
+            return page
+        return hook
+
+    def _mark(self, url: str, boundary: str):
+        """記錄某個 URL 到達某個邊界的時間"""
+        with self._lock:
+            self._page_marks.setdefault(url, []).append((boundary, time.perf_counter()))
+
+    def begin_page(self, url: str):
+        """開始一次抓取前呼叫，清除該 URL 上一次的邊界紀錄"""
+        with self._lock:
+            self._page_marks.pop(url, None)
+
+    def end_page(self, url: str, end: Optional[float] = None, **tags):
+        """
+        arun 返回後呼叫，將邊界紀錄轉換為各階段 span
+
+        Args:
+            url: 抓取的 URL
+            end: arun 返回的時間（預設為現在）
+            tags: 附加在每個階段 span 上的標籤
+        """
+        end = end if end is not None else time.perf_counter()
+        with self._lock:
+            marks = dict(self._page_marks.pop(url, []))
+            for page_id, page_url in list(self._page_urls.items()):
+                if page_url == url:
+                    del self._page_urls[page_id]
+
+        start = marks.get('before_goto')
+        if start is None:
+            return
+        for hook_name, stage in _HOOK_BOUNDARIES:
+            boundary = marks.get(hook_name)
+            if boundary is None:
+                continue
+            self.record(stage, start, boundary, **tags)
+            start = boundary
+        self.record('extraction', start, end, **tags)
+
+    # ==================== 匯出與統計 ====================
+
+    def to_chrome_trace(self) -> Dict:
+        """
+        轉換為 Chrome trace-event 格式
+
+        每支股票一條軌道（tid），並以 metadata 事件標示股票代碼。
+        """
+        events = []
+        lanes: Dict[str, int] = {}
+        for span in self.spans():
+            lane_name = str(span.tags.get('code', f'thread-{span.thread_id}'))
+            if lane_name not in lanes:
+                lanes[lane_name] = len(lanes) + 1
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': lanes[lane_name],
+                    'args': {'name': lane_name}
+                })
+            events.append({
+                'name': span.name,
+                'cat': 'crawl',
+                'ph': 'X',
+                'ts': round((span.start - self._epoch) * 1_000_000, 1),
+                'dur': round((span.end - span.start) * 1_000_000, 1),
+                'pid': 1,
+                'tid': lanes[lane_name],
+                'args': {k: str(v) for k, v in span.tags.items()},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome_trace(self, path: str):
+        """將追蹤資料寫成 Chrome trace JSON 檔"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+    def stage_percentiles(self) -> Dict[str, Dict[str, float]]:
+        """
+        彙整各階段耗時的百分位數（毫秒）
+
+        Returns:
+            {階段: {'count': n, 'p50': ms, 'p95': ms, 'p99': ms}}
+        """
+        durations: Dict[str, List[float]] = {}
+        for span in self.spans():
+            durations.setdefault(span.name, []).append(span.duration_ms)
+
+        stats = {}
+        for name, values in durations.items():
+            values.sort()
+            stats[name] = {
+                'count': len(values),
+                'p50': _percentile(values, 50),
+                'p95': _percentile(values, 95),
+                'p99': _percentile(values, 99),
+            }
+        return stats
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """nearest-rank 百分位數（輸入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+# 程式共用的追蹤器
+tracer = CrawlTracer()
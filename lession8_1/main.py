@@ -9,22 +9,37 @@ Author: Created on 2025-12-20
 
 import asyncio
 import json
+import os
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 from typing import Dict, List, Optional, Set
 from datetime import datetime
 import threading
 import queue
+import time
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, BrowserConfig, CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 import twstock
 
 # 導入財務指標爬蟲
 from stock_financial_crawler import SimpleStockCrawler
+from virtual_list import VirtualListView
+from refresh_scheduler import RefreshScheduler, visible_in_canvas
+from quote_cache import QuoteCache
+from crawl_trace import STAGE_ORDER, tracer
+
+# 共用 lession8 的欄位型別轉換（append：避免 lession8/main.py 蓋過本目錄的模組）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lession8'))
+from field_types import normalize
+import replay
 
 
 # ==================== 爬蟲模組 ====================
 
+# 依交易日曆判斷有效性的報價快取（休市期間不啟動瀏覽器）
+quote_cache = QuoteCache()
+
 def get_stock_schema() -> Dict:
     """
     取得股票資訊的 CSS 提取 Schema
@@ -39,7 +54,8 @@ def get_stock_schema() -> Dict:
             {
                 "name": "日期時間",
                 "selector": "time.last-time#lastQuoteTime",
-                "type": "text"
+                "type": "text",
+                "value_type": "timestamp"
             },
             {
                 "name": "股票號碼",
@@ -54,42 +70,50 @@ def get_stock_schema() -> Dict:
             {
                 "name": "即時價格",
                 "selector": "div.quotes-info div.deal",
-                "type": "text"
+                "type": "text",
+                "value_type": "decimal"
             },
             {
                 "name": "漲跌",
                 "selector": "div.quotes-info span.chg[c-model='change']",
-                "type": "text"
+                "type": "text",
+                "value_type": "decimal"
             },
             {
                 "name": "漲跌百分比",
                 "selector": "div.quotes-info span.chg-rate[c-model='changeRate']",
-                "type": "text"
+                "type": "text",
+                "value_type": "percent"
             },
             {
                 "name": "開盤價",
                 "selector": "div.quotes-info #quotesUl span[c-model-dazzle='text:open,class:openUpDn']",
-                "type": "text"
+                "type": "text",
+                "value_type": "decimal"
             },
             {
                 "name": "最高價",
                 "selector": "div.quotes-info #quotesUl span[c-model-dazzle='text:high,class:highUpDn']",
-                "type": "text"
+                "type": "text",
+                "value_type": "decimal"
             },
             {
                 "name": "成交量(張)",
                 "selector": "div.quotes-info #quotesUl span[c-model='volume']",
-                "type": "text"
+                "type": "text",
+                "value_type": "integer"
             },
             {
                 "name": "最低價",
                 "selector": "div.quotes-info #quotesUl span[c-model-dazzle='text:low,class:lowUpDn']",
-                "type": "text"
+                "type": "text",
+                "value_type": "decimal"
             },
             {
                 "name": "前一日收盤價",
                 "selector": "div.quotes-info #quotesUl span[c-model='previousClose']",
-                "type": "text"
+                "type": "text",
+                "value_type": "decimal"
             }
         ]
     }
@@ -104,8 +128,13 @@ async def fetch_single_stock(
     """
     抓取單一股票資訊
     
+    記錄分段追蹤（navigation、scan_full_page、wait_for、
+    html_retrieval、extraction、json_decode），並標記股票代碼、嘗試次數與結果。
+    目前每支股票只抓一次（attempt 固定為 1），追蹤格式仍保留 attempt 欄位，
+    分析時可以區分第一次抓取與重試。
+    
     Args:
-        crawler: AsyncWebCrawler 實例
+        crawler: AsyncWebCrawler 實例（需已呼叫 tracer.install_hooks）
         stock_code: 股票代碼
         base_config: 基礎爬蟲執行設定
         semaphore: 用於限制並行數量的信號量
@@ -116,51 +145,86 @@ async def fetch_single_stock(
     async with semaphore:
         url = f'https://www.wantgoo.com/stock/{stock_code}/technical-chart'
         
-        try:
-            # 針對每個股票創建帶有等待條件的配置
-            config = CrawlerRunConfig(
-                cache_mode=base_config.cache_mode,
-                extraction_strategy=base_config.extraction_strategy,
-                scan_full_page=base_config.scan_full_page,
-                verbose=base_config.verbose,
-                # 等待關鍵元素載入完成
-                wait_for="js:() => document.querySelector('div.quotes-info div.deal') && document.querySelector('span.astock-code[c-model=\"id\"]') && document.querySelector('#quotesUl span[c-model=\"volume\"]')",
-                wait_for_timeout=15000,
-                page_timeout=30000
-            )
-            
-            result = await crawler.arun(url=url, config=config)
+        # 針對每個股票創建帶有等待條件的配置
+        config = CrawlerRunConfig(
+            cache_mode=base_config.cache_mode,
+            extraction_strategy=base_config.extraction_strategy,
+            scan_full_page=base_config.scan_full_page,
+            verbose=base_config.verbose,
+            # 只為了分段追蹤：crawl4ai 只有在設定了 js_code 時才會觸發
+            # on_execution_started hook（位於 scan_full_page 之後、wait_for 之前），
+            # 沒有這行就無法分開 scan_full_page 與 wait_for 的耗時。
+            # "void 0" 在頁面中不做任何事，不影響擷取結果。
+            js_code="void 0",
+            # 等待關鍵元素載入完成
+            wait_for="js:() => document.querySelector('div.quotes-info div.deal') && document.querySelector('span.astock-code[c-model=\"id\"]') && document.querySelector('#quotesUl span[c-model=\"volume\"]')",
+            wait_for_timeout=15000,
+            page_timeout=30000
+        )
+        
+        stock_data = None
+        attempt = 1
+        with tracer.span('fetch', code=stock_code, attempt=attempt) as tags:
+            tracer.begin_page(url)
+            try:
+                result = await crawler.arun(url=url, config=config)
+            except Exception as e:
+                result = None
+                tags['outcome'] = 'exception'
+                tags['error'] = str(e)
+                print(f"✗ 股票 {stock_code} 發生錯誤: {e}")
+            arun_end = time.perf_counter()
             
-            if result.success and result.extracted_content:
-                try:
-                    data = json.loads(result.extracted_content)
-                    if data and len(data) > 0:
-                        stock_data = data[0]
-                        stock_data['stock_code'] = stock_code
-                        stock_data['update_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        return stock_data
-                except json.JSONDecodeError:
-                    print(f"✗ 股票 {stock_code} JSON 解析失敗")
-                    return None
+            if result is None:
+                pass
+            elif not result.success or not result.extracted_content:
+                tags['outcome'] = 'download_failed'
+                tags['error'] = result.error_message or ''
+                print(f"✗ 股票 {stock_code} 下載失敗: {result.error_message}")
             else:
-                print(f"✗ 股票 {stock_code} 下載失敗")
-                return None
+                with tracer.span('json_decode', code=stock_code, attempt=attempt) as decode_tags:
+                    try:
+                        data = json.loads(result.extracted_content)
+                        decode_tags['outcome'] = 'success' if data else 'empty'
+                    except json.JSONDecodeError:
+                        data = None
+                        decode_tags['outcome'] = 'json_error'
+                tags['outcome'] = decode_tags['outcome']
                 
-        except Exception as e:
-            print(f"✗ 股票 {stock_code} 發生錯誤: {e}")
-            return None
+                if data:
+                    stock_data = data[0]
+                    stock_data['stock_code'] = stock_code
+                    stock_data['update_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                elif tags['outcome'] == 'json_error':
+                    print(f"✗ 股票 {stock_code} JSON 解析失敗")
+                else:
+                    print(f"✗ 股票 {stock_code} 頁面中找不到報價資料")
+            
+            tracer.end_page(url, arun_end, code=stock_code, attempt=attempt, outcome=tags['outcome'])
+        
+        return stock_data
 
 
-async def fetch_multiple_stocks(stock_codes: List[str]) -> List[Dict]:
+async def fetch_multiple_stocks(stock_codes: List[str], force: bool = False) -> List[Dict]:
     """
     批次並行爬取多支股票資訊
     
+    休市期間若快取中已有收盤後的報價，直接回傳而不啟動瀏覽器。
+    
     Args:
         stock_codes: 股票代碼列表
+        force: 忽略快取強制抓取（開盤前暖機使用）
     
     Returns:
         成功爬取的股票資訊列表
     """
+    if force:
+        cached_results, stock_codes = [], list(stock_codes)
+    else:
+        cached_results, stock_codes = quote_cache.split(stock_codes)
+    if not stock_codes:
+        return cached_results
+    
     stock_schema = get_stock_schema()
     extraction_strategy = JsonCssExtractionStrategy(schema=stock_schema)
     
@@ -177,6 +241,11 @@ async def fetch_multiple_stocks(stock_codes: List[str]) -> List[Dict]:
     semaphore = asyncio.Semaphore(3)
     
     async with AsyncWebCrawler(config=browser_config) as crawler:
+        # 註冊分段追蹤 hooks
+        tracer.install_hooks(crawler)
+        # CRAWL_REPLAY=record / replay 時錄製或離線重播
+        replay.install_crawl4ai(crawler)
+        
         tasks = [
             fetch_single_stock(crawler, code, base_crawler_run_config, semaphore)
             for code in stock_codes
@@ -192,23 +261,29 @@ async def fetch_multiple_stocks(stock_codes: List[str]) -> List[Dict]:
             elif result is not None:
                 successful_results.append(result)
         
-        return successful_results
+        # 整批轉換一次數值（顯示仍用原字串，數值放在 result['數值']）
+        normalize(successful_results, stock_schema, into='數值')
+        for result in successful_results:
+            quote_cache.put(result['stock_code'], result)
+        
+        return cached_results + successful_results
 
 
-def run_crawler_in_thread(stock_codes: List[str], result_queue: queue.Queue):
+def run_crawler_in_thread(stock_codes: List[str], result_queue: queue.Queue, force: bool = False):
     """
     在背景執行緒中執行爬蟲任務
     
     Args:
         stock_codes: 要爬取的股票代碼列表
         result_queue: 用於傳遞結果的佇列
+        force: 忽略快取強制抓取
     """
     try:
         # 在執行緒中建立新的事件迴圈
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
-        results = loop.run_until_complete(fetch_multiple_stocks(stock_codes))
+        results = loop.run_until_complete(fetch_multiple_stocks(stock_codes, force=force))
         result_queue.put(('success', results))
         
         loop.close()
@@ -242,6 +317,17 @@ class StockMonitorApp:
         self.auto_update_enabled = False
         self.update_timer_id = None
         self.is_updating = False
+        self.updating_codes: List[str] = []
+        
+        # 依可見度與波動度排程的刷新器
+        self.scheduler = RefreshScheduler()
+        
+        # 股票卡片 widgets（用於判斷可見度）
+        self.card_frames: Dict[str, ttk.LabelFrame] = {}
+        
+        # 除錯面板
+        self.debug_window: Optional[tk.Toplevel] = None
+        self.debug_tree: Optional[ttk.Treeview] = None
         
         # 爬蟲結果佇列
         self.result_queue = queue.Queue()
@@ -293,12 +379,19 @@ class StockMonitorApp:
         self.auto_update_var = tk.BooleanVar(value=False)
         auto_update_check = ttk.Checkbutton(
             toolbar,
-            text="自動更新 (每分鐘)",
+            text="自動更新 (智慧排程)",
             variable=self.auto_update_var,
             command=self.toggle_auto_update
         )
         auto_update_check.pack(side=tk.LEFT, padx=5)
         
+        # 除錯面板（各階段耗時）
+        ttk.Button(
+            toolbar,
+            text="🐞 除錯面板",
+            command=self.open_debug_panel
+        ).pack(side=tk.LEFT, padx=5)
+        
         # 狀態標籤
         self.status_label = ttk.Label(toolbar, text="就緒")
         self.status_label.pack(side=tk.LEFT, padx=20)
@@ -330,23 +423,15 @@ class StockMonitorApp:
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
-        # 股票列表（使用 Listbox + Scrollbar）
-        list_frame = ttk.Frame(left_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        scrollbar = ttk.Scrollbar(list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.stock_listbox = tk.Listbox(
-            list_frame,
-            yscrollcommand=scrollbar.set,
-            font=('Arial', 10)
+        # 股票列表（虛擬清單：只繪製可見列）
+        self.stock_list = VirtualListView(
+            left_frame,
+            columns=(("", 280),),
+            font=('Arial', 10),
+            show_header=False,
+            on_activate=self.on_stock_activate
         )
-        self.stock_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.stock_listbox.yview)
-        
-        # 雙擊加入觀察
-        self.stock_listbox.bind('<Double-Button-1>', self.on_stock_double_click)
+        self.stock_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # 加入按鈕
         ttk.Button(
@@ -370,6 +455,7 @@ class StockMonitorApp:
         
         # 滾動區域
         canvas = tk.Canvas(right_frame)
+        self.cards_canvas = canvas
         scrollbar = ttk.Scrollbar(right_frame, orient="vertical", command=canvas.yview)
         self.stocks_container = ttk.Frame(canvas)
         
@@ -409,9 +495,8 @@ class StockMonitorApp:
             # 依代碼排序
             self.all_stocks.sort(key=lambda x: x[0])
             
-            # 顯示在列表中
-            for _, _, display_text in self.all_stocks:
-                self.stock_listbox.insert(tk.END, display_text)
+            # 顯示在列表中（一次設定資料，不逐筆 insert）
+            self.stock_list.set_rows([(display_text,) for _, _, display_text in self.all_stocks])
             
             print(f"✓ 載入 {len(self.all_stocks)} 支台灣股票")
             
@@ -421,27 +506,21 @@ class StockMonitorApp:
     def on_search(self, *args):
         """搜尋框文字變更時觸發"""
         # TODO: Phase 4.3 - 實作搜尋功能
-        search_text = self.search_var.get().lower()
-        
-        self.stock_listbox.delete(0, tk.END)
-        
-        for code, name, display_text in self.all_stocks:
-            if search_text in code.lower() or search_text in name.lower():
-                self.stock_listbox.insert(tk.END, display_text)
+        self.stock_list.set_filter(self.search_var.get())
     
-    def on_stock_double_click(self, event):
+    def on_stock_activate(self, row):
         """雙擊股票項目時加入觀察清單"""
         self.add_to_watchlist()
     
     def add_to_watchlist(self):
         """加入股票到觀察清單"""
         # TODO: Phase 4.4 - 實作加入功能
-        selection = self.stock_listbox.curselection()
+        selection = self.stock_list.get_selected()
         if not selection:
             messagebox.showwarning("提示", "請先選擇一支股票")
             return
         
-        selected_text = self.stock_listbox.get(selection[0])
+        selected_text = selection[0]
         stock_code = selected_text.split(' - ')[0]
         
         if stock_code in self.watchlist:
@@ -468,6 +547,7 @@ class StockMonitorApp:
         # 清空現有顯示
         for widget in self.stocks_container.winfo_children():
             widget.destroy()
+        self.card_frames.clear()
         
         if not self.watchlist:
             # 顯示空狀態
@@ -492,6 +572,7 @@ class StockMonitorApp:
             padding=10
         )
         card_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.card_frames[stock_code] = card_frame
         
         # 取得快取資料
         stock_data = self.stock_data_cache.get(stock_code)
@@ -531,17 +612,26 @@ class StockMonitorApp:
         
         self.start_update()
     
-    def start_update(self):
-        """開始更新股票資料"""
+    def start_update(self, stock_codes: Optional[List[str]] = None, force: bool = False):
+        """
+        開始更新股票資料
+        
+        Args:
+            stock_codes: 要更新的股票代碼（預設為整個觀察清單）
+            force: 忽略休市快取強制抓取（開盤前暖機）
+        """
+        if stock_codes is None:
+            stock_codes = list(self.watchlist)
+        
         self.is_updating = True
+        self.updating_codes = stock_codes
         self.update_btn.config(state=tk.DISABLED)
-        self.status_label.config(text=f"🔄 更新中... (0/{len(self.watchlist)})")
+        self.status_label.config(text=f"🔄 更新中... (0/{len(stock_codes)})")
         
         # 在背景執行緒中執行爬蟲
-        stock_codes = list(self.watchlist)
         thread = threading.Thread(
             target=run_crawler_in_thread,
-            args=(stock_codes, self.result_queue),
+            args=(stock_codes, self.result_queue, force),
             daemon=True
         )
         thread.start()
@@ -571,6 +661,13 @@ class StockMonitorApp:
             if stock_code:
                 self.stock_data_cache[stock_code] = stock_data
         
+        # 回報排程器（失敗的股票也要釋放，價格為 None）
+        fetched = {stock_data.get('stock_code'): stock_data for stock_data in results}
+        for stock_code in self.updating_codes:
+            stock_data = fetched.get(stock_code, {})
+            self.scheduler.complete(stock_code, stock_data.get('數值', {}).get('即時價格'))
+        self.updating_codes = []
+        
         # 更新顯示
         self.update_watchlist_display()
         
@@ -585,6 +682,9 @@ class StockMonitorApp:
     
     def on_update_error(self, error_msg: str):
         """更新錯誤回調"""
+        for stock_code in self.updating_codes:
+            self.scheduler.complete(stock_code)
+        self.updating_codes = []
         self.is_updating = False
         self.update_btn.config(state=tk.NORMAL)
         self.status_label.config(text=f"✗ 更新失敗")
@@ -596,7 +696,7 @@ class StockMonitorApp:
         self.auto_update_enabled = self.auto_update_var.get()
         
         if self.auto_update_enabled:
-            print("✓ 啟用自動更新（每 60 秒）")
+            print("✓ 啟用自動更新（依可見度與波動度排程）")
             self.schedule_auto_update()
         else:
             print("✗ 停用自動更新")
@@ -605,13 +705,111 @@ class StockMonitorApp:
                 self.update_timer_id = None
     
     def schedule_auto_update(self):
-        """排程自動更新"""
-        if self.auto_update_enabled and self.watchlist and not self.is_updating:
-            self.start_update()
+        """
+        排程自動更新
         
-        # 每 60 秒執行一次
-        if self.auto_update_enabled:
-            self.update_timer_id = self.root.after(60000, self.schedule_auto_update)
+        每個 tick 只抓取「到期」的股票：可見卡片與高波動股票間隔較短，
+        休市時間完全暫停。
+        """
+        if not self.auto_update_enabled:
+            return
+        
+        if self.watchlist and not self.is_updating and self.scheduler.warmup_due():
+            # 開盤前暖機：整個觀察清單抓取一次
+            self.start_update(force=True)
+        elif not self.scheduler.is_market_open():
+            self.status_label.config(text="⏸ 休市中，自動更新暫停")
+        elif self.watchlist and not self.is_updating:
+            self.scheduler.set_symbols(self.watchlist)
+            self.scheduler.set_visible(visible_in_canvas(self.cards_canvas, self.card_frames))
+            due_codes = self.scheduler.due_symbols()
+            if due_codes:
+                self.start_update(due_codes)
+        
+        self.update_timer_id = self.root.after(self.scheduler.tick_ms, self.schedule_auto_update)
+    
+    # ==================== 除錯面板 ====================
+    
+    def open_debug_panel(self):
+        """開啟除錯面板：顯示各爬取階段的 p50 / p95 / p99 耗時"""
+        if self.debug_window is not None and self.debug_window.winfo_exists():
+            self.debug_window.lift()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("除錯面板 - 爬取階段耗時")
+        window.geometry("560x300")
+        self.debug_window = window
+        
+        columns = ('count', 'p50', 'p95', 'p99')
+        tree = ttk.Treeview(window, columns=columns, height=8)
+        tree.heading('#0', text='階段')
+        tree.heading('count', text='次數')
+        tree.heading('p50', text='p50 (ms)')
+        tree.heading('p95', text='p95 (ms)')
+        tree.heading('p99', text='p99 (ms)')
+        tree.column('#0', width=140)
+        for col in columns:
+            tree.column(col, width=90, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.debug_tree = tree
+        
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(
+            button_frame,
+            text="匯出 Chrome Trace",
+            command=self.export_chrome_trace
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(
+            button_frame,
+            text="清除紀錄",
+            command=self.clear_trace
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.refresh_debug_panel()
+    
+    def refresh_debug_panel(self):
+        """每 2 秒重新計算各階段百分位數"""
+        if self.debug_window is None or not self.debug_window.winfo_exists():
+            self.debug_window = None
+            return
+        
+        stats = tracer.stage_percentiles()
+        self.debug_tree.delete(*self.debug_tree.get_children())
+        for stage in STAGE_ORDER:
+            row = stats.get(stage)
+            if row is None:
+                continue
+            self.debug_tree.insert('', tk.END, text=stage, values=(
+                row['count'],
+                f"{row['p50']:.0f}",
+                f"{row['p95']:.0f}",
+                f"{row['p99']:.0f}"
+            ))
+        
+        self.debug_window.after(2000, self.refresh_debug_panel)
+    
+    def export_chrome_trace(self):
+        """將追蹤資料匯出為 Chrome trace JSON（可用 chrome://tracing 或 Perfetto 開啟）"""
+        path = filedialog.asksaveasfilename(
+            parent=self.debug_window,
+            defaultextension=".json",
+            initialfile=f"crawl_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            tracer.dump_chrome_trace(path)
+            messagebox.showinfo("匯出完成", f"已儲存至 {path}", parent=self.debug_window)
+        except OSError as e:
+            messagebox.showerror("匯出失敗", str(e), parent=self.debug_window)
+    
+    def clear_trace(self):
+        """清除追蹤紀錄"""
+        tracer.clear()
+        self.debug_tree.delete(*self.debug_tree.get_children())
     
     def on_closing(self):
         """視窗關閉事件處理"""
@@ -6,6 +6,7 @@
 
 import asyncio
 from stock_financial_crawler import SimpleStockCrawler
+from stock_screener import StockTable, decide, screen
 
 
 # ==================== 快速範例 ====================
@@ -87,33 +88,30 @@ async def quick_compare_stocks():
         )
         results[code] = result
     
-    # 顯示排名
+    # 顯示排名（欄位式陣列排序，全市場的股票也是同樣寫法）
+    table = StockTable.from_records(results.values())
+    
     print("【高殖利率排名】")
-    sorted_yield = sorted(results.items(), key=lambda x: x[1]['dividend_yield'], reverse=True)
-    for i, (code, data) in enumerate(sorted_yield, 1):
-        print(f"{i}. {code}: {data['dividend_yield']}%")
+    for i, data in enumerate(table.rows(screen(table, rank_by=['dividend_yield'])), 1):
+        print(f"{i}. {data['stock_code']}: {data['dividend_yield']}%")
     
     print("\n【高報酬率排名】")
-    sorted_return = sorted(results.items(), key=lambda x: x[1]['annual_return_rate'], reverse=True)
-    for i, (code, data) in enumerate(sorted_return, 1):
-        print(f"{i}. {code}: {data['annual_return_rate']}%")
+    for i, data in enumerate(table.rows(screen(table, rank_by=['annual_return_rate'])), 1):
+        print(f"{i}. {data['stock_code']}: {data['annual_return_rate']}%")
 
 
 # ==================== 投資決策 ====================
 
 def quick_investment_decision(dividend_yield, return_rate):
-    """快速判斷買賣決策"""
-    
-    if dividend_yield > 5 and return_rate > 0:
-        return "💰 強烈買入"
-    elif dividend_yield > 3 and return_rate > 0:
-        return "📈 買入"
-    elif return_rate > 15:
-        return "🚀 高成長"
-    elif dividend_yield > 5:
-        return "🤔 可考慮"
-    else:
-        return "⚠️  觀望"
+    """
+    快速判斷買賣決策
+    
+    規則定義在 stock_screener.INVESTMENT_RULES：
+    殖利率 > 5% 且報酬率 > 0 → 強烈買入；殖利率 > 3% 且報酬率 > 0 → 買入；
+    報酬率 > 15% → 高成長；殖利率 > 5% → 可考慮；其他 → 觀望。
+    整個市場或歷史資料要一次判斷時使用 stock_screener.investment_decisions。
+    """
+    return decide(dividend_yield, return_rate)
 
 
 # ==================== 主程式 ====================
@@ -0,0 +1,84 @@
+"""
+報價快取
+
+休市期間（夜間、週末、假日）報價不會變動：只要快取中的報價是在
+收盤價確定之後抓取的，就直接回傳，不進行任何網路或瀏覽器操作。
+盤中則可設定短暫的 TTL，讓短時間內的重複請求共用同一筆報價。
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from trading_calendar import TWSE_CALENDAR, TradingCalendar, taipei_time
+
+
+class QuoteCache:
+    """依交易日曆判斷有效性的報價快取"""
+
+    def __init__(self, calendar: TradingCalendar = TWSE_CALENDAR, ttl: timedelta = timedelta(0)):
+        """
+        初始化快取
+
+        Args:
+            calendar: 交易日曆
+            ttl: 盤中報價的有效時間（預設 0，盤中一律重新抓取）
+        """
+        self.calendar = calendar
+        self.ttl = ttl
+        self._quotes: Dict[str, Tuple[datetime, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, code: str, now: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        取得仍然有效的報價
+
+        Args:
+            code: 股票代碼
+            now: 基準時間（預設為現在）
+
+        Returns:
+            報價未超過 TTL，或休市中且已是最新收盤價時返回快取報價，否則返回 None
+        """
+        with self._lock:
+            entry = self._quotes.get(code)
+        if entry is None:
+            return None
+        fetched_at, quote = entry
+        now = taipei_time(now)
+        if now - fetched_at < self.ttl or self.calendar.is_settled(fetched_at, now):
+            return quote
+        return None
+
+    def put(self, code: str, quote: Dict, now: Optional[datetime] = None):
+        """
+        寫入一筆報價
+
+        Args:
+            code: 股票代碼
+            quote: 報價資料
+            now: 抓取時間（預設為現在）
+        """
+        with self._lock:
+            self._quotes[code] = (taipei_time(now), quote)
+
+    def split(self, codes: Sequence[str], now: Optional[datetime] = None) -> Tuple[List[Dict], List[str]]:
+        """
+        將股票代碼分成「可直接用快取」與「需要抓取」兩組
+
+        Args:
+            codes: 股票代碼列表
+            now: 基準時間（預設為現在）
+
+        Returns:
+            (快取命中的報價列表, 需要抓取的代碼列表)
+        """
+        hits = []
+        misses = []
+        for code in codes:
+            quote = self.get(code, now)
+            if quote is None:
+                misses.append(code)
+            else:
+                hits.append(quote)
+        return hits, misses
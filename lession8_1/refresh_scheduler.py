@@ -0,0 +1,226 @@
+"""
+觀察清單刷新排程器
+
+每支股票擁有自己的刷新間隔：
+- 畫面上可見的卡片、波動大的股票 → 較常刷新
+- 隱藏的、價格長時間不動的股票 → 較少刷新
+所有刷新共用每分鐘的抓取額度，台股休市時間則完全暫停，
+只在開盤前進行一次暖機抓取。
+"""
+
+import threading
+import tkinter as tk
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Set
+
+from trading_calendar import TWSE_CALENDAR, TradingCalendar, taipei_time
+
+
+class _SymbolState:
+    """單支股票的排程狀態"""
+
+    __slots__ = ('last_fetch', 'last_price', 'volatility', 'unchanged', 'in_flight')
+
+    def __init__(self):
+        self.last_fetch: Optional[float] = None
+        self.last_price: Optional[float] = None
+        self.volatility = 0.0  # 每次刷新的價格變動百分比（指數移動平均）
+        self.unchanged = 0     # 連續幾次刷新價格沒有變動
+        self.in_flight = False
+
+
+class RefreshScheduler:
+    """依可見度與波動度決定每支股票刷新間隔的排程器"""
+
+    def __init__(
+        self,
+        base_interval: float = 60.0,
+        min_interval: float = 15.0,
+        max_interval: float = 300.0,
+        budget_per_minute: int = 30,
+        tick_ms: int = 5000,
+        volatility_reference: float = 0.5,
+        calendar: TradingCalendar = TWSE_CALENDAR
+    ):
+        """
+        初始化排程器
+
+        Args:
+            base_interval: 基準刷新間隔（秒）
+            min_interval: 最短刷新間隔（秒）
+            max_interval: 最長刷新間隔（秒）
+            budget_per_minute: 全域每分鐘最多抓取次數
+            tick_ms: GUI 檢查到期股票的頻率（毫秒）
+            volatility_reference: 波動度參考值（%），達到此值時間隔減半
+            calendar: 交易日曆（決定暫停時段與暖機時間）
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget_per_minute = budget_per_minute
+        self.tick_ms = tick_ms
+        self.volatility_reference = volatility_reference
+        self.calendar = calendar
+
+        self._states: Dict[str, _SymbolState] = {}
+        self._visible: Set[str] = set()
+        self._fetch_log: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._warmed_for: Optional[datetime] = None
+
+    # ==================== 狀態更新 ====================
+
+    def set_symbols(self, codes: Iterable[str]):
+        """同步觀察清單（新增的股票立即到期，移除的股票清除狀態）"""
+        codes = set(codes)
+        with self._lock:
+            for code in list(self._states):
+                if code not in codes:
+                    del self._states[code]
+            for code in codes:
+                self._states.setdefault(code, _SymbolState())
+
+    def set_visible(self, codes: Iterable[str]):
+        """設定目前在畫面上可見的股票"""
+        with self._lock:
+            self._visible = set(codes)
+
+    def complete(self, code: str, price: Optional[float] = None, now: Optional[float] = None):
+        """
+        回報一支股票抓取完成
+
+        Args:
+            code: 股票代碼
+            price: 最新股價（抓取失敗時為 None）
+            now: 完成時間（epoch 秒，預設為現在）
+        """
+        now = now if now is not None else datetime.now().timestamp()
+        with self._lock:
+            state = self._states.get(code)
+            if state is None:
+                return
+            state.in_flight = False
+            state.last_fetch = now
+
+            if price is None or price <= 0:
+                return
+            if state.last_price:
+                move = abs(price - state.last_price) / state.last_price * 100
+                state.volatility = 0.7 * state.volatility + 0.3 * move
+                state.unchanged = state.unchanged + 1 if move == 0 else 0
+            state.last_price = price
+
+    # ==================== 排程計算 ====================
+
+    def interval_for(self, code: str) -> float:
+        """
+        計算一支股票目前的刷新間隔（秒）
+
+        可見 ×0.5、隱藏 ×3；波動度每達一個參考值間隔再縮短；
+        價格連續不動時逐步拉長。
+        """
+        state = self._states.get(code)
+        interval = self.base_interval
+        interval *= 0.5 if code in self._visible else 3.0
+        if state is not None:
+            interval /= 1.0 + state.volatility / self.volatility_reference
+            interval *= 1.0 + 0.5 * min(state.unchanged, 4)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def due_symbols(self, now: Optional[float] = None) -> List[str]:
+        """
+        取出到期且在額度內的股票，並標記為抓取中
+
+        依「逾期比例」（距上次抓取 / 間隔）由高到低排序，
+        同一分鐘內的總抓取數不超過 budget_per_minute。
+
+        Args:
+            now: 目前時間（epoch 秒，預設為現在）
+
+        Returns:
+            本次應抓取的股票代碼列表
+        """
+        now = now if now is not None else datetime.now().timestamp()
+        with self._lock:
+            while self._fetch_log and now - self._fetch_log[0] >= 60:
+                self._fetch_log.popleft()
+            allowance = self.budget_per_minute - len(self._fetch_log)
+            if allowance <= 0:
+                return []
+
+            candidates = []
+            for code, state in self._states.items():
+                if state.in_flight:
+                    continue
+                if state.last_fetch is None:
+                    candidates.append((float('inf'), code))
+                    continue
+                overdue = (now - state.last_fetch) / self.interval_for(code)
+                if overdue >= 1.0:
+                    candidates.append((overdue, code))
+
+            candidates.sort(reverse=True)
+            selected = [code for _, code in candidates[:allowance]]
+            for code in selected:
+                self._states[code].in_flight = True
+                self._fetch_log.append(now)
+            return selected
+
+    def is_market_open(self, now: Optional[datetime] = None) -> bool:
+        """目前是否應該進行自動刷新"""
+        return self.calendar.is_open(now)
+
+    def warmup_due(self, now: Optional[datetime] = None) -> bool:
+        """
+        是否該進行開盤前暖機（每次開盤只會返回一次 True）
+
+        Args:
+            now: 目前時間（預設為現在）
+        """
+        now = taipei_time(now)
+        next_open = self.calendar.next_open(now)
+        if self._warmed_for == next_open or now < next_open - self.calendar.warmup:
+            return False
+        self._warmed_for = next_open
+        return True
+
+
+# ==================== 可見度偵測 ====================
+
+def visible_in_canvas(canvas: tk.Canvas, widgets: Mapping[str, tk.Widget]) -> Set[str]:
+    """
+    找出在可捲動 Canvas 可視範圍內的卡片
+
+    Args:
+        canvas: 包住卡片容器的 Canvas
+        widgets: 股票代碼 -> 卡片 widget
+
+    Returns:
+        可見卡片的股票代碼集合
+    """
+    top = canvas.canvasy(0)
+    bottom = top + canvas.winfo_height()
+    canvas_root_y = canvas.winfo_rooty()
+
+    visible = set()
+    for code, widget in widgets.items():
+        if not widget.winfo_ismapped():
+            continue
+        y = widget.winfo_rooty() - canvas_root_y + top
+        if y + widget.winfo_height() >= top and y <= bottom:
+            visible.add(code)
+    return visible
+
+
+def visible_in_treeview(tree) -> Set[str]:
+    """
+    找出 Treeview 目前可視範圍內的項目（以 iid 作為股票代碼）
+
+    Args:
+        tree: ttk.Treeview
+
+    Returns:
+        可見項目的 iid 集合
+    """
+    return {item for item in tree.get_children() if tree.bbox(item)}
@@ -0,0 +1,69 @@
+"""
+Single-flight 請求合併
+
+同一個 key 同時有多個執行緒請求時，只有第一個（leader）真正執行，
+其他執行緒等待並共用同一份結果（或同一個例外）。
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """一次進行中的請求"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """合併同一 key 的並行請求"""
+
+    def __init__(self):
+        """初始化"""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        執行 fn(*args, **kwargs)，同一 key 的並行呼叫只執行一次
+
+        Args:
+            key: 合併依據（例如股票代碼）
+            fn: 實際執行的函數
+
+        Returns:
+            fn 的回傳值（所有等待者收到同一個物件）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self) -> int:
+        """目前進行中的請求數"""
+        with self._lock:
+            return len(self._calls)
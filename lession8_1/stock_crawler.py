@@ -9,6 +9,8 @@ import asyncio
 from datetime import datetime
 from typing import Dict, Optional, List
 
+from quote_cache import QuoteCache
+
 # 嘗試匯入 twstock，若未安裝則使用備用方案
 try:
     import twstock
@@ -24,6 +26,8 @@ class StockCrawler:
     def __init__(self):
         """初始化爬蟲"""
         self.twstock_client = twstock
+        # 休市期間直接使用收盤後的快取報價
+        self.quote_cache = QuoteCache()
     
     def get_current_price(self, stock_code: str) -> Optional[float]:
         """
@@ -184,17 +188,32 @@ class StockCrawler:
         
         return result
     
-    async def fetch_multiple_stocks(self, stock_codes: List[str], max_concurrent: int = 5) -> List[Dict]:
+    async def fetch_multiple_stocks(
+        self,
+        stock_codes: List[str],
+        max_concurrent: int = 5,
+        force: bool = False
+    ) -> List[Dict]:
         """
         並行爬取多支股票資料
         
+        休市期間若快取中已有收盤後的資料，直接回傳而不連網。
+        
         Args:
             stock_codes: 股票代碼列表
             max_concurrent: 最大並行數量
+            force: 忽略快取強制抓取（開盤前暖機使用）
         
         Returns:
             股票資料列表
         """
+        if force:
+            cached_results, stock_codes = [], list(stock_codes)
+        else:
+            cached_results, stock_codes = self.quote_cache.split(stock_codes)
+        if not stock_codes:
+            return cached_results
+        
         semaphore = asyncio.Semaphore(max_concurrent)
         
         async def fetch_with_semaphore(code):
@@ -209,8 +228,10 @@ class StockCrawler:
         for result in results:
             if isinstance(result, dict):
                 valid_results.append(result)
+                if result['status'] == 'success':
+                    self.quote_cache.put(result['stock_code'], result)
         
-        return valid_results
+        return cached_results + valid_results
 
 
 # ==================== 測試程式 ====================
@@ -16,7 +16,9 @@ import csv
 import json
 from datetime import datetime
 from typing import List, Dict
+import numpy as np
 from stock_financial_crawler import SimpleStockCrawler
+from stock_screener import StockTable, screen
 
 
 # ==================== 範例 1: 基本單支股票爬蟲 ====================
@@ -146,29 +148,24 @@ async def example_3_data_analysis(results: List[Dict]):
         print("沒有有效的數據")
         return
     
+    # 轉成欄位式陣列一次，之後的排序與統計都是整個陣列運算
+    table = StockTable.from_records(valid_results)
+    
     print("\n【殖利率排序】（高到低）")
     print("-" * 80)
-    sorted_by_yield = sorted(
-        valid_results,
-        key=lambda x: x['dividend_yield'] if x['dividend_yield'] else 0,
-        reverse=True
-    )
-    for i, r in enumerate(sorted_by_yield, 1):
+    for i, r in enumerate(table.rows(screen(table, rank_by=['dividend_yield'])), 1):
         print(f"{i}. {r['stock_code']}: {r['dividend_yield']}%")
     
     print("\n【年化報酬率排序】（高到低）")
     print("-" * 80)
-    sorted_by_return = sorted(
-        valid_results,
-        key=lambda x: x['annual_return_rate'] if x['annual_return_rate'] else 0,
-        reverse=True
-    )
-    for i, r in enumerate(sorted_by_return, 1):
+    for i, r in enumerate(table.rows(screen(table, rank_by=['annual_return_rate'])), 1):
         print(f"{i}. {r['stock_code']}: {r['annual_return_rate']}%")
     
-    # 計算平均值
-    avg_yield = sum(r['dividend_yield'] for r in valid_results if r['dividend_yield']) / len([r for r in valid_results if r['dividend_yield']])
-    avg_return = sum(r['annual_return_rate'] for r in valid_results if r['annual_return_rate']) / len([r for r in valid_results if r['annual_return_rate']])
+    # 計算平均值（與原本相同：0 視為沒有資料，不計入平均）
+    yields = table['dividend_yield']
+    returns = table['annual_return_rate']
+    avg_yield = np.nanmean(np.where(yields != 0, yields, np.nan))
+    avg_return = np.nanmean(np.where(returns != 0, returns, np.nan))
     
     print("\n【統計數據】")
     print("-" * 80)
@@ -5,7 +5,7 @@
 1. 載入台灣股票清單
 2. 搜尋股票
 3. 選擇股票加入觀察清單
-4. 每隔 1 分鐘自動更新股票資訊
+4. 自動更新股票資訊（依可見度與波動度排程，休市暫停）
 5. 顯示: 股票代碼、股票名稱、即時股價、成交量、更新時間
 """
 
@@ -16,8 +16,10 @@ import asyncio
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from taiwan_stock_crawler import TaiwanStockCrawler
+from virtual_list import VirtualListView
+from refresh_scheduler import RefreshScheduler, visible_in_treeview
 
 
 class StockMonitorGUI:
@@ -43,6 +45,7 @@ class StockMonitorGUI:
         self.auto_update_enabled = False
         self.update_timer = None
         self.update_thread = None
+        self.scheduler = RefreshScheduler()
         
         # 設定檔路徑
         self.watchlist_file = "watchlist.json"
@@ -95,7 +98,7 @@ class StockMonitorGUI:
         self.auto_update_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(
             toolbar,
-            text="自動更新 (每分鐘)",
+            text="自動更新 (智慧排程)",
             variable=self.auto_update_var,
             command=self.toggle_auto_update
         ).pack(side=tk.LEFT, padx=5)
@@ -134,31 +137,13 @@ class StockMonitorGUI:
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
-        # 股票列表 (Treeview)
-        tree_frame = ttk.Frame(left_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Treeview
-        self.stock_tree = ttk.Treeview(
-            tree_frame,
-            columns=('code', 'name'),
-            height=20,
-            yscrollcommand=scrollbar.set
+        # 股票列表 (虛擬清單：資料留在陣列中，只繪製可見列)
+        self.stock_list = VirtualListView(
+            left_frame,
+            columns=(('代碼', 60), ('名稱', 120)),
+            on_activate=self.on_stock_activate
         )
-        self.stock_tree.column('#0', width=0, stretch=tk.NO)
-        self.stock_tree.column('code', anchor=tk.W, width=60)
-        self.stock_tree.column('name', anchor=tk.W, width=120)
-        self.stock_tree.heading('code', text='代碼')
-        self.stock_tree.heading('name', text='名稱')
-        self.stock_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.stock_tree.yview)
-        
-        # 雙擊加入觀察
-        self.stock_tree.bind('<Double-Button-1>', self.on_stock_double_click)
+        self.stock_list.pack(fill=tk.BOTH, expand=True)
         
         # 加入按鈕
         ttk.Button(
@@ -235,10 +220,6 @@ class StockMonitorGUI:
     
     def refresh_stock_list(self):
         """刷新股票清單顯示"""
-        # 清空
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
         # 取得選中的行業
         selected_industry = self.industry_var.get()
         
@@ -253,33 +234,29 @@ class StockMonitorGUI:
             else:
                 stocks_to_display = []
         
-        # 搜尋篩選
-        search_text = self.search_var.get().lower()
-        for code, name in stocks_to_display:
-            if search_text in code.lower() or search_text in name.lower():
-                self.stock_tree.insert('', 'end', values=(code, name))
+        # 設定資料並套用搜尋篩選
+        self.stock_list.set_rows(stocks_to_display, filter_text=self.search_var.get())
     
     def on_industry_changed(self, *args):
         """行業別變更時觸發"""
         self.refresh_stock_list()
     
     def on_search_changed(self, *args):
-        """搜尋框變更時觸發"""
-        self.refresh_stock_list()
+        """搜尋框變更時觸發（只重新篩選，不重建清單）"""
+        self.stock_list.set_filter(self.search_var.get())
     
-    def on_stock_double_click(self, event):
+    def on_stock_activate(self, row):
         """雙擊股票項目時加入觀察"""
         self.add_to_watchlist()
     
     def add_to_watchlist(self):
         """加入股票到觀察清單"""
-        selection = self.stock_tree.selection()
+        selection = self.stock_list.get_selected()
         if not selection:
             messagebox.showwarning("提示", "請先選擇一支股票")
             return
         
-        item = selection[0]
-        code, name = self.stock_tree.item(item, 'values')
+        code, name = selection
         
         if code in self.watchlist:
             messagebox.showinfo("提示", f"股票 {code} 已在觀察清單中")
@@ -335,7 +312,7 @@ class StockMonitorGUI:
             if isinstance(volume, int):
                 volume = f"{volume:,}"
             
-            self.watch_tree.insert('', 'end', values=(code, name, price, volume, timestamp))
+            self.watch_tree.insert('', 'end', iid=code, values=(code, name, price, volume, timestamp))
     
     def save_watchlist(self):
         """保存觀察清單到檔案"""
@@ -363,22 +340,33 @@ class StockMonitorGUI:
         
         self.update_stocks()
     
-    def update_stocks(self):
-        """更新股票資訊"""
+    def update_stocks(self, codes: Optional[List[str]] = None, force: bool = False):
+        """
+        更新股票資訊
+        
+        Args:
+            codes: 要更新的股票代碼（預設為整個觀察清單）
+            force: 忽略休市快取強制抓取（開盤前暖機）
+        """
+        if codes is None:
+            codes = list(self.watchlist)
+        
         def update_task():
+            prices = {}
             try:
                 # 在事件迴圈中執行
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
                 
                 results = loop.run_until_complete(
-                    self.crawler.fetch_multiple_stocks(list(self.watchlist))
+                    self.crawler.fetch_multiple_stocks(codes, force=force)
                 )
                 
                 # 更新快取
                 for result in results:
                     code = result['code']
                     self.stock_data_cache[code] = result
+                    prices[code] = result.get('price')
                 
                 # 更新 UI
                 self.root.after(0, self.refresh_watchlist_display)
@@ -390,6 +378,10 @@ class StockMonitorGUI:
             except Exception as e:
                 self.root.after(0, lambda: messagebox.showerror("錯誤", f"更新失敗: {e}"))
                 self.root.after(0, lambda: self.status_label.config(text="錯誤", foreground="red"))
+            finally:
+                # 回報排程器（失敗的股票價格為 None）
+                for code in codes:
+                    self.scheduler.complete(code, prices.get(code))
         
         thread = threading.Thread(target=update_task, daemon=True)
         thread.start()
@@ -406,11 +398,23 @@ class StockMonitorGUI:
                 self.update_timer = None
     
     def schedule_auto_update(self):
-        """排程自動更新"""
-        if self.auto_update_enabled:
-            self.update_stocks()
-            # 60 秒後再更新
-            self.update_timer = self.root.after(60000, self.schedule_auto_update)
+        """排程自動更新（每個 tick 只更新到期的股票，休市時暫停）"""
+        if not self.auto_update_enabled:
+            return
+        
+        if self.watchlist and self.scheduler.warmup_due():
+            # 開盤前暖機：整個觀察清單抓取一次
+            self.update_stocks(force=True)
+        elif not self.scheduler.is_market_open():
+            self.status_label.config(text="休市中，自動更新暫停", foreground="gray")
+        else:
+            self.scheduler.set_symbols(self.watchlist)
+            self.scheduler.set_visible(visible_in_treeview(self.watch_tree))
+            due_codes = self.scheduler.due_symbols()
+            if due_codes:
+                self.update_stocks(due_codes)
+        
+        self.update_timer = self.root.after(self.scheduler.tick_ms, self.schedule_auto_update)
     
     def on_closing(self):
         """應用關閉時"""
@@ -19,6 +19,8 @@ from datetime import datetime
 from typing import Dict, List, Set, Tuple, Optional
 import random
 from taiwan_stock_crawler import TaiwanStockCrawler
+from virtual_list import VirtualListView
+from refresh_scheduler import RefreshScheduler, visible_in_canvas
 
 
 class StockCardFrame(ttk.Frame):
@@ -247,6 +249,7 @@ class StockMonitorGUIv2:
         # 自動更新
         self.auto_update_enabled = False
         self.update_timer = None
+        self.scheduler = RefreshScheduler()
         
         # 設定檔路徑
         self.watchlist_file = "watchlist_v2.json"
@@ -330,7 +333,7 @@ class StockMonitorGUIv2:
         self.auto_update_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(
             toolbar,
-            text="自動更新 (每分鐘)",
+            text="自動更新 (智慧排程)",
             variable=self.auto_update_var,
             command=self.toggle_auto_update
         ).pack(side=tk.LEFT, padx=5)
@@ -369,31 +372,13 @@ class StockMonitorGUIv2:
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
-        # 股票列表 (Treeview)
-        tree_frame = ttk.Frame(left_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Treeview
-        self.stock_tree = ttk.Treeview(
-            tree_frame,
-            columns=('code', 'name'),
-            height=15,
-            yscrollcommand=scrollbar.set
+        # 股票列表 (虛擬清單：資料留在陣列中，只繪製可見列)
+        self.stock_list = VirtualListView(
+            left_frame,
+            columns=(('代碼', 60), ('名稱', 100)),
+            on_activate=self.on_stock_activate
         )
-        self.stock_tree.column('#0', width=0, stretch=tk.NO)
-        self.stock_tree.column('code', anchor=tk.W, width=60)
-        self.stock_tree.column('name', anchor=tk.W, width=100)
-        self.stock_tree.heading('code', text='代碼')
-        self.stock_tree.heading('name', text='名稱')
-        self.stock_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.stock_tree.yview)
-        
-        # 雙擊加入觀察
-        self.stock_tree.bind('<Double-Button-1>', self.on_stock_double_click)
+        self.stock_list.pack(fill=tk.BOTH, expand=True)
         
         # 加入按鈕
         ttk.Button(
@@ -475,15 +460,11 @@ class StockMonitorGUIv2:
     
     def refresh_stock_list(self):
         """刷新股票清單顯示"""
-        # 清空
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
         # 取得選中的行業
         selected_industry = self.industry_var.get()
 
         # 若選擇行業，則顯示該行業市值前 10 支股票；若為全部，顯示全市場（或全部清單）
         industries_dict = self.crawler.get_industries()
-        search_text = self.search_var.get().lower()
 
         stocks_to_display: List[Tuple[str, str]] = []
         if selected_industry == "全部":
@@ -499,10 +480,8 @@ class StockMonitorGUIv2:
                 top10 = [ (it['code'], it['name']) for it in sorted(mcap_list, key=lambda x: x.get('market_cap',0), reverse=True)[:10] ]
                 stocks_to_display = top10
 
-        # 搜尋篩選並填充 Treeview
-        for code, name in stocks_to_display:
-            if search_text in code.lower() or search_text in name.lower():
-                self.stock_tree.insert('', 'end', values=(code, name))
+        # 設定虛擬清單資料並套用搜尋篩選
+        self.stock_list.set_rows(stocks_to_display, filter_text=self.search_var.get())
     
     def load_stocks_in_background(self):
         """在背景線程載入股票清單"""
@@ -604,8 +583,8 @@ class StockMonitorGUIv2:
         self.update_heatmap_by_selection()
     
     def on_search_changed(self, *args):
-        """搜尋框變更時觸發"""
-        self.refresh_stock_list()
+        """搜尋框變更時觸發（只重新篩選，不重建清單）"""
+        self.stock_list.set_filter(self.search_var.get())
     
     def on_market_changed(self, *args):
         """市場變更時觸發"""
@@ -617,19 +596,18 @@ class StockMonitorGUIv2:
                 self.market_var.set('台股')
             self.refresh_stock_list()
     
-    def on_stock_double_click(self, event):
+    def on_stock_activate(self, row):
         """雙擊股票項目時加入觀察"""
         self.add_to_watchlist()
     
     def add_to_watchlist(self):
         """加入股票到觀察清單"""
-        selection = self.stock_tree.selection()
+        selection = self.stock_list.get_selected()
         if not selection:
             messagebox.showwarning("提示", "請先選擇一支股票")
             return
         
-        item = selection[0]
-        code, name = self.stock_tree.item(item, 'values')
+        code, name = selection
         
         if code in self.watchlist:
             messagebox.showinfo("提示", f"股票 {code} 已在觀察清單中")
@@ -673,20 +651,31 @@ class StockMonitorGUIv2:
             del self.card_widgets[code]
         self.layout_cards()
     
-    def update_stocks(self):
-        """更新股票資訊"""
+    def update_stocks(self, codes: Optional[List[str]] = None, force: bool = False):
+        """
+        更新股票資訊
+        
+        Args:
+            codes: 要更新的股票代碼（預設為整個觀察清單）
+            force: 忽略休市快取強制抓取（開盤前暖機）
+        """
+        if codes is None:
+            codes = list(self.watchlist)
+        
         def update_task():
+            prices = {}
             try:
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
                 
                 results = loop.run_until_complete(
-                    self.crawler.fetch_multiple_stocks(list(self.watchlist))
+                    self.crawler.fetch_multiple_stocks(codes, force=force)
                 )
                 
                 for result in results:
                     code = result['code']
                     self.stock_data_cache[code] = result
+                    prices[code] = result.get('price')
                     
                     # 更新卡片
                     if code in self.card_widgets:
@@ -710,6 +699,10 @@ class StockMonitorGUIv2:
             except Exception as e:
                 self.root.after(0, lambda: messagebox.showerror("錯誤", f"更新失敗: {e}"))
                 self.root.after(0, lambda: self.status_label.config(text="錯誤", foreground="red"))
+            finally:
+                # 回報排程器（失敗的股票價格為 None）
+                for code in codes:
+                    self.scheduler.complete(code, prices.get(code))
         
         thread = threading.Thread(target=update_task, daemon=True)
         thread.start()
@@ -736,10 +729,23 @@ class StockMonitorGUIv2:
                 self.update_timer = None
     
     def schedule_auto_update(self):
-        """排程自動更新"""
-        if self.auto_update_enabled:
-            self.update_stocks()
-            self.update_timer = self.root.after(60000, self.schedule_auto_update)
+        """排程自動更新（每個 tick 只更新到期的股票，休市時暫停）"""
+        if not self.auto_update_enabled:
+            return
+        
+        if self.watchlist and self.scheduler.warmup_due():
+            # 開盤前暖機：整個觀察清單抓取一次
+            self.update_stocks(force=True)
+        elif not self.scheduler.is_market_open():
+            self.status_label.config(text="休市中，自動更新暫停", foreground="gray")
+        else:
+            self.scheduler.set_symbols(self.watchlist)
+            self.scheduler.set_visible(visible_in_canvas(self.canvas, self.card_widgets))
+            due_codes = self.scheduler.due_symbols()
+            if due_codes:
+                self.update_stocks(due_codes)
+        
+        self.update_timer = self.root.after(self.scheduler.tick_ms, self.schedule_auto_update)
     
     def save_watchlist(self):
         """保存觀察清單到檔案"""
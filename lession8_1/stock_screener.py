@@ -0,0 +1,338 @@
+"""
+股票篩選引擎（欄位式 NumPy 陣列）
+
+example_3_data_analysis、quick_compare_stocks 以 list of dict 排序兩次、
+再用好幾個 list comprehension 計算平均，每一步都重新走過整個列表。
+這裡把股票資料轉成欄位式陣列（每個指標一個 float64 陣列，缺值為 NaN），
+篩選、多鍵排序、百分位排名與綜合分數都是整個陣列一次運算：
+
+    table = StockTable.from_records(results)
+    order = screen(table,
+                   filters=[('dividend_yield', '>', 4), ('annual_return_rate', '>', 0)],
+                   rank_by=[('dividend_yield', True), ('annual_return_rate', True)])
+    for row in table.rows(order):
+        ...
+
+全市場約 1,800 檔股票的篩選 + 排序 + 百分位排名 + 綜合分數不到 1 毫秒（執行本檔可看到實測）。
+
+投資決策（quick_start.quick_investment_decision 的 if / elif）以資料表 INVESTMENT_RULES 表示，
+investment_decisions 以 np.select 一次替整個市場或整段歷史（數百萬列）標上決策。
+"""
+
+import operator
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+# 數值欄位（from_records 預設讀取的欄位）
+COLUMNS = ('current_price', 'dividend_yield', 'annual_return_rate')
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+Filter = Tuple[str, str, float]
+RankKey = Union[str, Tuple[str, bool]]
+
+
+# ==================== 欄位式資料表 ====================
+
+class StockTable:
+    """股票代碼 + 每個指標一個 float64 陣列（缺值為 NaN）"""
+
+    def __init__(self, codes: Sequence[str], columns: Dict[str, np.ndarray]):
+        self.codes = np.asarray(codes, dtype=object)
+        self.columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+        for name, values in self.columns.items():
+            if len(values) != len(self.codes):
+                raise ValueError(f"欄位 {name} 有 {len(values)} 筆，股票代碼有 {len(self.codes)} 筆")
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Dict[str, Any]],
+        columns: Sequence[str] = COLUMNS,
+        code_key: str = 'stock_code'
+    ) -> "StockTable":
+        """
+        由 SimpleStockCrawler.fetch_stock_info 的結果建立（只轉換一次）
+
+        Args:
+            records: 結果 dict 列表（沒有的欄位或 None 轉為 NaN）
+            columns: 要讀取的數值欄位
+            code_key: 股票代碼欄位
+        """
+        records = list(records)
+        codes = [record.get(code_key) for record in records]
+        data = {
+            name: np.array(
+                [np.nan if record.get(name) is None else record[name] for record in records],
+                dtype=np.float64
+            )
+            for name in columns
+        }
+        return cls(codes, data)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def add_column(self, name: str, values: np.ndarray):
+        """加入計算出來的欄位（例如綜合分數）"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) != len(self):
+            raise ValueError(f"欄位 {name} 有 {len(values)} 筆，資料表有 {len(self)} 筆")
+        self.columns[name] = values
+
+    def take(self, indices: np.ndarray) -> "StockTable":
+        """取出部分列（依 indices 的順序）"""
+        return StockTable(self.codes[indices], {name: values[indices] for name, values in self.columns.items()})
+
+    def rows(self, indices: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """轉回 dict 列表（顯示用；NaN 轉為 None）"""
+        if indices is None:
+            indices = np.arange(len(self))
+        names = list(self.columns)
+        values = np.column_stack([self.columns[name][indices] for name in names]) if names else None
+        rows = []
+        for i, code in enumerate(self.codes[indices]):
+            row = {'stock_code': code}
+            for j, name in enumerate(names):
+                value = values[i, j]
+                row[name] = None if np.isnan(value) else float(value)
+            rows.append(row)
+        return rows
+
+
+# ==================== 篩選與排名 ====================
+
+def filter_mask(table: StockTable, filters: Iterable[Filter]) -> np.ndarray:
+    """
+    所有條件都成立的列（缺值一律不成立）
+
+    Args:
+        filters: [(欄位, 運算子, 門檻), ...]，例如 ('dividend_yield', '>', 5)
+    """
+    mask = np.ones(len(table), dtype=bool)
+    for name, op, threshold in filters:
+        values = table[name]
+        mask &= OPERATORS[op](values, threshold) & ~np.isnan(values)
+    return mask
+
+
+def rank(table: StockTable, keys: Sequence[RankKey], indices: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    多鍵排序（穩定排序：所有鍵都相同時保持原本順序；缺值排在最後）
+
+    Args:
+        keys: ['欄位'] 或 [('欄位', 是否由高到低), ...]，第一個鍵優先；只給欄位名稱時為由高到低
+        indices: 只排序這些列（例如篩選後的結果）
+
+    Returns:
+        排序後的列索引
+    """
+    if indices is None:
+        indices = np.arange(len(table))
+    if not keys:
+        return indices
+    sort_keys = []
+    for key in reversed(keys):  # np.lexsort 以最後一個鍵為主要鍵
+        name, descending = (key, True) if isinstance(key, str) else key
+        values = table[name][indices]
+        values = -values if descending else values
+        sort_keys.append(np.where(np.isnan(values), np.inf, values))
+    return indices[np.lexsort(sort_keys)]
+
+
+def percentile_rank(values: np.ndarray) -> np.ndarray:
+    """
+    百分位排名（0 = 最低、100 = 最高；相同數值取平均排名；缺值為 NaN）
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    valid = ~np.isnan(values)
+    count = int(valid.sum())
+    if count == 0:
+        return result
+    if count == 1:
+        result[valid] = 100.0
+        return result
+    # 排序一次，相同數值為一組，組內每一個都取 (第一個位置 + 最後一個位置) / 2
+    # （比對每個值做 searchsorted 快好幾倍：未排序的查詢對快取很不友善）
+    present = values[valid]
+    order = np.argsort(present)
+    ordered = present[order]
+    starts_group = np.empty(count, dtype=bool)
+    starts_group[0] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=starts_group[1:])
+    starts = np.flatnonzero(starts_group)
+    ends = np.append(starts[1:], count) - 1
+    group = np.cumsum(starts_group) - 1
+    ranks = np.empty(count)
+    ranks[order] = (starts + ends)[group] * (50 / (count - 1))
+    result[valid] = ranks
+    return result
+
+
+def composite_score(table: StockTable, weights: Dict[str, float]) -> np.ndarray:
+    """
+    綜合分數：各欄位百分位排名的加權平均（0～100；任一欄位缺值時為 NaN）
+
+    Args:
+        weights: {欄位: 權重}；權重為負時表示數值越低越好
+    """
+    total = sum(abs(weight) for weight in weights.values())
+    score = np.zeros(len(table))
+    for name, weight in weights.items():
+        percentile = percentile_rank(table[name])
+        score += abs(weight) * (percentile if weight >= 0 else 100 - percentile)
+    return score / total
+
+
+# ==================== 投資決策規則 ====================
+
+# 由上而下第一個成立的規則決定結果（與 if / elif 相同），條件之間為 and
+INVESTMENT_RULES: List[Tuple[str, List[Filter]]] = [
+    ("💰 強烈買入", [('dividend_yield', '>', 5), ('return_rate', '>', 0)]),
+    ("📈 買入", [('dividend_yield', '>', 3), ('return_rate', '>', 0)]),
+    ("🚀 高成長", [('return_rate', '>', 15)]),
+    ("🤔 可考慮", [('dividend_yield', '>', 5)]),
+]
+DEFAULT_DECISION = "⚠️  觀望"
+
+# 決策代碼對應的文字：0..len(INVESTMENT_RULES)-1 為各規則，最後一個為預設
+DECISION_LABELS = np.array([label for label, _ in INVESTMENT_RULES] + [DEFAULT_DECISION], dtype=object)
+
+
+def decide(dividend_yield: float, return_rate: float) -> str:
+    """單一股票的投資決策（逐條檢查 INVESTMENT_RULES）"""
+    values = {'dividend_yield': dividend_yield, 'return_rate': return_rate}
+    for label, conditions in INVESTMENT_RULES:
+        if all(OPERATORS[op](values[name], threshold) for name, op, threshold in conditions):
+            return label
+    return DEFAULT_DECISION
+
+
+def decision_codes(dividend_yield: np.ndarray, return_rate: np.ndarray) -> np.ndarray:
+    """
+    整批投資決策代碼（DECISION_LABELS 的索引）
+
+    Args:
+        dividend_yield: 殖利率陣列（%）
+        return_rate: 年化報酬率陣列（%），與 dividend_yield 可互相廣播
+
+    Returns:
+        int8 陣列；NaN 的比較一律不成立，與逐筆判斷相同
+    """
+    values = {
+        'dividend_yield': np.asarray(dividend_yield, dtype=np.float64),
+        'return_rate': np.asarray(return_rate, dtype=np.float64),
+    }
+    conditions = []
+    for _, rule in INVESTMENT_RULES:
+        condition = True
+        for name, op, threshold in rule:
+            condition = OPERATORS[op](values[name], threshold) & condition
+        conditions.append(condition)
+    choices = np.arange(len(INVESTMENT_RULES), dtype=np.int8)
+    shape = np.broadcast_shapes(values['dividend_yield'].shape, values['return_rate'].shape)
+    conditions = [np.broadcast_to(condition, shape) for condition in conditions]
+    return np.select(conditions, choices, default=len(INVESTMENT_RULES)).astype(np.int8)
+
+
+def investment_decisions(dividend_yield: np.ndarray, return_rate: np.ndarray) -> np.ndarray:
+    """
+    整批投資決策文字（與 decide / quick_investment_decision 逐筆判斷的結果相同）
+
+    Returns:
+        決策文字陣列（dtype=object）；只需要分組統計時用 decision_codes 較省記憶體
+    """
+    return DECISION_LABELS[decision_codes(dividend_yield, return_rate)]
+
+
+def screen(
+    table: StockTable,
+    filters: Iterable[Filter] = (),
+    rank_by: Sequence[RankKey] = (),
+    top: Optional[int] = None
+) -> np.ndarray:
+    """
+    篩選後排序
+
+    Returns:
+        符合條件的列索引（依 rank_by 排序，最多 top 筆）
+    """
+    indices = np.flatnonzero(filter_mask(table, filters))
+    order = rank(table, rank_by, indices)
+    return order[:top] if top is not None else order
+
+
+if __name__ == "__main__":
+    import time
+
+    # 模擬全市場 1,800 檔股票
+    rng = np.random.default_rng(0)
+    count = 1800
+    records = [
+        {
+            'stock_code': str(1101 + i),
+            'current_price': float(rng.uniform(10, 1000)),
+            'dividend_yield': None if rng.random() < 0.05 else round(float(rng.gamma(2, 1.5)), 2),
+            'annual_return_rate': round(float(rng.normal(5, 15)), 2),
+        }
+        for i in range(count)
+    ]
+    table = StockTable.from_records(records)
+
+    # 與 list of dict 的寫法比對結果
+    order = screen(table, [('dividend_yield', '>', 4), ('annual_return_rate', '>', 0)],
+                   [('dividend_yield', True), ('annual_return_rate', True)])
+    expected = sorted(
+        (r for r in records if r['dividend_yield'] is not None and r['dividend_yield'] > 4 and r['annual_return_rate'] > 0),
+        key=lambda r: (-r['dividend_yield'], -r['annual_return_rate'])
+    )
+    assert list(table.codes[order]) == [r['stock_code'] for r in expected]
+
+    def run():
+        order = screen(table, [('dividend_yield', '>', 4), ('annual_return_rate', '>', 0)],
+                       [('dividend_yield', True), ('annual_return_rate', True)])
+        score = composite_score(table, {'dividend_yield': 0.5, 'annual_return_rate': 0.5})
+        return order, score, np.nanmean(table['dividend_yield'])
+
+    repeat = 1000
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{count} 檔：篩選 + 雙鍵排序 + 兩欄百分位排名 + 綜合分數 + 平均 {elapsed * 1e6:.0f} µs")
+
+    # 決策規則：與逐筆判斷比對，並量測數百萬列的速度
+    yields = np.round(rng.gamma(2, 1.5, 2_000_000), 2)
+    returns = np.round(rng.normal(5, 15, 2_000_000), 2)
+    edges = np.array([np.nan, -np.inf, np.inf, -1, 0, 3, 5, 15, 3.01, 5.01, 15.01])
+    yields[:edges.size ** 2] = np.repeat(edges, edges.size)
+    returns[:edges.size ** 2] = np.tile(edges, edges.size)
+    start = time.perf_counter()
+    labels = investment_decisions(yields, returns)
+    elapsed = time.perf_counter() - start
+    sample = rng.choice(len(yields), 20_000, replace=False)
+    sample = np.concatenate([np.arange(edges.size ** 2), sample])
+    assert all(labels[i] == decide(yields[i], returns[i]) for i in sample)
+    codes, counts = np.unique(decision_codes(yields, returns), return_counts=True)
+    print(f"\n{len(yields):,} 列投資決策 {elapsed * 1000:.0f} ms（與逐筆判斷抽樣比對一致）")
+    for code, count in zip(codes, counts):
+        print(f"  {DECISION_LABELS[code]}: {count:,}")
+
+    table.add_column('score', composite_score(table, {'dividend_yield': 0.5, 'annual_return_rate': 0.5}))
+    print("\n綜合分數前 5 名:")
+    for row in table.rows(rank(table, ['score'])[:5]):
+        print(f"  {row['stock_code']}: 殖利率 {row['dividend_yield']}%  報酬率 {row['annual_return_rate']}%  "
+              f"分數 {row['score']:.1f}")
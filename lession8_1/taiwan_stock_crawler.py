@@ -6,9 +6,13 @@
 import asyncio
 import threading
 import random
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
 from typing import Dict, List, Optional, Tuple
 
+from quote_cache import QuoteCache
+from single_flight import SingleFlight
+
 # 台灣股票清單 - 按行業別分類（市值前30大）
 # 資料參考: 台灣證交所、各行業代表公司
 
@@ -108,6 +112,10 @@ class TaiwanStockCrawler:
         """初始化爬蟲"""
         self.stock_cache = {}
         self.update_times = {}
+        # 短 TTL 報價快取（休市期間直接使用收盤後的報價）
+        self.quote_cache = QuoteCache(ttl=timedelta(seconds=10))
+        # 同一股票的並行請求只抓取一次
+        self.single_flight = SingleFlight()
     
     @staticmethod
     def load_stock_list() -> List[Tuple[str, str]]:
@@ -145,10 +153,38 @@ class TaiwanStockCrawler:
         """
         return TAIWAN_STOCKS_BY_INDUSTRY
     
+    def get_stock_info(self, stock_code: str, force: bool = False) -> Dict:
+        """
+        取得單支股票的即時資訊（經過快取與 single-flight 合併）
+        
+        GUI 的 update_stocks、compute_market_caps_for_list、build_market_toplist
+        可能同時查詢同一支股票：TTL 內直接回傳快取，
+        進行中的請求則由所有呼叫者共用結果。
+        
+        Args:
+            stock_code: 股票代碼
+            force: 略過快取（仍會與進行中的請求合併）
+        
+        Returns:
+            同 fetch_stock_info
+        """
+        if not force:
+            cached = self.quote_cache.get(stock_code)
+            if cached is not None:
+                return cached
+        return self.single_flight.do(stock_code, self._load_stock_info, stock_code)
+    
+    def _load_stock_info(self, stock_code: str) -> Dict:
+        """實際抓取並寫入快取（由 single-flight 的 leader 執行）"""
+        info = self.fetch_stock_info(stock_code)
+        if info['status'] == 'success':
+            self.quote_cache.put(stock_code, info)
+        return info
+    
     @staticmethod
-    def get_stock_info(stock_code: str) -> Dict:
+    def fetch_stock_info(stock_code: str) -> Dict:
         """
-        取得單支股票的即時資訊
+        取得單支股票的即時資訊（直接抓取，不經快取）
         
         Args:
             stock_code: 股票代碼
@@ -215,30 +251,43 @@ class TaiwanStockCrawler:
     async def fetch_multiple_stocks(
         self,
         stock_codes: List[str],
-        max_concurrent: int = 10
+        max_concurrent: int = 10,
+        force: bool = False
     ) -> List[Dict]:
         """
         並行取得多支股票資訊
         
+        休市期間若快取中已有收盤後的報價，直接回傳而不連網。
+        
         Args:
             stock_codes: 股票代碼列表
             max_concurrent: 最大並行數
+            force: 忽略快取強制抓取（開盤前暖機使用）
         
         Returns:
             股票資訊列表
         """
+        if force:
+            cached_results, stock_codes = [], list(stock_codes)
+        else:
+            cached_results, stock_codes = self.quote_cache.split(stock_codes)
+        if not stock_codes:
+            return cached_results
+        
         semaphore = asyncio.Semaphore(max_concurrent)
         
         async def fetch_with_semaphore(code):
             async with semaphore:
                 loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(None, self.get_stock_info, code)
+                return await loop.run_in_executor(None, partial(self.get_stock_info, code, force))
         
         tasks = [fetch_with_semaphore(code) for code in stock_codes]
         results = await asyncio.gather(*tasks)
         
-        # 過濾有效結果
-        return [r for r in results if r and r['status'] == 'success']
+        # 過濾有效結果（get_stock_info 已寫入快取）
+        valid_results = [r for r in results if r and r['status'] == 'success']
+        
+        return cached_results + valid_results
     
     def search_stocks(self, keyword: str, industry: Optional[str] = None) -> List[Tuple[str, str]]:
         """
@@ -0,0 +1,98 @@
+"""
+trading_calendar 測試（主機時區設為非台北時間）
+
+- 盤中判斷、最近收盤、下一次開盤都以台北時間計算
+- 呼叫端傳入的 UTC 時間、沒有時區的本機時間都會先轉為台北時間
+- 開盤前暖機與收盤後的報價快取不受主機時區影響
+
+執行方式:
+    python -m unittest lession8_1/test_trading_calendar.py
+"""
+
+import os
+import sys
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from quote_cache import QuoteCache
+from refresh_scheduler import RefreshScheduler
+from trading_calendar import TAIPEI, TWSE_CALENDAR
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@unittest.skipUnless(hasattr(time, 'tzset'), "需要 time.tzset 才能切換主機時區")
+class NonTaipeiHostTest(unittest.TestCase):
+    """主機時區為 America/New_York（冬令 UTC-5，與台北相差 13 小時）"""
+
+    def setUp(self):
+        self._saved_tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+
+    def tearDown(self):
+        if self._saved_tz is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = self._saved_tz
+        time.tzset()
+
+    # ==================== 盤中判斷 ====================
+
+    def test_is_open_uses_taipei_hours(self):
+        # 2026/01/05（一）10:00 台北 = 02:00 UTC
+        self.assertTrue(TWSE_CALENDAR.is_open(utc(2026, 1, 5, 2, 0)))
+        # 14:00 台北 = 06:00 UTC（已收盤）
+        self.assertFalse(TWSE_CALENDAR.is_open(utc(2026, 1, 5, 6, 0)))
+
+    def test_naive_time_is_host_local(self):
+        # 紐約 2026/01/04（日）21:00 = 台北 01/05（一）10:00
+        self.assertTrue(TWSE_CALENDAR.is_open(datetime(2026, 1, 4, 21, 0)))
+        # 紐約 2026/01/05（一）10:00 = 台北 23:00，已收盤
+        self.assertFalse(TWSE_CALENDAR.is_open(datetime(2026, 1, 5, 10, 0)))
+
+    def test_default_now_matches_current_taipei_time(self):
+        self.assertEqual(TWSE_CALENDAR.is_open(), TWSE_CALENDAR.is_open(datetime.now(timezone.utc)))
+
+    # ==================== 收盤 / 開盤 ====================
+
+    def test_last_close_and_next_open(self):
+        now = utc(2026, 1, 5, 2, 0)  # 台北週一盤中
+        self.assertEqual(TWSE_CALENDAR.last_close(now), datetime(2026, 1, 2, 13, 30, tzinfo=TAIPEI))
+        self.assertEqual(TWSE_CALENDAR.next_open(now), datetime(2026, 1, 6, 9, 0, tzinfo=TAIPEI))
+
+    def test_warmup_fires_before_taipei_open(self):
+        scheduler = RefreshScheduler()
+        # 台北 08:50：還沒到暖機時間（開盤前 5 分鐘）
+        self.assertFalse(scheduler.warmup_due(utc(2026, 1, 5, 0, 50)))
+        # 台北 08:56（紐約 19:56，沒有時區）
+        self.assertTrue(scheduler.warmup_due(datetime(2026, 1, 4, 19, 56)))
+        # 同一次開盤只暖機一次
+        self.assertFalse(scheduler.warmup_due(utc(2026, 1, 5, 0, 58)))
+
+    # ==================== 報價快取 ====================
+
+    def test_settled_quote_is_reused_overnight(self):
+        cache = QuoteCache()
+        quote = {'stock_code': '2330'}
+        # 台北 14:00 抓取（收盤價已確定），台北 22:00 再查詢
+        cache.put('2330', quote, utc(2026, 1, 5, 6, 0))
+        self.assertIs(cache.get('2330', utc(2026, 1, 5, 14, 0)), quote)
+        # 隔天盤中失效
+        self.assertIsNone(cache.get('2330', utc(2026, 1, 6, 2, 0)))
+
+    def test_quote_fetched_before_settle_is_refetched(self):
+        cache = QuoteCache()
+        cache.put('2330', {'stock_code': '2330'}, utc(2026, 1, 5, 5, 32))  # 台北 13:32
+        self.assertIsNone(cache.get('2330', utc(2026, 1, 5, 14, 0)))
+        self.assertTrue(cache.calendar.is_settled(utc(2026, 1, 5, 5, 40), utc(2026, 1, 5, 14, 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
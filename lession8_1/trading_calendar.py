@@ -0,0 +1,172 @@
+"""
+台灣證券交易所（TWSE）交易日曆
+
+提供盤中時段判斷、最近一次收盤時間與下一次開盤時間，
+休市日期來自本地表格（依證交所每年公告的「市場開休市日期」維護）。
+
+交易時段與休市日都以台北時間計：所有時間先轉為 Asia/Taipei 再比較，
+主機設定為其他時區（伺服器、CI、Docker）時結果相同。
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import FrozenSet, Iterable, Optional
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    TAIPEI = ZoneInfo('Asia/Taipei')
+except (ImportError, ZoneInfoNotFoundError):
+    # Windows 沒有安裝 tzdata 時找不到時區資料；台灣自 1979 年起不實施日光節約時間，固定 +8 即可
+    TAIPEI = timezone(timedelta(hours=8), 'Asia/Taipei')
+
+
+# 證交所休市日（不含週六、週日）
+# 資料來源: 臺灣證券交易所「市場開休市日期」公告，每年年底請依公告更新
+TWSE_HOLIDAYS: FrozenSet[date] = frozenset([
+    # ===== 2025 =====
+    date(2025, 1, 1),    # 中華民國開國紀念日
+    date(2025, 1, 23),   # 農曆春節前無交易
+    date(2025, 1, 24),   # 農曆春節前無交易
+    date(2025, 1, 27),   # 農曆除夕前一日（調整放假）
+    date(2025, 1, 28),   # 農曆除夕
+    date(2025, 1, 29),   # 春節
+    date(2025, 1, 30),   # 春節
+    date(2025, 1, 31),   # 春節
+    date(2025, 2, 28),   # 和平紀念日
+    date(2025, 4, 3),    # 兒童節（調整放假）
+    date(2025, 4, 4),    # 兒童節及民族掃墓節
+    date(2025, 5, 1),    # 勞動節
+    date(2025, 5, 30),   # 端午節（補假）
+    date(2025, 9, 29),   # 教師節（補假）
+    date(2025, 10, 6),   # 中秋節
+    date(2025, 10, 10),  # 國慶日
+    date(2025, 10, 24),  # 臺灣光復暨金門古寧頭大捷紀念日（補假）
+    date(2025, 12, 25),  # 行憲紀念日
+    # ===== 2026 =====
+    date(2026, 1, 1),    # 中華民國開國紀念日
+    date(2026, 2, 12),   # 農曆春節前無交易
+    date(2026, 2, 13),   # 農曆春節前無交易
+    date(2026, 2, 16),   # 農曆除夕
+    date(2026, 2, 17),   # 春節
+    date(2026, 2, 18),   # 春節
+    date(2026, 2, 19),   # 春節
+    date(2026, 2, 20),   # 春節（補假）
+    date(2026, 2, 27),   # 和平紀念日（補假）
+    date(2026, 4, 3),    # 兒童節（補假）
+    date(2026, 4, 6),    # 民族掃墓節（補假）
+    date(2026, 5, 1),    # 勞動節
+    date(2026, 6, 19),   # 端午節
+    date(2026, 9, 25),   # 中秋節
+    date(2026, 9, 28),   # 教師節
+    date(2026, 10, 9),   # 國慶日（補假）
+    date(2026, 10, 26),  # 臺灣光復暨金門古寧頭大捷紀念日（補假）
+    date(2026, 12, 25),  # 行憲紀念日
+])
+
+
+def taipei_time(moment: Optional[datetime] = None) -> datetime:
+    """
+    轉為台北時間
+
+    Args:
+        moment: 時間點（預設為現在；沒有時區的時間視為本機時間，與 datetime.now() 相同）
+
+    Returns:
+        帶 Asia/Taipei 時區的時間
+    """
+    if moment is None:
+        return datetime.now(TAIPEI)
+    return moment.astimezone(TAIPEI)
+
+
+class TradingCalendar:
+    """交易日曆 - 判斷盤中時段與收盤後的資料有效性"""
+
+    def __init__(
+        self,
+        holidays: Iterable[date] = TWSE_HOLIDAYS,
+        open_time: time = time(9, 0),
+        close_time: time = time(13, 30),
+        settle: timedelta = timedelta(minutes=5),
+        warmup: timedelta = timedelta(minutes=5)
+    ):
+        """
+        初始化交易日曆
+
+        Args:
+            holidays: 休市日期
+            open_time: 開盤時間
+            close_time: 收盤時間
+            settle: 收盤後多久收盤價視為確定（此後抓到的報價可整晚重複使用）
+            warmup: 開盤前多久進行一次暖機抓取
+        """
+        self.holidays = frozenset(holidays)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.settle = settle
+        self.warmup = warmup
+
+    def is_trading_day(self, day: date) -> bool:
+        """是否為交易日（平日且不在休市表中）"""
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        """目前是否為盤中時段"""
+        now = taipei_time(now)
+        return self.is_trading_day(now.date()) and self.open_time <= now.time() <= self.close_time
+
+    def last_close(self, now: Optional[datetime] = None) -> datetime:
+        """
+        最近一次（已發生的）收盤時間
+
+        Args:
+            now: 基準時間（預設為現在）
+
+        Returns:
+            收盤時間（台北時間）；盤中呼叫時返回前一個交易日的收盤
+        """
+        now = taipei_time(now)
+        day = now.date()
+        if now.time() < self.close_time or not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return datetime.combine(day, self.close_time, tzinfo=TAIPEI)
+
+    def next_open(self, now: Optional[datetime] = None) -> datetime:
+        """
+        下一次開盤時間（台北時間；盤中呼叫時返回下一個交易日的開盤）
+
+        Args:
+            now: 基準時間（預設為現在）
+        """
+        now = taipei_time(now)
+        day = now.date()
+        if now.time() >= self.open_time or not self.is_trading_day(day):
+            day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return datetime.combine(day, self.open_time, tzinfo=TAIPEI)
+
+    def next_warmup(self, now: Optional[datetime] = None) -> datetime:
+        """下一次開盤前的暖機時間"""
+        return self.next_open(now) - self.warmup
+
+    def is_settled(self, fetched_at: datetime, now: Optional[datetime] = None) -> bool:
+        """
+        在休市期間，某個時間點抓到的報價是否已是最新收盤價
+
+        Args:
+            fetched_at: 報價抓取時間
+            now: 基準時間（預設為現在）
+
+        Returns:
+            休市中且抓取時間晚於收盤價確定時間時返回 True
+        """
+        now = taipei_time(now)
+        if self.is_open(now):
+            return False
+        return taipei_time(fetched_at) >= self.last_close(now) + self.settle
+
+
+# 預設的台股交易日曆
+TWSE_CALENDAR = TradingCalendar()
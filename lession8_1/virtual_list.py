@@ -0,0 +1,265 @@
+"""
+虛擬捲動清單元件
+
+資料保存在 Python 陣列中，畫面上只繪製可見範圍內的列。
+列數與 widget 數量脫鉤：不論清單有 1,000 或 100,000 筆資料，
+Canvas 上永遠只有「可見列數」個文字物件，捲動時重複使用。
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+class VirtualListView(ttk.Frame):
+    """虛擬捲動清單 - 取代大量 insert 的 Listbox / Treeview"""
+
+    def __init__(
+        self,
+        parent,
+        columns: Sequence[Tuple[str, int]] = (("", 200),),
+        row_height: int = 22,
+        font=('Arial', 10),
+        show_header: bool = True,
+        on_activate: Optional[Callable[[Tuple], None]] = None
+    ):
+        """
+        初始化虛擬清單
+
+        Args:
+            parent: 父元件
+            columns: (欄位標題, 欄寬) 列表；欄寬決定下一欄的起點，
+                最後一欄的文字直接延伸到右側（其欄寬不影響排版）
+            row_height: 每列高度（像素）
+            font: 字型
+            show_header: 是否顯示欄位標題
+            on_activate: 雙擊或按 Enter 時的回調，參數為該列資料
+        """
+        super().__init__(parent)
+
+        self.columns = list(columns)
+        self.row_height = row_height
+        self.font = font
+        self.on_activate = on_activate
+
+        # 資料（Python 陣列）與目前的篩選結果（索引陣列）
+        self._rows: List[Tuple] = []
+        self._keys: List[str] = []
+        self._view: Sequence[int] = range(0)
+        self._filter_text = ""
+
+        # 捲動位置與選取狀態（皆以資料索引表示）
+        self._top = 0
+        self._selected: Optional[int] = None
+
+        # 可重複使用的列物件池: (背景矩形, [各欄文字])
+        self._pool: List[Tuple[int, List[int]]] = []
+
+        if show_header:
+            # 標題也畫在 Canvas 上，與資料列使用相同的欄位 x 座標（以像素對齊）
+            header = tk.Canvas(self, height=row_height, bg="#e8e8e8", highlightthickness=0)
+            header.pack(side=tk.TOP, fill=tk.X)
+            for (title, _), x in zip(self.columns, self._column_x()):
+                header.create_text(x, row_height // 2, anchor=tk.W, font=self.font, text=title)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0, takefocus=1)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind('<Configure>', self._on_configure)
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Double-Button-1>', self._on_double_click)
+        self.canvas.bind('<MouseWheel>', self._on_mousewheel)
+        self.canvas.bind('<Button-4>', self._on_mousewheel)  # Linux
+        self.canvas.bind('<Button-5>', self._on_mousewheel)  # Linux
+        self.canvas.bind('<Up>', lambda e: self._move_selection(-1))
+        self.canvas.bind('<Down>', lambda e: self._move_selection(1))
+        self.canvas.bind('<Prior>', lambda e: self._move_selection(-self._visible_rows()))
+        self.canvas.bind('<Next>', lambda e: self._move_selection(self._visible_rows()))
+        self.canvas.bind('<Return>', self._on_double_click)
+
+    # ==================== 資料操作 ====================
+
+    def set_rows(self, rows: Sequence[Tuple], filter_text: Optional[str] = None):
+        """
+        設定整份資料（不建立任何 widget）
+
+        Args:
+            rows: 每列為一個 tuple，前 len(columns) 個欄位會被顯示
+            filter_text: 同時更新搜尋篩選（None 表示沿用目前的篩選）；
+                只篩選、重繪一次，不必再呼叫 set_filter
+        """
+        self._rows = list(rows)
+        self._keys = [" ".join(str(v) for v in row).lower() for row in self._rows]
+        self._selected = None
+        if filter_text is not None:
+            self._filter_text = filter_text.strip().lower()
+        self._apply_filter()
+
+    def set_filter(self, text: str):
+        """
+        設定搜尋篩選（比對列中任一欄位，不分大小寫）
+
+        Args:
+            text: 搜尋文字，空字串代表不篩選
+        """
+        self._filter_text = text.strip().lower()
+        self._apply_filter()
+
+    def _apply_filter(self):
+        """依目前篩選文字重建索引陣列並重繪"""
+        text = self._filter_text
+        if text:
+            self._view = [i for i, key in enumerate(self._keys) if text in key]
+        else:
+            # 不篩選時使用 range，不需複製索引
+            self._view = range(len(self._rows))
+
+        if self._selected is not None and self._selected not in self._view:
+            self._selected = None
+
+        self._top = 0
+        self._redraw()
+
+    def get_selected(self) -> Optional[Tuple]:
+        """取得目前選取的列資料，未選取時返回 None"""
+        if self._selected is None:
+            return None
+        return self._rows[self._selected]
+
+    @property
+    def row_count(self) -> int:
+        """篩選後的列數"""
+        return len(self._view)
+
+    # ==================== 繪製 ====================
+
+    def _column_x(self) -> List[int]:
+        """各欄文字的起點 x 座標（標題與資料列共用）"""
+        positions, x = [], 4
+        for _, col_width in self.columns:
+            positions.append(x)
+            x += col_width
+        return positions
+
+    def _visible_rows(self) -> int:
+        """畫面可完整顯示的列數"""
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def _ensure_pool(self):
+        """依 Canvas 高度調整列物件池大小"""
+        needed = self._visible_rows() + 1
+        width = max(self.canvas.winfo_width(), 1)
+
+        while len(self._pool) < needed:
+            y = len(self._pool) * self.row_height
+            rect = self.canvas.create_rectangle(0, y, width, y + self.row_height, outline="", fill="white")
+            texts = [
+                self.canvas.create_text(x, y + self.row_height // 2, anchor=tk.W, font=self.font, text="")
+                for x in self._column_x()
+            ]
+            self._pool.append((rect, texts))
+
+        while len(self._pool) > needed:
+            rect, texts = self._pool.pop()
+            self.canvas.delete(rect, *texts)
+
+        for slot, (rect, _) in enumerate(self._pool):
+            y = slot * self.row_height
+            self.canvas.coords(rect, 0, y, width, y + self.row_height)
+
+    def _redraw(self):
+        """只更新可見範圍內的列物件"""
+        self._ensure_pool()
+
+        total = len(self._view)
+        max_top = max(0, total - self._visible_rows())
+        self._top = min(max(self._top, 0), max_top)
+
+        for slot, (rect, texts) in enumerate(self._pool):
+            pos = self._top + slot
+            if pos < total:
+                index = self._view[pos]
+                row = self._rows[index]
+                selected = index == self._selected
+                self.canvas.itemconfigure(rect, fill="#3875d7" if selected else "white")
+                for col, text_id in enumerate(texts):
+                    value = row[col] if col < len(row) else ""
+                    self.canvas.itemconfigure(text_id, text=str(value), fill="white" if selected else "black")
+            else:
+                self.canvas.itemconfigure(rect, fill="white")
+                for text_id in texts:
+                    self.canvas.itemconfigure(text_id, text="")
+
+        if total:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + self._visible_rows()) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # ==================== 事件處理 ====================
+
+    def _on_configure(self, event):
+        """Canvas 大小變更時重建列物件池"""
+        self._redraw()
+
+    def _on_scrollbar(self, *args):
+        """捲軸拖曳或點擊"""
+        if args[0] == 'moveto':
+            self._top = int(float(args[1]) * len(self._view))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self._visible_rows()
+            self._top += step
+        self._redraw()
+
+    def _on_mousewheel(self, event):
+        """滾輪捲動（回傳 break 避免外層 bind_all 一併捲動）"""
+        if event.num == 5 or event.delta < 0:
+            self._top += 3
+        elif event.num == 4 or event.delta > 0:
+            self._top -= 3
+        self._redraw()
+        return "break"
+
+    def _index_at(self, y: int) -> Optional[int]:
+        """將 Canvas y 座標轉換為資料索引"""
+        pos = self._top + y // self.row_height
+        if 0 <= pos < len(self._view):
+            return self._view[pos]
+        return None
+
+    def _on_click(self, event):
+        """點擊選取"""
+        self.canvas.focus_set()
+        self._selected = self._index_at(event.y)
+        self._redraw()
+
+    def _on_double_click(self, event):
+        """雙擊或 Enter 觸發 on_activate"""
+        if self._selected is not None and self.on_activate:
+            self.on_activate(self._rows[self._selected])
+
+    def _move_selection(self, step: int):
+        """鍵盤移動選取列，必要時捲動"""
+        total = len(self._view)
+        if not total:
+            return
+        if self._selected is None:
+            pos = self._top
+        else:
+            try:
+                pos = self._view.index(self._selected) + step
+            except ValueError:
+                pos = self._top
+        pos = min(max(pos, 0), total - 1)
+        self._selected = self._view[pos]
+
+        visible = self._visible_rows()
+        if pos < self._top:
+            self._top = pos
+        elif pos >= self._top + visible:
+            self._top = pos - visible + 1
+        self._redraw()